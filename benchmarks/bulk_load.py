@@ -0,0 +1,79 @@
+"""
+Benchmark de importação: linhas por minuto com MyTwitter.bulk_load, comparado com
+chamadas individuais a criar_perfil, seguir e tweetar.
+
+Uso:
+    python -m benchmarks.bulk_load [usuarios] [follows] [tweets] [memoria|log|sqlite]
+
+Com repositórios em disco, bulk_load grava tudo em um único lote (uma transação
+no SQLite), enquanto as chamadas individuais fazem uma escrita por operação.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from classes.armazenamento import RepositorioUsuariosPersistente
+from classes.mytwitter import MyTwitter
+from classes.repositorio import RepositorioUsuarios
+from classes.repositorio_sqlite import RepositorioUsuariosSQLite
+from classes.perfis import Perfil
+from classes.tweet import gerador_id
+
+def gerar_linhas(usuarios: int, follows: int, tweets: int):
+    """
+    Gera linhas sintéticas de importação (semente fixa).
+    """
+    aleatorio = random.Random(42)
+    nomes = [f"u{i}" for i in range(usuarios)]
+    pares = [(aleatorio.choice(nomes), aleatorio.choice(nomes)) for _ in range(follows)]
+    mensagens = [(aleatorio.choice(nomes), f"tweet {i}") for i in range(tweets)]
+    return nomes, pares, mensagens
+
+def novo_repositorio(tipo: str, diretorio: str):
+    """
+    Cria um repositório vazio do tipo informado.
+    """
+    if tipo == 'log':
+        return RepositorioUsuariosPersistente(diretorio, compactar_a_cada=10**9)
+    if tipo == 'sqlite':
+        return RepositorioUsuariosSQLite(os.path.join(diretorio, 'mytwitter.db'))
+    return RepositorioUsuarios()
+
+def individual(repositorio, nomes, pares, mensagens) -> None:
+    twitter = MyTwitter(repositorio=repositorio)
+    gerador = gerador_id()
+    for nome in nomes:
+        twitter.criar_perfil(Perfil(nome))
+    for seguidor, seguido in pares:
+        try:
+            twitter.seguir(seguidor, seguido)
+        except Exception:
+            pass
+    for usuario, mensagem in mensagens:
+        twitter.tweetar(usuario, mensagem, gerador)
+
+def em_massa(repositorio, nomes, pares, mensagens) -> None:
+    MyTwitter(repositorio=repositorio).bulk_load(perfis=(Perfil(nome) for nome in nomes), follows=pares, tweets=mensagens,
+                          gerador_id=gerador_id())
+
+def main():
+    usuarios = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    follows = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    tweets = int(sys.argv[3]) if len(sys.argv) > 3 else 1_000_000
+    tipo = sys.argv[4] if len(sys.argv) > 4 else 'memoria'
+    linhas = gerar_linhas(usuarios, follows, tweets)
+    total = usuarios + follows + tweets
+    print(f"{usuarios} perfis, {follows} follows, {tweets} tweets, repositório: {tipo}")
+    for nome, funcao in (('individual', individual), ('bulk_load', em_massa)):
+        with tempfile.TemporaryDirectory() as diretorio:
+            repositorio = novo_repositorio(tipo, diretorio)
+            inicio = time.perf_counter()
+            funcao(repositorio, *linhas)
+            if hasattr(repositorio, 'fechar'):
+                repositorio.fechar()
+            tempo = time.perf_counter() - inicio
+        print(f"{nome:10}: {tempo:6.2f}s, {total / tempo * 60 / 1e6:6.2f} milhões de linhas/minuto")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Teste de carga do servidor de linha (classes.servidor) em uma única máquina.
+
+Sobe o servidor no mesmo processo, em uma porta livre, e abre `clientes` conexões
+concorrentes; cada cliente faz `requisicoes` operações (tweetar, timeline, seguir e
+perfil_stats misturados).
+
+Uso:
+    python -m benchmarks.carga_servidor [clientes] [requisicoes]
+"""
+import asyncio
+import json
+import random
+import sys
+import time
+from classes.assincrono import AsyncMyTwitter
+from classes.servidor import servir
+
+async def cliente(endereco, numero: int, requisicoes: int, clientes: int) -> None:
+    leitor, escritor = await asyncio.open_connection(*endereco)
+    aleatorio = random.Random(numero)
+
+    async def pedir(op, *args):
+        escritor.write(json.dumps({'op': op, 'args': list(args)}).encode() + b'\n')
+        await escritor.drain()
+        return json.loads(await leitor.readline())
+
+    usuario = f"c{numero}"
+    await pedir('criar_perfil', {'usuario': usuario})
+    for i in range(requisicoes):
+        sorteio = aleatorio.random()
+        if sorteio < 0.4:
+            await pedir('tweetar', usuario, f"mensagem {i}")
+        elif sorteio < 0.8:
+            await pedir('timeline', usuario, 20)
+        elif sorteio < 0.9:
+            await pedir('seguir', usuario, f"c{aleatorio.randrange(clientes)}")
+        else:
+            await pedir('perfil_stats', usuario)
+    escritor.close()
+
+async def main():
+    clientes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    requisicoes = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    servidor = await servir(AsyncMyTwitter(), porta=0)
+    endereco = servidor.sockets[0].getsockname()[:2]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(endereco, numero, requisicoes, clientes) for numero in range(clientes)))
+    tempo = time.perf_counter() - inicio
+    total = clientes * (requisicoes + 1)
+    print(f"{clientes} clientes, {total} requisições em {tempo:.2f}s: {total / tempo:,.0f} req/s")
+    servidor.close()
+    await servidor.wait_closed()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""
+Benchmark de memória: bytes por tweet antes e depois da representação com __slots__.
+
+Uso:
+    python -m benchmarks.memoria_tweet [quantidade]
+"""
+import sys
+import tracemalloc
+from datetime import datetime
+from classes.tweet import Tweet, gerador_id
+
+class TweetLegado:
+    """
+    Representação original do Tweet (__dict__, datetime e cópia do nome do autor),
+    mantida aqui apenas para comparação.
+    """
+
+    def __init__(self, usuario: str, mensagem: str, gerador_id):
+        self.__id = next(gerador_id)
+        self.__usuario = usuario
+        self.__mensagem = mensagem
+        self.__data_postagem = datetime.today()
+
+def medir(classe, quantidade: int, autores: int = 1000) -> float:
+    """
+    Mede a memória alocada por tweet ao criar `quantidade` tweets da classe informada.
+
+    Os nomes dos autores são montados em tempo de execução, como acontece com
+    nomes lidos do terminal, e as mensagens são compartilhadas para medir
+    apenas o custo do registro em si.
+
+    :return: Bytes alocados por tweet.
+    """
+    mensagens = [f"mensagem {i}" for i in range(100)]
+    gerador = gerador_id()
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    tweets = [classe(''.join(['usuario_', str(i % autores)]), mensagens[i % 100], gerador) for i in range(quantidade)]
+    fim = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tweets
+    return (fim - inicio) / quantidade
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    antes = medir(TweetLegado, quantidade)
+    depois = medir(Tweet, quantidade)
+    print(f"{quantidade} tweets")
+    print(f"Tweet legado (__dict__): {antes:8.1f} bytes/tweet")
+    print(f"Tweet (__slots__):       {depois:8.1f} bytes/tweet")
+    print(f"Redução:                 {100 * (1 - depois / antes):8.1f}%")
+
+if __name__ == '__main__':
+    main()
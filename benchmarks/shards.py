@@ -0,0 +1,53 @@
+"""
+Vazão de tweetar: MyTwitter em um processo vs. MyTwitterShardeado com N shards.
+
+Cria `perfis` perfis e publica `tweets` tweets em lotes de `lote` (tweetar_lote
+no roteador), medindo tweets/s. Em máquinas com vários núcleos, a vazão do modo
+particionado deve crescer com o número de shards.
+
+Uso:
+    python -m benchmarks.shards [perfis] [tweets] [lote]
+"""
+import multiprocessing
+import sys
+import time
+from classes.mytwitter import MyTwitter
+from classes.perfis import Perfil
+from classes.shards import MyTwitterShardeado
+from classes.tweet import GeradorSnowflake
+
+def medir_local(perfis: int, tweets: int) -> float:
+    twitter = MyTwitter()
+    gerador = GeradorSnowflake()
+    for i in range(perfis):
+        twitter.criar_perfil(Perfil(f"u{i}"))
+    inicio = time.perf_counter()
+    for i in range(tweets):
+        twitter.tweetar(f"u{i % perfis}", f"mensagem {i}", gerador)
+    return tweets / (time.perf_counter() - inicio)
+
+def medir_shards(processos: int, perfis: int, tweets: int, lote: int) -> float:
+    twitter = MyTwitterShardeado(processos=processos)
+    try:
+        for i in range(perfis):
+            twitter.criar_perfil(Perfil(f"u{i}"))
+        inicio = time.perf_counter()
+        for comeco in range(0, tweets, lote):
+            twitter.tweetar_lote((f"u{i % perfis}", f"mensagem {i}") for i in range(comeco, min(comeco + lote, tweets)))
+        return tweets / (time.perf_counter() - inicio)
+    finally:
+        twitter.fechar()
+
+def main():
+    perfis = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    tweets = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    lote = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+    print(f"{multiprocessing.cpu_count()} CPUs, {perfis} perfis, {tweets} tweets, lotes de {lote}")
+    print(f"{'1 processo':>12}: {medir_local(perfis, tweets):>10,.0f} tweets/s")
+    processos = 1
+    while processos <= multiprocessing.cpu_count():
+        print(f"{f'{processos} shards':>12}: {medir_shards(processos, perfis, tweets, lote):>10,.0f} tweets/s")
+        processos *= 2
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark de inicialização dos repositórios persistentes: abrir o snapshot binário
+mapeado mais o log (RepositorioUsuariosPersistenteMapeado) e atender a primeira consulta,
+comparado com o carregamento completo do snapshot JSON mais o log
+(RepositorioUsuariosPersistente). Os dois partem dos mesmos perfis compactados.
+
+Uso:
+    python -m benchmarks.snapshot_startup [usuarios] [tweets] [seguidos_por_usuario]
+
+O padrão é 1.000.000 de usuários e 10.000.000 de tweets; a geração dos dados e o
+carregamento completo do JSON levam vários minutos e alguns GB de memória nessa escala.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from classes.armazenamento import RepositorioUsuariosPersistente
+from classes.mytwitter import MyTwitter
+from classes.perfis import Perfil
+from classes.repositorio import RepositorioUsuarios
+from classes.snapshot import RepositorioUsuariosPersistenteMapeado, gravar_snapshot
+from classes.tweet import Tweet
+
+def gerar_perfis(usuarios: int, tweets: int, seguidos: int):
+    """
+    Gera perfis sintéticos com tweets e vínculos aleatórios (semente fixa).
+    """
+    aleatorio = random.Random(42)
+    perfis = [Perfil(f"u{i}") for i in range(usuarios)]
+    for id in range(1, tweets + 1):
+        perfil = perfis[aleatorio.randrange(usuarios)]
+        perfil.add_tweet(Tweet.restaurar(perfil.get_usuario(), f"tweet {id}", id, 1_700_000_000_000_000 + id))
+    for perfil in perfis:
+        for seguido in aleatorio.sample(perfis, min(seguidos, usuarios)):
+            if seguido is not perfil:
+                perfil.add_seguidos(seguido)
+                seguido.add_seguidor(perfil)
+                perfil.ajustar_seguidos_ativos(1)
+                seguido.ajustar_seguidores_ativos(1)
+    return perfis
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+def main():
+    usuarios = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tweets = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000_000
+    seguidos = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    perfis, tempo = cronometrar(lambda: gerar_perfis(usuarios, tweets, seguidos))
+    print(f"{usuarios} usuários, {tweets} tweets, {seguidos} seguidos/usuário (gerados em {tempo:.1f}s)")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        dir_mapeado = os.path.join(diretorio, 'mmap')
+        dir_json = os.path.join(diretorio, 'json')
+        os.makedirs(dir_mapeado)
+        caminho = os.path.join(dir_mapeado, RepositorioUsuariosPersistenteMapeado.ARQUIVO_SNAPSHOT)
+        _, tempo = cronometrar(lambda: gravar_snapshot(caminho, perfis))
+        print(f"snapshot binário: {os.path.getsize(caminho) / 2**20:.1f} MiB, gravado em {tempo:.2f}s")
+
+        persistente = RepositorioUsuariosPersistente(dir_json)
+        for perfil in perfis:
+            RepositorioUsuarios.cadastrar(persistente, perfil) # sem passar pelo log
+        _, tempo = cronometrar(persistente.compactar)
+        persistente.fechar()
+        print(f"snapshot JSON gravado em {tempo:.2f}s")
+        del perfis, persistente
+
+        usuario = f"u{usuarios // 2}"
+
+        def abrir_mapeado():
+            repositorio = RepositorioUsuariosPersistenteMapeado(dir_mapeado)
+            twitter = MyTwitter(repositorio=repositorio)
+            return repositorio, twitter
+
+        (repositorio, twitter), abertura = cronometrar(abrir_mapeado)
+        _, consulta = cronometrar(lambda: (twitter.existe_usuario(usuario), twitter.timeline(usuario, limit=20)))
+        print(f"mmap: abertura {abertura * 1000:8.2f} ms, primeira timeline {consulta * 1000:8.2f} ms, "
+              f"{len(repositorio.get_usuarios_carregados())} perfis materializados")
+        repositorio.fechar()
+
+        def abrir_json():
+            repositorio = RepositorioUsuariosPersistente(dir_json)
+            twitter = MyTwitter(repositorio=repositorio)
+            return repositorio, twitter
+
+        (repositorio, twitter), abertura = cronometrar(abrir_json)
+        _, consulta = cronometrar(lambda: (twitter.existe_usuario(usuario), twitter.timeline(usuario, limit=20)))
+        print(f"JSON: abertura {abertura * 1000:8.2f} ms, primeira timeline {consulta * 1000:8.2f} ms")
+        repositorio.fechar()
+
+if __name__ == '__main__':
+    main()
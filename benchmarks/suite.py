@@ -0,0 +1,206 @@
+"""
+Suíte de benchmarks das operações principais do MyTwitter em escala.
+
+Para cada tamanho de rede, gera um grafo sintético (semente fixa) e mede, para
+cada operação: operações por segundo, latências p50/p99 e pico de memória
+alocada durante a operação (tracemalloc, em uma passada separada, para não
+distorcer as latências). Os resultados são salvos em JSON, com o commit atual,
+para comparar execuções entre commits.
+
+O grafo segue uma distribuição de lei de potência: a chance de um perfil ser
+seguido (e de tweetar) cai com seu posto, como na lei de Zipf, de modo que poucos
+perfis concentram muitos seguidores.
+
+Uso:
+    python -m benchmarks.suite --usuarios 1000,100000,1000000 --saida resultados.json
+    python -m benchmarks.suite --usuarios 1000 --comparar resultados.json
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from bisect import bisect_left
+from datetime import datetime, timezone
+from itertools import accumulate
+from typing import Callable, Dict, List, Tuple
+from classes.mytwitter import MyTwitter
+from classes.perfis import Perfil
+from classes.repositorio import RepositorioUsuarios
+from classes.tweet import GeradorSnowflake
+
+# Amostras máximas por operação (operações O(n) não precisam de milhares de amostras)
+LIMITE_AMOSTRAS = {'usuarios_cadastrados': 5}
+
+def gerar_rede(usuarios: int, seguidos_medio: int, tweets_medio: float, expoente: float,
+               semente: int) -> Tuple[List[str], List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """
+    Gera perfis, follows e tweets sintéticos.
+
+    :param usuarios: Número de perfis.
+    :param seguidos_medio: Número médio de perfis seguidos por usuário.
+    :param tweets_medio: Número médio de tweets por usuário (taxa de postagem).
+    :param expoente: Expoente da lei de potência (0 para distribuição uniforme).
+    :param semente: Semente do gerador aleatório.
+    :return: Nomes, pares (seguidor, seguido) e pares (usuario, mensagem).
+    """
+    aleatorio = random.Random(semente)
+    nomes = [f"u{i}" for i in range(usuarios)]
+    postos = list(range(usuarios))
+    aleatorio.shuffle(postos) # o posto de popularidade não depende do nome
+    pesos = list(accumulate(1 / (posto + 1) ** expoente for posto in postos))
+
+    def sortear(quantidade: int) -> List[str]:
+        return [nomes[i] for i in (bisect_left(pesos, aleatorio.random() * pesos[-1]) for _ in range(quantidade))]
+
+    follows = []
+    for nome in nomes:
+        grau = min(usuarios - 1, int(aleatorio.expovariate(1 / seguidos_medio)))
+        follows.extend((nome, seguido) for seguido in set(sortear(grau)) if seguido != nome)
+    autores = sortear(int(usuarios * tweets_medio))
+    tweets = [(autor, f"tweet {i} de {autor}") for i, autor in enumerate(autores)]
+    return nomes, follows, tweets
+
+def medir(operacao: Callable[[], object], amostras: int) -> Dict:
+    """
+    Executa a operação `amostras` vezes, medindo a latência de cada chamada.
+
+    Exceções das regras do MyTwitter (por exemplo, seguir quem já é seguido)
+    também são chamadas medidas, e são contadas em 'erros'.
+    """
+    latencias = []
+    erros = 0
+    for _ in range(amostras):
+        inicio = time.perf_counter_ns()
+        try:
+            operacao()
+        except Exception:
+            erros += 1
+        latencias.append(time.perf_counter_ns() - inicio)
+    latencias.sort()
+    total = sum(latencias) / 1e9
+    return {
+        'amostras': amostras,
+        'erros': erros,
+        'ops_por_s': amostras / total if total else None,
+        'p50_us': latencias[len(latencias) // 2] / 1000,
+        'p99_us': latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))] / 1000,
+    }
+
+def medir_memoria(operacao: Callable[[], object], amostras: int) -> int:
+    """
+    Retorna o pico de memória (bytes) alocada acima da linha de base durante as chamadas.
+    """
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for _ in range(amostras):
+        try:
+            operacao()
+        except Exception:
+            pass
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return pico - base
+
+def executar(usuarios: int, args: argparse.Namespace) -> Dict:
+    """
+    Monta uma rede com `usuarios` perfis e mede cada operação sobre ela.
+    """
+    nomes, follows, tweets = gerar_rede(usuarios, args.seguidos, args.tweets, args.expoente, args.semente)
+    repositorio = RepositorioUsuarios()
+    twitter = MyTwitter(repositorio=repositorio)
+    gerador = GeradorSnowflake()
+    inicio = time.perf_counter()
+    twitter.bulk_load(perfis=(Perfil(nome) for nome in nomes), follows=follows, tweets=tweets, gerador_id=gerador)
+    construcao = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    twitter.recalcular_sugestoes()
+    sugestoes = time.perf_counter() - inicio
+    print(f"  construção {construcao:.1f}s, sugestões de todos os perfis {sugestoes:.1f}s")
+
+    aleatorio = random.Random(args.semente + 1)
+    sortear = lambda: nomes[aleatorio.randrange(usuarios)]
+    # leituras primeiro, depois as escritas, que alteram a rede
+    operacoes = {
+        'buscar': lambda: repositorio.buscar(sortear()),
+        'timeline': lambda: twitter.timeline(sortear(), limit=20),
+        'seguidores': lambda: twitter.seguidores(sortear()),
+        'seguidos': lambda: twitter.seguidos(sortear()),
+        'seguidores_pagina': lambda: twitter.seguidores(sortear(), limit=20),
+        'perfil_stats': lambda: twitter.perfil_stats(sortear()),
+        'buscar_tweets': lambda: twitter.buscar_tweets(f"tweet de {sortear()}"),
+        'sugerir_usuarios': lambda: twitter.sugerir_usuarios(sortear()[:3]),
+        'sugestoes_para_seguir': lambda: twitter.sugestoes_para_seguir(sortear()),
+        'usuarios_cadastrados': twitter.usuarios_cadastrados,
+        'tweetar': lambda: twitter.tweetar(sortear(), "mensagem de benchmark", gerador),
+        'seguir': lambda: twitter.seguir(sortear(), sortear()),
+    }
+    resultados = {}
+    for nome, operacao in operacoes.items():
+        amostras = min(args.amostras, LIMITE_AMOSTRAS.get(nome, args.amostras))
+        resultado = medir(operacao, amostras)
+        resultado['pico_memoria_bytes'] = medir_memoria(operacao, max(1, amostras // 10))
+        resultados[nome] = resultado
+        print(f"  {nome:21} {resultado['ops_por_s']:>12,.0f} ops/s  p50 {resultado['p50_us']:>10,.1f}us  "
+              f"p99 {resultado['p99_us']:>10,.1f}us  pico {resultado['pico_memoria_bytes'] / 1024:>10,.1f} KiB")
+    return {'perfis': usuarios, 'follows': len(follows), 'tweets': len(tweets), 'construcao_s': construcao,
+            'recalcular_sugestoes_s': sugestoes,
+            'operacoes': resultados}
+
+def commit_atual() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def comparar(atual: Dict, anterior: Dict) -> None:
+    """
+    Mostra a razão de ops/s e p99 de cada operação em relação a uma execução anterior.
+    """
+    print(f"comparação com {anterior.get('commit') or 'execução anterior'}:")
+    for tamanho, rede in atual['redes'].items():
+        antiga = anterior['redes'].get(tamanho)
+        if antiga is None:
+            continue
+        for nome, resultado in rede['operacoes'].items():
+            base = antiga['operacoes'].get(nome)
+            if base and base['ops_por_s'] and resultado['ops_por_s']:
+                print(f"  {tamanho:>8} {nome:21} ops/s x{resultado['ops_por_s'] / base['ops_por_s']:5.2f}  "
+                      f"p99 x{resultado['p99_us'] / base['p99_us']:5.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--usuarios', default='1000,100000', help='tamanhos de rede, separados por vírgula')
+    parser.add_argument('--seguidos', type=int, default=20, help='número médio de seguidos por perfil')
+    parser.add_argument('--tweets', type=float, default=10, help='número médio de tweets por perfil')
+    parser.add_argument('--expoente', type=float, default=1.0, help='expoente da lei de potência')
+    parser.add_argument('--amostras', type=int, default=2000, help='chamadas medidas por operação')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help='arquivo JSON com os resultados')
+    parser.add_argument('--comparar', help='arquivo JSON de uma execução anterior')
+    args = parser.parse_args()
+
+    relatorio = {
+        'commit': commit_atual(),
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'parametros': {chave: valor for chave, valor in vars(args).items() if chave not in ('saida', 'comparar')},
+        'redes': {},
+    }
+    for usuarios in (int(tamanho) for tamanho in args.usuarios.split(',')):
+        print(f"{usuarios} perfis:")
+        relatorio['redes'][str(usuarios)] = executar(usuarios, args)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            comparar(relatorio, json.load(arquivo))
+
+if __name__ == '__main__':
+    main()
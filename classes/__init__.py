@@ -1,14 +1,28 @@
 from .perfis import Perfil, PessoaFisica, PessoaJuridica 
-from .tweet import Tweet, gerador_id
-from exceptions import PEException, PDException, PIException, MFPException, SIException, PJSException 
+from .tweet import Tweet, gerador_id, GeradorSnowflake
+from exceptions import PEException, PDException, PIException, MFPException, SIException, PJSException, PNSException, PBException, TIException, TEException
 from .repositorio import RepositorioUsuarios
+from .tweetstore import TweetStore, TweetView
+from .armazenamento import RepositorioUsuariosPersistente
+from .repositorio_sqlite import RepositorioUsuariosSQLite
+from .snapshot import RepositorioUsuariosMapeado, RepositorioUsuariosPersistenteMapeado, gravar_snapshot
+from .paginacao import Pagina
+from .metricas import Metricas
+from .topicos import Tendencias
 from .mytwitter import MyTwitter
+from .assincrono import AsyncMyTwitter
+from .shards import MyTwitterShardeado
 
 
 __all__ = [
     "Perfil", "PessoaFisica", "PessoaJuridica",  
-    "Tweet", "gerador_id", "PEException",
+    "Tweet", "gerador_id", "GeradorSnowflake", "PEException",
     "PDException", "PIException", "MFPException",
-    "SIException", "PJSException", "RepositorioUsuarios", 
-    "MyTwitter"
+    "SIException", "PJSException", "PNSException", "PBException", "TIException", "TEException",
+    "RepositorioUsuarios", "RepositorioUsuariosPersistente", "RepositorioUsuariosMapeado", "gravar_snapshot",
+    "RepositorioUsuariosPersistenteMapeado",
+    "RepositorioUsuariosSQLite",
+    "TweetStore", "TweetView", "Pagina",
+    "Metricas", "Tendencias",
+    "MyTwitter", "AsyncMyTwitter", "MyTwitterShardeado"
 ]
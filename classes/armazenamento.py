@@ -0,0 +1,427 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List
+from .perfis import Perfil, PessoaFisica, PessoaJuridica
+from .repositorio import RepositorioUsuarios
+from .tweet import Tweet
+
+def serializar_perfil(perfil: Perfil) -> Dict:
+    """
+    Converte os dados cadastrais de um perfil (sem tweets e sem grafo) em um dicionário.
+    """
+    if isinstance(perfil, PessoaFisica):
+        tipo, documento = 'PessoaFisica', perfil.get_cpf()
+    elif isinstance(perfil, PessoaJuridica):
+        tipo, documento = 'PessoaJuridica', perfil.get_cnpj()
+    else:
+        tipo, documento = 'Perfil', None
+    return {'usuario': perfil.get_usuario(), 'tipo': tipo, 'documento': documento, 'ativo': perfil.is_ativo()}
+
+def criar_perfil(dados: Dict) -> Perfil:
+    """
+    Recria um perfil a partir do dicionário gerado por serializar_perfil.
+    """
+    if dados['tipo'] == 'PessoaFisica':
+        perfil = PessoaFisica(dados['usuario'], dados['documento'])
+    elif dados['tipo'] == 'PessoaJuridica':
+        perfil = PessoaJuridica(dados['usuario'], dados['documento'])
+    else:
+        perfil = Perfil(dados['usuario'])
+    if not dados['ativo']:
+        perfil.set_inativo()
+    return perfil
+
+def aplicar_seguir(seguidor: Perfil, seguido: Perfil) -> None:
+    """
+    Liga dois perfis no grafo, sem registrar evento (carga de snapshot e de log).
+    """
+    seguidor.add_seguidos(seguido)
+    seguido.add_seguidor(seguidor)
+
+def recalcular_contadores(perfis: List[Perfil]) -> None:
+    """
+    Recalcula os contadores de seguidores e seguidos ativos de perfis recém-carregados
+    (com contadores zerados).
+    """
+    for perfil in perfis:
+        perfil.ajustar_seguidores_ativos(sum(1 for seguidor in perfil.get_seguidores() if seguidor.is_ativo()))
+        perfil.ajustar_seguidos_ativos(sum(1 for seguido in perfil.get_seguidos() if seguido.is_ativo()))
+
+
+class LogEventos:
+    """
+    Log de eventos somente de acréscimo (write-ahead log), um evento JSON por linha.
+
+    As escritas são sequenciais e agrupadas: o fsync é feito uma vez por grupo
+    (group commit), quando `max_pendentes` eventos se acumulam ou quando
+    `intervalo_fsync` segundos se passam desde a última sincronização. Em caso de
+    queda, perdem-se no máximo os eventos do último grupo; sincronizar() força a
+    gravação imediata.
+
+    Cada evento recebe um número de sequência crescente (campo 'n'), que continua
+    de onde parou ao reabrir o log e permite saber quais eventos um snapshot já inclui.
+    """
+
+    def __init__(self, caminho: str, intervalo_fsync: float = 0.05, max_pendentes: int = 256, ultimo: int = 0):
+        """
+        Abre (ou cria) o log para acréscimo.
+
+        :param caminho: Caminho do arquivo de log.
+        :param intervalo_fsync: Tempo máximo, em segundos, entre um evento e seu fsync.
+        :param max_pendentes: Número máximo de eventos não sincronizados.
+        :param ultimo: Número de sequência do último evento já registrado.
+        """
+        self.__caminho = caminho
+        self.__intervalo_fsync = intervalo_fsync
+        self.__max_pendentes = max_pendentes
+        self.__arquivo = open(caminho, 'a', encoding='utf-8')
+        self.__pendentes = 0
+        self.__ultima_sincronizacao = time.monotonic()
+        self.__ultimo = ultimo
+        self.__trava = threading.RLock() # eventos podem vir de várias threads
+
+    def get_ultimo(self) -> int:
+        """
+        Retorna o número de sequência do último evento registrado.
+        """
+        return self.__ultimo
+
+    def registrar(self, evento: Dict) -> None:
+        """
+        Acrescenta um evento ao log, numerando-o.
+        """
+        with self.__trava:
+            self.__ultimo += 1
+            evento['n'] = self.__ultimo
+            self.__arquivo.write(json.dumps(evento, ensure_ascii=False, separators=(',', ':')) + '\n')
+            self.__pendentes += 1
+            if (self.__pendentes >= self.__max_pendentes
+                    or time.monotonic() - self.__ultima_sincronizacao >= self.__intervalo_fsync):
+                self.sincronizar()
+
+    def sincronizar(self) -> None:
+        """
+        Grava em disco (fsync) todos os eventos pendentes.
+        """
+        with self.__trava:
+            self.__arquivo.flush()
+            os.fsync(self.__arquivo.fileno())
+            self.__pendentes = 0
+            self.__ultima_sincronizacao = time.monotonic()
+
+    def truncar(self) -> None:
+        """
+        Descarta todos os eventos do log (usado após a compactação em snapshot).
+        """
+        self.__arquivo.close()
+        self.__arquivo = open(self.__caminho, 'w', encoding='utf-8')
+        self.sincronizar()
+
+    def fechar(self) -> None:
+        """
+        Sincroniza e fecha o log.
+        """
+        self.sincronizar()
+        self.__arquivo.close()
+
+    @staticmethod
+    def ler(caminho: str) -> Iterator[Dict]:
+        """
+        Lê os eventos de um log. Uma última linha incompleta (escrita interrompida) é ignorada.
+        """
+        if not os.path.exists(caminho):
+            return
+        with open(caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                if not linha.endswith('\n'):
+                    break
+                yield json.loads(linha)
+
+
+class PersistenciaEventosMixin:
+    """
+    Log de eventos e compactação em snapshot, comuns aos repositórios persistidos em disco.
+
+    Todas as alterações (perfis, tweets e vínculos de seguidor) são acrescentadas
+    a um log de eventos; periodicamente, o estado completo é compactado em um
+    snapshot e o log é truncado. Ao abrir, o repositório carrega o snapshot e
+    reaplica os eventos do log posteriores a ele.
+
+    O snapshot guarda o número de sequência do último evento que inclui, e a
+    reaplicação é idempotente (tweets já carregados são ignorados): uma queda entre
+    a troca do snapshot e o truncamento do log não duplica nem perde eventos.
+
+    A classe concreta define o formato do snapshot (ARQUIVO_SNAPSHOT, _ler_snapshot,
+    _gravar_snapshot e _ajustar_contadores) e chama _abrir_log no seu __init__.
+    """
+
+    ARQUIVO_LOG = 'eventos.log'
+    ARQUIVO_SNAPSHOT = ''
+
+    def _abrir_log(self, diretorio: str, compactar_a_cada: int, intervalo_fsync: float, max_pendentes: int) -> None:
+        """
+        Carrega o snapshot e reaplica o log do diretório, e abre o log para novos eventos.
+
+        :param diretorio: Diretório onde ficam o log e o snapshot.
+        :param compactar_a_cada: Número de eventos no log que dispara uma compactação.
+        :param intervalo_fsync: Tempo máximo, em segundos, entre um evento e seu fsync.
+        :param max_pendentes: Número máximo de eventos por grupo de fsync.
+        """
+        self.__caminho_log = os.path.join(diretorio, self.ARQUIVO_LOG)
+        self.__caminho_snapshot = os.path.join(diretorio, self.ARQUIVO_SNAPSHOT)
+        self.__compactar_a_cada = compactar_a_cada
+        self.__eventos_no_log = 0
+        self.__trava = threading.RLock() # compactação exclusiva com o registro de eventos
+        ultimo = self.__carregar()
+        self.__log = LogEventos(self.__caminho_log, intervalo_fsync, max_pendentes, ultimo)
+
+    def _ler_snapshot(self, caminho: str) -> int:
+        """
+        Carrega o snapshot, se existir, e retorna o número do último evento que ele inclui.
+        """
+        raise NotImplementedError
+
+    def _gravar_snapshot(self, caminho: str, ultimo: int) -> None:
+        """
+        Grava o estado completo no snapshot, de forma atômica e sincronizada em disco.
+        """
+        raise NotImplementedError
+
+    def _ajustar_contadores(self, tocados: List[Perfil]) -> None:
+        """
+        Corrige os contadores de seguidores e seguidos ativos após reaplicar o log;
+        `tocados` são os perfis citados pelos eventos reaplicados.
+        """
+        raise NotImplementedError
+
+    def _restaurar(self, perfil: Perfil) -> None:
+        """
+        Cadastra um perfil lido do snapshot ou do log, sem registrar evento.
+        """
+        super().cadastrar(perfil)
+
+    def cadastrar(self, usuario: Perfil) -> None:
+        """
+        Cadastra um novo usuário e registra o evento no log.
+        """
+        super().cadastrar(usuario)
+        self.__registrar({'e': 'perfil', **serializar_perfil(usuario)})
+
+    def atualizar(self, perfil: Perfil) -> None:
+        """
+        Atualiza um perfil e registra seus dados cadastrais no log.
+        """
+        super().atualizar(perfil)
+        self.__registrar({'e': 'perfil', **serializar_perfil(perfil)})
+
+    def registrar_tweet(self, perfil: Perfil, tweet: Tweet) -> None:
+        """
+        Registra um tweet no log.
+        """
+        self.__registrar({'e': 'tweet', 'usuario': perfil.get_usuario(), 'id': tweet.get_id(),
+                          'mensagem': tweet.get_mensagem(), 'timestamp': tweet.get_timestamp()})
+
+    def registrar_seguir(self, seguidor: Perfil, seguido: Perfil) -> None:
+        """
+        Registra no log que um perfil passou a seguir outro.
+        """
+        self.__registrar({'e': 'seguir', 'seguidor': seguidor.get_usuario(), 'seguido': seguido.get_usuario()})
+
+    def registrar_deixar_de_seguir(self, seguidor: Perfil, seguido: Perfil) -> None:
+        """
+        Registra no log que um perfil deixou de seguir outro.
+        """
+        self.__registrar({'e': 'deixar_de_seguir', 'seguidor': seguidor.get_usuario(), 'seguido': seguido.get_usuario()})
+
+    def registrar_bloqueio(self, perfil: Perfil, bloqueado: Perfil) -> None:
+        """
+        Registra no log que um perfil bloqueou outro.
+        """
+        self.__registrar({'e': 'bloquear', 'usuario': perfil.get_usuario(), 'bloqueado': bloqueado.get_usuario()})
+
+    def sincronizar(self) -> None:
+        """
+        Força a gravação em disco dos eventos pendentes.
+        """
+        self.__log.sincronizar()
+
+    def precisa_compactar(self) -> bool:
+        """
+        Indica se o log atingiu `compactar_a_cada` eventos desde a última compactação.
+        """
+        return self.__eventos_no_log >= self.__compactar_a_cada
+
+    def compactar(self) -> None:
+        """
+        Grava o estado completo em um novo snapshot e trunca o log.
+
+        O snapshot é escrito em um arquivo temporário e trocado atomicamente, então
+        uma queda durante a compactação preserva o snapshot anterior e o log. Os perfis
+        não podem ser alterados durante a compactação: MyTwitter a executa com todas as
+        travas (veja precisa_compactar).
+        """
+        with self.__trava:
+            self.__log.sincronizar()
+            self._gravar_snapshot(self.__caminho_snapshot, self.__log.get_ultimo())
+            self.__log.truncar()
+            self.__eventos_no_log = 0
+
+    def fechar(self) -> None:
+        """
+        Sincroniza e fecha o log de eventos.
+        """
+        self.__log.fechar()
+
+    def __registrar(self, evento: Dict) -> None:
+        """
+        Acrescenta um evento ao log.
+        """
+        with self.__trava:
+            self.__log.registrar(evento)
+            self.__eventos_no_log += 1
+
+    def __carregar(self) -> int:
+        """
+        Carrega o snapshot e reaplica os eventos do log que ele não inclui.
+
+        :return: Número de sequência do último evento carregado.
+        """
+        ultimo = incluidos = self._ler_snapshot(self.__caminho_snapshot)
+        tocados = {}
+        for evento in LogEventos.ler(self.__caminho_log):
+            # eventos sem número são de logs antigos, sempre posteriores ao snapshot
+            n = evento.get('n', ultimo + 1)
+            ultimo = max(ultimo, n)
+            if n <= incluidos:
+                continue # já está no snapshot (queda antes de truncar o log)
+            self.__aplicar(evento)
+            self.__eventos_no_log += 1
+            for campo in ('usuario', 'seguidor', 'seguido', 'bloqueado'):
+                if campo in evento:
+                    perfil = self.buscar(evento[campo])
+                    tocados[perfil] = None
+        self._ajustar_contadores(list(tocados))
+        return ultimo
+
+    def __aplicar(self, evento: Dict) -> None:
+        """
+        Reaplica um evento do log sobre o estado em memória.
+        """
+        tipo = evento['e']
+        if tipo == 'perfil':
+            perfil = self.buscar(evento['usuario'])
+            if perfil is None:
+                self._restaurar(criar_perfil(evento))
+            elif evento['ativo']:
+                perfil.set_ativo()
+            else:
+                perfil.set_inativo()
+        elif tipo == 'tweet':
+            perfil = self.buscar(evento['usuario'])
+            if perfil.get_tweet(evento['id']) is None:
+                perfil.add_tweet(Tweet.restaurar(perfil.get_usuario(), evento['mensagem'], evento['id'], evento['timestamp']))
+        elif tipo == 'seguir':
+            aplicar_seguir(self.buscar(evento['seguidor']), self.buscar(evento['seguido']))
+        elif tipo == 'deixar_de_seguir':
+            seguidor, seguido = self.buscar(evento['seguidor']), self.buscar(evento['seguido'])
+            seguidor.remove_seguidos(seguido)
+            seguido.remove_seguidor(seguidor)
+        elif tipo == 'bloquear':
+            self.buscar(evento['usuario']).add_bloqueado(self.buscar(evento['bloqueado']))
+
+
+class RepositorioUsuariosPersistente(PersistenciaEventosMixin, RepositorioUsuarios):
+    """
+    Repositório de usuários persistido em disco, com snapshot em JSON.
+
+    As alterações vão para o log de eventos e são compactadas periodicamente em um
+    snapshot (veja PersistenciaEventosMixin). Ao abrir, todos os perfis são
+    carregados em memória. Seguidos e seguidores de cada perfil são gravados na
+    ordem em que os vínculos foram criados, que é a ordem das listagens paginadas.
+    Para abrir sem carregar os perfis, use RepositorioUsuariosPersistenteMapeado,
+    com o snapshot no formato binário.
+
+    Exemplo de uso:
+        repositorio = RepositorioUsuariosPersistente('dados')
+        twitter = MyTwitter(repositorio=repositorio)
+        ...
+        repositorio.fechar()
+    """
+
+    ARQUIVO_SNAPSHOT = 'snapshot.json'
+
+    def __init__(self, diretorio: str, compactar_a_cada: int = 100_000, intervalo_fsync: float = 0.05,
+                 max_pendentes: int = 256):
+        """
+        Abre o repositório, carregando o estado salvo no diretório.
+
+        :param diretorio: Diretório onde ficam o log e o snapshot.
+        :param compactar_a_cada: Número de eventos no log que dispara uma compactação.
+        :param intervalo_fsync: Tempo máximo, em segundos, entre um evento e seu fsync.
+        :param max_pendentes: Número máximo de eventos por grupo de fsync.
+        """
+        super().__init__()
+        os.makedirs(diretorio, exist_ok=True)
+        self._abrir_log(diretorio, compactar_a_cada, intervalo_fsync, max_pendentes)
+
+    def _ler_snapshot(self, caminho: str) -> int:
+        """
+        Reconstrói os perfis a partir do snapshot JSON.
+        """
+        if not os.path.exists(caminho):
+            return 0
+        with open(caminho, encoding='utf-8') as arquivo:
+            estado = json.load(arquivo)
+        # até a versão 2, só os seguidos eram gravados, e os seguidores vinham deles
+        com_seguidores = estado.get('versao', 1) >= 3
+        for dados in estado['perfis']:
+            self._restaurar(criar_perfil(dados))
+        for dados in estado['perfis']:
+            perfil = self.buscar(dados['usuario'])
+            for id, mensagem, timestamp in dados['tweets']:
+                perfil.add_tweet(Tweet.restaurar(perfil.get_usuario(), mensagem, id, timestamp))
+            for usuario in dados['seguidos']:
+                if com_seguidores:
+                    perfil.add_seguidos(self.buscar(usuario))
+                else:
+                    aplicar_seguir(perfil, self.buscar(usuario))
+            for usuario in dados.get('seguidores', ()):
+                perfil.add_seguidor(self.buscar(usuario))
+            for usuario in dados['bloqueados']:
+                perfil.add_bloqueado(self.buscar(usuario))
+        return estado.get('ultimo_evento', 0)
+
+    def _gravar_snapshot(self, caminho: str, ultimo: int) -> None:
+        """
+        Grava o snapshot JSON em um arquivo temporário e o troca atomicamente.
+        """
+        temporario = caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.__estado(ultimo), arquivo, ensure_ascii=False, separators=(',', ':'))
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, caminho)
+
+    def _ajustar_contadores(self, tocados: List[Perfil]) -> None:
+        """
+        Todos os perfis foram carregados com contadores zerados: recalcula todos.
+        """
+        recalcular_contadores(self.get_usuarios())
+
+    def __estado(self, ultimo: int) -> Dict:
+        """
+        Monta o estado completo do repositório para o snapshot, que inclui os eventos
+        do log até o número de sequência `ultimo`.
+        """
+        perfis = []
+        for perfil in self.get_usuarios():
+            dados = serializar_perfil(perfil)
+            dados['tweets'] = [[tweet.get_id(), tweet.get_mensagem(), tweet.get_timestamp()]
+                               for tweet in reversed(perfil.get_tweets())]
+            dados['seguidos'] = [seguido.get_usuario() for seguido in perfil.get_seguidos()]
+            dados['seguidores'] = [seguidor.get_usuario() for seguidor in perfil.get_seguidores()]
+            dados['bloqueados'] = [bloqueado.get_usuario() for bloqueado in perfil.get_bloqueados()]
+            perfis.append(dados)
+        return {'versao': 3, 'ultimo_evento': ultimo, 'perfis': perfis}
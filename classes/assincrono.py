@@ -0,0 +1,105 @@
+from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List
+from .mytwitter import MyTwitter
+from .paginacao import Pagina
+from .perfis import Perfil
+from .tweet import Tweet, GeradorSnowflake
+
+class AsyncMyTwitter:
+    """
+    Fachada assíncrona (asyncio) sobre um MyTwitter compartilhado.
+
+    Expõe as operações do MyTwitter como corrotinas para atender muitos clientes
+    concorrentes. O MyTwitter e seu repositório são acessados por um único
+    executor por vez:
+    - por padrão, as chamadas rodam no próprio laço de eventos; como nenhuma
+      operação cede o controle no meio, elas já são serializadas;
+    - com `em_thread=True`, as chamadas rodam em uma thread dedicada, para que
+      repositórios com E/S bloqueante (SQLite, log em disco) não travem o laço.
+
+    Exemplo de uso:
+        twitter = AsyncMyTwitter(MyTwitter())
+        await twitter.criar_perfil(Perfil("ana"))
+        tweet = await twitter.tweetar("ana", "oi")
+        print(await twitter.timeline("ana", limit=20))
+    """
+
+    def __init__(self, twitter: MyTwitter | None = None, em_thread: bool = False, gerador_id: Iterator[int] | None = None):
+        """
+        Inicializa a fachada.
+
+        :param twitter: Instância compartilhada (None para criar uma nova).
+        :param em_thread: Se True, executa as operações em uma thread dedicada.
+        :param gerador_id: Gerador dos IDs dos tweets (padrão: um GeradorSnowflake).
+        """
+        self.__twitter = twitter if twitter is not None else MyTwitter()
+        self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mytwitter') if em_thread else None
+        self.__gerador_id = gerador_id if gerador_id is not None else GeradorSnowflake()
+
+    async def __chamar(self, metodo, *args):
+        """
+        Executa uma operação do MyTwitter no executor configurado.
+        """
+        if self.__executor is None:
+            return metodo(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.__executor, metodo, *args)
+
+    async def existe_usuario(self, usuario: str) -> bool:
+        return await self.__chamar(self.__twitter.existe_usuario, usuario)
+
+    async def criar_perfil(self, perfil: Perfil) -> None:
+        return await self.__chamar(self.__twitter.criar_perfil, perfil)
+
+    async def cancelar_perfil(self, usuario: str) -> None:
+        return await self.__chamar(self.__twitter.cancelar_perfil, usuario)
+
+    async def tweetar(self, usuario: str, mensagem: str) -> Tweet:
+        return await self.__chamar(self.__twitter.tweetar, usuario, mensagem, self.__gerador_id)
+
+    async def timeline(self, usuario: str, limit: int | None = None, before_id: int | None = None) -> List[Tweet]:
+        return await self.__chamar(self.__twitter.timeline, usuario, limit, before_id)
+
+    async def tweets(self, usuario: str) -> List[Tweet]:
+        return await self.__chamar(self.__twitter.tweets, usuario)
+
+    async def get_tweet(self, tweet_id: int) -> Tweet:
+        return await self.__chamar(self.__twitter.get_tweet, tweet_id)
+
+    async def get_tweets_by_ids(self, ids: Iterable[int]) -> List[Tweet]:
+        return await self.__chamar(self.__twitter.get_tweets_by_ids, list(ids))
+
+    async def seguir(self, seguidor: str, seguido: str) -> None:
+        return await self.__chamar(self.__twitter.seguir, seguidor, seguido)
+
+    async def deixar_de_seguir(self, seguidor: str, seguido: str) -> None:
+        return await self.__chamar(self.__twitter.deixar_de_seguir, seguidor, seguido)
+
+    async def bloquear(self, usuario: str, bloqueado: str) -> None:
+        return await self.__chamar(self.__twitter.bloquear, usuario, bloqueado)
+
+    async def numero_seguidores(self, usuario: str) -> int:
+        return await self.__chamar(self.__twitter.numero_seguidores, usuario)
+
+    async def perfil_stats(self, usuario: str) -> Dict[str, int]:
+        return await self.__chamar(self.__twitter.perfil_stats, usuario)
+
+    async def seguidores(self, usuario: str, limit: int | None = None, cursor: int | None = None) -> Pagina[Perfil]:
+        return await self.__chamar(self.__twitter.seguidores, usuario, limit, cursor)
+
+    async def seguidos(self, usuario: str, limit: int | None = None, cursor: int | None = None) -> Pagina[Perfil]:
+        return await self.__chamar(self.__twitter.seguidos, usuario, limit, cursor)
+
+    async def usuarios_cadastrados(self, limit: int | None = None, cursor: int | None = None) -> Pagina[str]:
+        return await self.__chamar(self.__twitter.usuarios_cadastrados, limit, cursor)
+
+    async def get_instance_perfil(self, usuario: str) -> str:
+        return await self.__chamar(self.__twitter.get_instance_perfil, usuario)
+
+    def fechar(self) -> None:
+        """
+        Encerra a thread dedicada, se houver, após as operações pendentes.
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown()
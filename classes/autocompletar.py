@@ -0,0 +1,159 @@
+import threading
+from bisect import bisect_left, insort
+from heapq import nsmallest
+from typing import Dict, Iterable, List, Tuple
+from .perfis import Perfil
+from .repositorio import chave_usuario
+
+def pontuacao(perfil: Perfil) -> Tuple[bool, int]:
+    """
+    Relevância de um perfil nas sugestões: ativos antes de inativos, depois mais seguidores.
+    """
+    return (perfil.is_ativo(), perfil.get_num_seguidores_ativos())
+
+def ordem(perfil: Perfil) -> Tuple[bool, int, str]:
+    """
+    Chave de ordenação das sugestões (mais relevantes primeiro, empates em ordem alfabética).
+    """
+    ativo, seguidores = pontuacao(perfil)
+    return (not ativo, -seguidores, chave_usuario(perfil.get_usuario()))
+
+class Topo:
+    """
+    Os perfis mais relevantes de um prefixo, mantidos incrementalmente.
+
+    As posições são comparadas pela chave completa de ordem (com o nome como
+    desempate), a mesma usada na consulta, para que perfis empatados entrem e saiam
+    do topo na mesma ordem em que seriam sugeridos.
+
+    Atributos:
+        membros (Dict[Perfil, Tuple[bool, int, str]]): Perfis do topo e suas chaves de ordem.
+        teto (Tuple[bool, int, str]): Limite inferior das chaves de ordem dos perfis fora do topo.
+    """
+
+    __slots__ = ('membros', 'teto')
+
+    def __init__(self, membros: Dict[Perfil, Tuple[bool, int, str]], teto: Tuple[bool, int, str]) -> None:
+        self.membros = membros
+        self.teto = teto
+
+    def atualizar(self, perfil: Perfil, valor: Tuple[bool, int, str], capacidade: int) -> None:
+        """
+        Ajusta o topo à nova chave de ordem de um perfil do prefixo, mantendo-o exato:
+        um membro que passa para depois do teto sai do topo, e um perfil de fora que
+        passa para antes do teto entra nele.
+        """
+        if perfil in self.membros:
+            if valor > self.teto:
+                del self.membros[perfil]
+            else:
+                self.membros[perfil] = valor
+        elif valor < self.teto:
+            self.membros[perfil] = valor
+            if len(self.membros) > capacidade:
+                ultimo = max(self.membros, key=self.membros.get)
+                self.teto = min(self.teto, self.membros.pop(ultimo))
+
+class IndiceUsuarios:
+    """
+    Índice de prefixos dos nomes de usuário, para sugestões enquanto se digita.
+
+    Os nomes normalizados (veja chave_usuario) ficam em uma lista ordenada, onde os
+    nomes com um prefixo formam um intervalo encontrado por busca binária. Para
+    prefixos com muitos nomes, o topo dos `capacidade` perfis mais relevantes é
+    calculado na primeira consulta e depois mantido a cada mudança de seguidores ou
+    de estado de um perfil; prefixos com poucos nomes são ordenados na consulta.
+    Pode ser usado por várias threads.
+
+    Exemplo de uso:
+        indice = IndiceUsuarios()
+        indice.adicionar(Perfil("ana"))
+        indice.sugerir("an", 5)  # [Perfil("ana")]
+    """
+
+    def __init__(self, capacidade: int = 32) -> None:
+        """
+        Args:
+            capacidade (int): Tamanho do topo mantido por prefixo; consultas com limite
+                maior ordenam todo o intervalo.
+        """
+        self.__capacidade = capacidade
+        self.__chaves: List[str] = []
+        self.__perfis: Dict[str, Perfil] = {}
+        self.__topos: Dict[str, Topo] = {}
+        self.__trava = threading.RLock()
+
+    def adicionar(self, perfil: Perfil) -> None:
+        """
+        Inclui um perfil recém-cadastrado. O perfil deve ser o objeto mantido pelo
+        repositório (o mesmo passado depois a atualizar); se o nome já estiver no
+        índice, o perfil substitui o anterior.
+        """
+        chave = chave_usuario(perfil.get_usuario())
+        with self.__trava:
+            anterior = self.__perfis.get(chave)
+            self.__perfis[chave] = perfil
+            if anterior is None:
+                insort(self.__chaves, chave)
+            elif anterior is not perfil:
+                # o objeto antigo pode estar nos topos: recalcula-os na próxima consulta
+                for tamanho in range(len(chave) + 1):
+                    self.__topos.pop(chave[:tamanho], None)
+            self.__atualizar_topos(chave, perfil)
+
+    def adicionar_varios(self, perfis: Iterable[Perfil]) -> None:
+        """
+        Inclui vários perfis de uma vez, reordenando a lista uma única vez. Os topos
+        são descartados e recalculados nas próximas consultas.
+        """
+        with self.__trava:
+            for perfil in perfis:
+                chave = chave_usuario(perfil.get_usuario())
+                if chave not in self.__perfis:
+                    self.__chaves.append(chave)
+                self.__perfis[chave] = perfil
+            self.__chaves.sort()
+            self.__topos.clear()
+
+    def atualizar(self, perfil: Perfil) -> None:
+        """
+        Reposiciona um perfil cujo número de seguidores ou estado (ativo) mudou.
+        """
+        chave = chave_usuario(perfil.get_usuario())
+        with self.__trava:
+            if self.__perfis.get(chave) is perfil:
+                self.__atualizar_topos(chave, perfil)
+
+    def __atualizar_topos(self, chave: str, perfil: Perfil) -> None:
+        valor = ordem(perfil)
+        for tamanho in range(len(chave) + 1):
+            topo = self.__topos.get(chave[:tamanho])
+            if topo is not None:
+                topo.atualizar(perfil, valor, self.__capacidade)
+
+    def sugerir(self, prefixo: str, limit: int = 10) -> List[Perfil]:
+        """
+        Retorna os perfis cujo nome começa com o prefixo (sem diferenciar maiúsculas
+        de minúsculas), ativos primeiro e, entre eles, os com mais seguidores.
+
+        Args:
+            prefixo (str): Começo do nome de usuário.
+            limit (int): Número máximo de perfis retornados.
+        """
+        prefixo = chave_usuario(prefixo)
+        with self.__trava:
+            inicio = bisect_left(self.__chaves, prefixo)
+            fim = bisect_left(self.__chaves, prefixo + '\U0010ffff', inicio)
+            if fim - inicio <= self.__capacidade or limit > self.__capacidade:
+                candidatos = (self.__perfis[chave] for chave in self.__chaves[inicio:fim])
+                return nsmallest(limit, candidatos, key=ordem)
+            topo = self.__topos.get(prefixo)
+            if topo is None:
+                candidatos = (self.__perfis[chave] for chave in self.__chaves[inicio:fim])
+                melhores = nsmallest(self.__capacidade + 1, candidatos, key=ordem)
+                topo = self.__topos[prefixo] = Topo({perfil: ordem(perfil) for perfil in melhores[:-1]},
+                                                    ordem(melhores[-1]))
+            if len(topo.membros) < limit:
+                del self.__topos[prefixo] # encolheu demais: recalcula na próxima vez
+                return self.sugerir(prefixo, limit)
+            return sorted(topo.membros, key=ordem)[:limit]
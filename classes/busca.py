@@ -0,0 +1,281 @@
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+PALAVRA = re.compile(r'\w+')
+ACENTOS = re.compile(r'[\u0300-\u036f]') # marcas combinantes (acentos, cedilha, til)
+
+def normalizar(texto: str) -> str:
+    """
+    Remove acentos e diferenças entre maiúsculas e minúsculas de um texto.
+    """
+    texto = texto.casefold()
+    if not texto.isascii():
+        texto = ACENTOS.sub('', unicodedata.normalize('NFKD', texto))
+    return texto
+
+def tokenizar(texto: str) -> List[str]:
+    """
+    Divide um texto em termos normalizados: sem acentos e sem diferenciar
+    maiúsculas de minúsculas ("Ação" e "acao" geram o mesmo termo).
+
+    Args:
+        texto (str): Texto a tokenizar.
+
+    Returns:
+        List[str]: Termos, na ordem do texto (com repetições).
+    """
+    return PALAVRA.findall(normalizar(texto))
+
+def codificar(ids: List[int]) -> bytes:
+    """
+    Codifica IDs crescentes como diferenças em varint (7 bits por byte), a partir do primeiro.
+    """
+    saida = bytearray()
+    for anterior, atual in zip(ids, ids[1:]):
+        delta = atual - anterior
+        while delta >= 0x80:
+            saida.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        saida.append(delta)
+    return bytes(saida)
+
+def decodificar(primeiro: int, dados: bytes) -> List[int]:
+    """
+    Inverso de codificar: reconstrói os IDs a partir do primeiro e das diferenças.
+    """
+    ids = [primeiro]
+    delta, deslocamento = 0, 0
+    for byte in dados:
+        delta |= (byte & 0x7F) << deslocamento
+        if byte & 0x80:
+            deslocamento += 7
+        else:
+            ids.append(ids[-1] + delta)
+            delta, deslocamento = 0, 0
+    return ids
+
+class ListaPostagens:
+    """
+    Lista de postagens de um termo: os IDs dos tweets que o contêm, em ordem crescente,
+    comprimida em blocos.
+
+    Cada bloco fechado guarda o primeiro ID (em `__inicios`, usado como skip list) e
+    as diferenças seguintes em varint; o último bloco fica aberto, como lista, para
+    receber novos IDs. Assim, a lista pode ser percorrida do mais recente para o mais
+    antigo bloco a bloco, e testar se um ID pertence a ela custa uma busca binária e
+    a decodificação de um único bloco.
+
+    Atributos:
+        BLOCO (int): Número de IDs por bloco.
+    """
+
+    BLOCO = 128
+
+    def __init__(self) -> None:
+        self.__inicios = array('q')
+        self.__blocos: List[bytes] = []
+        self.__aberto: List[int] = []
+        self.__ultimo: int | None = None
+        self.__total = 0
+        self.__cache: Tuple[int, List[int]] = (-1, []) # último bloco decodificado
+
+    def __len__(self) -> int:
+        return self.__total
+
+    def adicionar(self, ids: List[int]) -> None:
+        """
+        Acrescenta IDs, já em ordem crescente.
+
+        IDs maiores que o último são anexados ao bloco aberto; os demais (tweets
+        importados com IDs antigos) são inseridos nos blocos em que caem, e só esses
+        blocos são recodificados.
+        """
+        if not ids:
+            return
+        if self.__ultimo is not None and ids[0] <= self.__ultimo:
+            antigos = bisect_right(ids, self.__ultimo)
+            self.__inserir(ids[:antigos])
+            ids = ids[antigos:]
+            if not ids:
+                return
+        for tweet_id in ids:
+            if not self.__aberto:
+                self.__inicios.append(tweet_id)
+            self.__aberto.append(tweet_id)
+            if len(self.__aberto) >= self.BLOCO:
+                self.__blocos.append(codificar(self.__aberto))
+                self.__aberto = []
+        self.__ultimo = ids[-1]
+        self.__total += len(ids)
+
+    def __inserir(self, ids: List[int]) -> None:
+        """
+        Insere IDs crescentes menores que o último já na lista, bloco a bloco.
+
+        Um bloco que passa de duas vezes BLOCO IDs é dividido; os blocos substituídos
+        são novos objetos, então cópias em leitura (copia) não são afetadas.
+        """
+        por_bloco: Dict[int, List[int]] = {}
+        for tweet_id in ids:
+            # IDs menores que o primeiro início vão para o primeiro bloco
+            indice = max(bisect_right(self.__inicios, tweet_id) - 1, 0)
+            por_bloco.setdefault(indice, []).append(tweet_id)
+        # do último bloco para o primeiro: dividir um bloco não desloca os anteriores
+        for indice in sorted(por_bloco, reverse=True):
+            if indice == len(self.__blocos):
+                self.__aberto = list(merge(self.__aberto, por_bloco[indice]))
+                self.__inicios[indice] = self.__aberto[0]
+                continue
+            bloco = list(merge(decodificar(self.__inicios[indice], self.__blocos[indice]), por_bloco[indice]))
+            partes = [bloco] if len(bloco) <= 2 * self.BLOCO else [
+                bloco[i:i + self.BLOCO] for i in range(0, len(bloco), self.BLOCO)]
+            self.__inicios[indice:indice + 1] = array('q', (parte[0] for parte in partes))
+            self.__blocos[indice:indice + 1] = [codificar(parte) for parte in partes]
+        self.__total += len(ids)
+        self.__cache = (-1, [])
+
+    def copia(self) -> 'ListaPostagens':
+        """
+        Retorna uma cópia rasa (os blocos fechados são imutáveis e compartilhados),
+        para leitura enquanto a lista original recebe novos IDs.
+        """
+        copia = ListaPostagens()
+        copia.__inicios = array('q', self.__inicios)
+        copia.__blocos = list(self.__blocos)
+        copia.__aberto = list(self.__aberto)
+        copia.__ultimo = self.__ultimo
+        copia.__total = self.__total
+        return copia
+
+    def __bloco(self, indice: int) -> List[int]:
+        if indice == len(self.__blocos):
+            return self.__aberto
+        if self.__cache[0] != indice:
+            self.__cache = (indice, decodificar(self.__inicios[indice], self.__blocos[indice]))
+        return self.__cache[1]
+
+    def iter_recentes(self, before_id: int | None = None) -> Iterator[int]:
+        """
+        Itera sobre os IDs do maior (mais recente) para o menor, decodificando um bloco por vez.
+
+        Args:
+            before_id (int | None): Se informado, começa pelo maior ID menor que este (cursor).
+        """
+        ultimo = len(self.__inicios) - 1
+        if before_id is not None:
+            ultimo = bisect_left(self.__inicios, before_id) - 1
+            if ultimo < 0:
+                return
+            bloco = self.__bloco(ultimo)
+            yield from reversed(bloco[:bisect_left(bloco, before_id)])
+            ultimo -= 1
+        for indice in range(ultimo, -1, -1):
+            yield from reversed(self.__bloco(indice))
+
+    def contem(self, tweet_id: int) -> bool:
+        indice = bisect_right(self.__inicios, tweet_id) - 1
+        if indice < 0:
+            return False
+        bloco = self.__bloco(indice)
+        posicao = bisect_left(bloco, tweet_id)
+        return posicao < len(bloco) and bloco[posicao] == tweet_id
+
+class IndiceInvertido:
+    """
+    Índice invertido genérico: para cada termo, a lista comprimida (ListaPostagens)
+    dos IDs dos tweets associados a ele.
+
+    Responde a consultas com vários termos (todos obrigatórios) intersectando as
+    listas de postagens, a partir da menor, sem percorrer os tweets. Os resultados
+    saem do mais recente para o mais antigo (pelo ID, que cresce com o tempo). Pode
+    ser usado por várias threads.
+    """
+
+    def __init__(self) -> None:
+        self.__postagens: Dict[str, ListaPostagens] = {}
+        self.__trava = threading.Lock()
+
+    def adicionar(self, tweet_id: int, termos: Iterable[str]) -> None:
+        """
+        Associa um tweet aos termos informados.
+        """
+        termos = set(termos)
+        with self.__trava:
+            for termo in termos:
+                lista = self.__postagens.get(termo)
+                if lista is None:
+                    lista = self.__postagens[termo] = ListaPostagens()
+                lista.adicionar((tweet_id,))
+
+    def adicionar_varios(self, tweets: Iterable[Tuple[int, Iterable[str]]]) -> None:
+        """
+        Associa vários tweets (id, termos) de uma vez, em qualquer ordem.
+        """
+        por_termo: Dict[str, List[int]] = {}
+        for tweet_id, termos in tweets:
+            for termo in set(termos):
+                por_termo.setdefault(termo, []).append(tweet_id)
+        with self.__trava:
+            for termo, ids in por_termo.items():
+                if termo not in self.__postagens:
+                    self.__postagens[termo] = ListaPostagens()
+                self.__postagens[termo].adicionar(sorted(ids))
+
+    def buscar(self, termos: Iterable[str], before_id: int | None = None) -> Iterator[int]:
+        """
+        Itera sobre os IDs dos tweets associados a todos os termos, do mais recente
+        para o mais antigo.
+
+        Args:
+            termos (Iterable[str]): Termos obrigatórios (nenhum termo não encontra nada).
+            before_id (int | None): Se informado, considera apenas IDs menores que este (cursor).
+        """
+        with self.__trava:
+            listas = [self.__postagens.get(termo) for termo in set(termos)]
+            if not listas or None in listas:
+                return iter(())
+            listas = sorted((lista.copia() for lista in listas), key=len)
+        menor, demais = listas[0], listas[1:]
+        return (tweet_id for tweet_id in menor.iter_recentes(before_id)
+                if all(lista.contem(tweet_id) for lista in demais))
+
+class IndiceTextual:
+    """
+    Índice invertido das mensagens dos tweets: cada mensagem é indexada pelos seus
+    termos normalizados (veja tokenizar).
+
+    Exemplo de uso:
+        indice = IndiceTextual()
+        indice.adicionar(1, "Promoção de verão")
+        list(indice.buscar("promocao"))  # [1]
+    """
+
+    def __init__(self) -> None:
+        self.__indice = IndiceInvertido()
+
+    def adicionar(self, tweet_id: int, mensagem: str) -> None:
+        """
+        Indexa a mensagem de um tweet.
+        """
+        self.__indice.adicionar(tweet_id, tokenizar(mensagem))
+
+    def adicionar_varios(self, tweets: Iterable[Tuple[int, str]]) -> None:
+        """
+        Indexa vários tweets (id, mensagem) de uma vez, em qualquer ordem.
+        """
+        self.__indice.adicionar_varios((tweet_id, tokenizar(mensagem)) for tweet_id, mensagem in tweets)
+
+    def buscar(self, consulta: str) -> Iterator[int]:
+        """
+        Itera sobre os IDs dos tweets que contêm todos os termos da consulta, do
+        mais recente para o mais antigo.
+
+        Args:
+            consulta (str): Termos separados por espaço (acentos e maiúsculas são ignorados).
+        """
+        return self.__indice.buscar(tokenizar(consulta))
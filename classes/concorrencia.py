@@ -0,0 +1,61 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+from .repositorio import chave_usuario
+
+class TravasPerfis:
+    """
+    Travas por perfil com striping: cada usuário é associado, pelo hash do nome
+    normalizado, a uma de `quantidade` travas.
+
+    Operações sobre dois perfis (seguir, bloquear...) adquirem as travas sempre em
+    ordem crescente de índice, o que evita deadlocks entre operações cruzadas
+    (A segue B enquanto B segue A).
+
+    Exemplo de uso:
+        travas = TravasPerfis()
+        with travas.travar("ana", "bia"):
+            ...
+    """
+
+    def __init__(self, quantidade: int = 64) -> None:
+        """
+        Inicializa as travas.
+
+        Args:
+            quantidade (int): Número de travas (stripes).
+        """
+        self.__travas = [threading.RLock() for _ in range(quantidade)]
+
+    def indice(self, usuario: str) -> int:
+        """
+        Retorna o índice da trava de um usuário.
+        """
+        return hash(chave_usuario(usuario)) % len(self.__travas)
+
+    @contextmanager
+    def travar(self, *usuarios: str) -> Iterator[None]:
+        """
+        Adquire, em ordem, as travas dos usuários informados (sem repetir travas).
+        """
+        travas = [self.__travas[i] for i in sorted({self.indice(usuario) for usuario in usuarios})]
+        for trava in travas:
+            trava.acquire()
+        try:
+            yield
+        finally:
+            for trava in reversed(travas):
+                trava.release()
+
+    @contextmanager
+    def travar_todos(self) -> Iterator[None]:
+        """
+        Adquire todas as travas, em ordem (operações que alteram muitos perfis).
+        """
+        for trava in self.__travas:
+            trava.acquire()
+        try:
+            yield
+        finally:
+            for trava in reversed(self.__travas):
+                trava.release()
@@ -0,0 +1,71 @@
+import json
+from itertools import islice, takewhile
+from typing import Dict, Iterable, Iterator
+from .armazenamento import serializar_perfil
+from .perfis import Perfil
+from .repositorio import RepositorioUsuarios
+
+VERSAO = 1
+
+def blocos_exportacao(repositorio: RepositorioUsuarios, tamanho_bloco: int = 10_000) -> Iterator[Dict]:
+    """
+    Gera a exportação da rede em blocos, com memória limitada pelo tamanho do bloco.
+
+    O primeiro bloco é o cabeçalho, com o ponto de corte (RepositorioUsuarios.ponto_de_corte):
+    apenas números de sequência, sem cópia de perfis ou vínculos. Perfis cadastrados,
+    vínculos de seguidor criados e tweets publicados depois do corte não são
+    exportados, mesmo que a rede mude enquanto o gerador é consumido; já os dados
+    cadastrais (incluindo o estado), os vínculos desfeitos e os bloqueios são lidos
+    quando cada bloco é gerado. Os demais blocos são:
+    - 'perfis': linhas no formato aceito por MyTwitter.bulk_load;
+    - 'follows' e 'bloqueios': pares de nomes de usuário;
+    - 'tweets': colunas paralelas (id, usuario, timestamp, mensagem), que podem ser
+      carregadas direto em um TweetStore com adicionar_bloco.
+
+    Para um corte consistente, o cabeçalho deve ser gerado sem escritas concorrentes
+    (MyTwitter.export o gera com todas as travas).
+
+    :param repositorio: Repositório com os perfis a exportar.
+    :param tamanho_bloco: Número máximo de linhas por bloco.
+    """
+    num_perfis, ultimo_perfil, vinculos, corte = repositorio.ponto_de_corte()
+    yield {'secao': 'cabecalho', 'versao': VERSAO, 'corte': corte, 'perfis': num_perfis}
+
+    def perfis() -> Iterator[Perfil]:
+        # cada seção percorre de novo os perfis cadastrados até o corte, sem guardá-los
+        if ultimo_perfil is not None:
+            for cursor, perfil in repositorio.iter_usuarios():
+                yield perfil
+                if cursor >= ultimo_perfil:
+                    break
+
+    secoes = {
+        'perfis': (serializar_perfil(perfil) for perfil in perfis()),
+        'follows': ([perfil.get_usuario(), seguido.get_usuario()] for perfil in perfis()
+                    for _, seguido in takewhile(lambda par: par[0] < vinculos, perfil.iter_seguidos())),
+        'bloqueios': ([perfil.get_usuario(), bloqueado.get_usuario()] for perfil in perfis()
+                      for bloqueado in perfil.get_bloqueados()),
+    }
+    for secao, linhas in secoes.items():
+        for bloco in iter(lambda: list(islice(linhas, tamanho_bloco)), []):
+            yield {'secao': secao, 'linhas': bloco}
+
+    tweets = (tweet for perfil in perfis() for tweet in perfil.iter_tweets(corte + 1))
+    for bloco in iter(lambda: list(islice(tweets, tamanho_bloco)), []):
+        yield {
+            'secao': 'tweets',
+            'id': [tweet.get_id() for tweet in bloco],
+            'usuario': [tweet.get_usuario() for tweet in bloco],
+            'timestamp': [tweet.get_timestamp() for tweet in bloco],
+            'mensagem': [tweet.get_mensagem() for tweet in bloco],
+        }
+
+def ler_exportacao(arquivo: Iterable[str]) -> Iterator[Dict]:
+    """
+    Lê, em fluxo, os blocos de uma exportação gravada por MyTwitter.export.
+
+    :param arquivo: Arquivo de texto (JSONL) aberto para leitura.
+    """
+    for linha in arquivo:
+        if linha.strip():
+            yield json.loads(linha)
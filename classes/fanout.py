@@ -0,0 +1,177 @@
+from collections import deque
+from itertools import islice, takewhile
+from typing import Deque, Dict, List
+from .perfis import Perfil
+from .repositorio import chave_usuario
+from .timeline import chave_tweet, mesclar_timelines
+from .tweet import Tweet
+
+class TimelinesMaterializadas:
+    """
+    Timelines materializadas por fan-out na escrita (modo push).
+
+    Cada usuário que já consultou sua timeline ganha um buffer limitado com os
+    tweets mais recentes, do mais novo para o mais antigo. Ao tweetar, o tweet
+    é empurrado para os buffers dos seguidores do autor. Autores com mais de
+    `limiar_celebridade` seguidores não são empurrados (fan-out na leitura): seus
+    tweets são mesclados no momento da consulta, evitando tempestades de escrita.
+
+    Um buffer que já descartou tweets antigos tem um piso: ele contém exatamente os
+    tweets da timeline com ID maior ou igual ao piso. Deixar de
+    seguir remove tweets sem mudar o piso, e seguir só completa o buffer com tweets
+    acima dele; páginas que vão além do piso são lidas da mescla completa.
+
+    Atributos:
+        __capacidade (int): Número máximo de tweets mantidos em cada buffer.
+        __limiar_celebridade (int): Número de seguidores a partir do qual o autor é lido sob demanda.
+        __buffers (Dict[str, Deque[Tweet]]): Buffers por usuário (chave normalizada).
+        __pisos (Dict[str, int]): Piso dos buffers que já descartaram tweets antigos.
+    """
+
+    def __init__(self, capacidade: int = 800, limiar_celebridade: int = 10000) -> None:
+        """
+        Inicializa as timelines materializadas.
+
+        Args:
+            capacidade (int): Número máximo de tweets por buffer.
+            limiar_celebridade (int): Número de seguidores acima do qual o autor não sofre fan-out.
+        """
+        self.__capacidade = capacidade
+        self.__limiar_celebridade = limiar_celebridade
+        self.__buffers: Dict[str, Deque[Tweet]] = {}
+        self.__pisos: Dict[str, int] = {}
+
+    def is_celebridade(self, perfil: Perfil) -> bool:
+        """
+        Verifica se o perfil é lido sob demanda (muitos seguidores).
+        """
+        return perfil.get_numero_seguidores() > self.__limiar_celebridade
+
+    def publicar(self, autor: Perfil, tweet: Tweet) -> None:
+        """
+        Empurra um novo tweet para o buffer do autor e, se ele não for celebridade,
+        para os buffers já materializados dos seus seguidores.
+        """
+        self.__empurrar(autor, tweet)
+        if not self.is_celebridade(autor):
+            for seguidor in autor.get_seguidores():
+                self.__empurrar(seguidor, tweet)
+
+    def seguir(self, seguidor: Perfil, seguido: Perfil) -> None:
+        """
+        Completa o buffer do seguidor com os tweets recentes do novo perfil seguido.
+        """
+        chave = chave_usuario(seguidor.get_usuario())
+        buffer = self.__buffers.get(chave)
+        if buffer is None or self.is_celebridade(seguido):
+            return
+        novos = seguido.iter_tweets()
+        piso = self.__pisos.get(chave)
+        if piso is not None:
+            # abaixo do piso o buffer já não cobre a timeline: não há o que completar
+            novos = takewhile(lambda tweet: chave_tweet(tweet) >= piso, novos)
+        self.__buffers[chave] = self.__limitar(chave, mesclar_timelines([iter(buffer), novos], self.__capacidade + 1))
+
+    def deixar_de_seguir(self, seguidor: Perfil, seguido: Perfil) -> None:
+        """
+        Remove do buffer do seguidor os tweets do perfil que deixou de ser seguido,
+        sem reconstruir a timeline. Deve ser chamado depois de atualizar o grafo.
+        """
+        if seguido.get_numero_seguidores() == self.__limiar_celebridade:
+            # o perfil acabou de deixar de ser celebridade: seus tweets antigos não
+            # estão nos buffers dos seguidores, que precisam ser reconstruídos
+            for perfil in seguido.get_seguidores():
+                self.invalidar(perfil)
+        chave = chave_usuario(seguidor.get_usuario())
+        buffer = self.__buffers.get(chave)
+        if buffer is None:
+            return
+        autor = chave_usuario(seguido.get_usuario())
+        # o piso não muda: o buffer continua com todos os tweets da timeline acima dele
+        restantes = [tweet for tweet in buffer if chave_usuario(tweet.get_usuario()) != autor]
+        self.__buffers[chave] = deque(restantes, maxlen=self.__capacidade)
+
+    def invalidar(self, perfil: Perfil) -> None:
+        """
+        Descarta o buffer de um perfil; ele será reconstruído na próxima leitura.
+        """
+        chave = chave_usuario(perfil.get_usuario())
+        self.__buffers.pop(chave, None)
+        self.__pisos.pop(chave, None)
+
+    def limpar(self) -> None:
+        """
+        Descarta todos os buffers (por exemplo, após uma importação em massa).
+        """
+        self.__buffers.clear()
+        self.__pisos.clear()
+
+    def ler(self, perfil: Perfil, limit: int | None = None, before_id: int | None = None) -> List[Tweet]:
+        """
+        Retorna a timeline do perfil a partir do buffer materializado.
+
+        Páginas que ultrapassam o que o buffer cobre são delegadas à mescla
+        completa (Perfil.get_timeline).
+
+        Args:
+            perfil (Perfil): Dono da timeline.
+            limit (int | None): Número máximo de tweets retornados.
+            before_id (int | None): Cursor de paginação; apenas tweets com ID menor que este.
+        """
+        if limit is None or limit > self.__capacidade:
+            return perfil.get_timeline(limit, before_id)
+
+        buffer = self.__buffer(perfil)
+        tweets = iter(buffer)
+        disponiveis = len(buffer)
+        if before_id is not None:
+            pulados = sum(1 for _ in takewhile(lambda tweet: tweet.get_id() >= before_id, buffer))
+            tweets = islice(buffer, pulados, None)
+            disponiveis -= pulados
+        if chave_usuario(perfil.get_usuario()) in self.__pisos and disponiveis < limit:
+            return perfil.get_timeline(limit, before_id)
+
+        celebridades = [seguido for seguido in perfil.get_seguidos() if self.is_celebridade(seguido)]
+        if not celebridades:
+            return list(islice(tweets, limit))
+        chaves = {chave_usuario(celebridade.get_usuario()) for celebridade in celebridades}
+        tweets = (tweet for tweet in tweets if chave_usuario(tweet.get_usuario()) not in chaves)
+        fontes = [celebridade.iter_tweets(before_id) for celebridade in celebridades]
+        fontes.append(tweets)
+        return mesclar_timelines(fontes, limit)
+
+    def __buffer(self, perfil: Perfil) -> Deque[Tweet]:
+        """
+        Retorna o buffer do perfil, construindo-o na primeira leitura.
+        """
+        chave = chave_usuario(perfil.get_usuario())
+        buffer = self.__buffers.get(chave)
+        if buffer is None:
+            fontes = [seguido.iter_tweets() for seguido in perfil.get_seguidos() if not self.is_celebridade(seguido)]
+            fontes.append(perfil.iter_tweets())
+            buffer = self.__buffers[chave] = self.__limitar(chave, mesclar_timelines(fontes, self.__capacidade + 1))
+        return buffer
+
+    def __limitar(self, chave: str, tweets: List[Tweet]) -> Deque[Tweet]:
+        """
+        Monta um buffer com os tweets mais recentes de uma mescla de até capacidade + 1
+        tweets (do mais novo para o mais antigo); se algum sobrar, o piso passa a ser o
+        mais antigo mantido.
+        """
+        if len(tweets) > self.__capacidade:
+            tweets = tweets[:self.__capacidade]
+            self.__pisos[chave] = chave_tweet(tweets[-1])
+        return deque(tweets, maxlen=self.__capacidade)
+
+    def __empurrar(self, perfil: Perfil, tweet: Tweet) -> None:
+        """
+        Insere o tweet no início do buffer do perfil, se ele estiver materializado.
+        """
+        chave = chave_usuario(perfil.get_usuario())
+        buffer = self.__buffers.get(chave)
+        if buffer is not None:
+            cheio = len(buffer) == self.__capacidade
+            buffer.appendleft(tweet)
+            if cheio:
+                # o deque descartou o tweet mais antigo: o piso sobe para o novo último
+                self.__pisos[chave] = chave_tweet(buffer[-1])
@@ -0,0 +1,69 @@
+import csv
+import json
+from itertools import chain
+from typing import Dict, Iterable, Iterator, Tuple
+from .armazenamento import criar_perfil
+from .perfis import Perfil
+
+def ler_linhas(fonte) -> Iterator:
+    """
+    Normaliza a fonte de uma importação em massa.
+
+    Aceita um iterável de linhas (objetos, tuplas ou dicionários) ou um arquivo de
+    texto aberto: JSONL (um objeto por linha) ou CSV com cabeçalho. O formato do
+    arquivo é detectado pela primeira linha.
+
+    :param fonte: Iterável de linhas ou arquivo de texto.
+    :return: Iterador sobre as linhas, lidas em fluxo.
+    """
+    if not hasattr(fonte, 'readline'):
+        return iter(fonte)
+    primeira = fonte.readline()
+    if primeira.lstrip().startswith('{'):
+        return (json.loads(linha) for linha in chain([primeira], fonte) if linha.strip())
+    return csv.DictReader(chain([primeira], fonte))
+
+def ler_perfil(linha) -> Perfil:
+    """
+    Converte uma linha de importação em perfil: um Perfil pronto ou um dicionário
+    com 'usuario' e, opcionalmente, 'tipo' (Perfil, PessoaFisica ou PessoaJuridica),
+    'documento' e 'ativo'.
+    """
+    if isinstance(linha, Perfil):
+        return linha
+    ativo = linha.get('ativo', True)
+    if isinstance(ativo, str):
+        ativo = ativo.strip().lower() not in ('', '0', 'false', 'nao', 'não')
+    return criar_perfil({'tipo': linha.get('tipo') or 'Perfil', 'documento': linha.get('documento'),
+                         'usuario': linha['usuario'], 'ativo': ativo})
+
+def ler_seguir(linha) -> Tuple[str, str]:
+    """
+    Converte uma linha de importação em um par (seguidor, seguido): uma tupla ou
+    um dicionário com 'seguidor' e 'seguido'.
+    """
+    if isinstance(linha, dict):
+        return linha['seguidor'], linha['seguido']
+    seguidor, seguido = linha
+    return seguidor, seguido
+
+def ler_tweet(linha) -> Dict:
+    """
+    Converte uma linha de importação em um dicionário com 'usuario', 'mensagem' e,
+    se a linha os tiver (dados já existentes), 'id' e 'timestamp' (microssegundos)
+    como inteiros. Aceita uma tupla (usuario, mensagem) ou um dicionário.
+    """
+    if not isinstance(linha, dict):
+        usuario, mensagem = linha
+        return {'usuario': usuario, 'mensagem': mensagem}
+    tweet = {'usuario': linha['usuario'], 'mensagem': linha['mensagem']}
+    if linha.get('id') not in (None, ''):
+        tweet['id'] = int(linha['id'])
+        tweet['timestamp'] = int(linha['timestamp'])
+    return tweet
+
+def rejeitar(rejeitados: list, tipo: str, linha, erro: Exception) -> None:
+    """
+    Acrescenta uma linha recusada ao relatório da importação.
+    """
+    rejeitados.append({'tipo': tipo, 'linha': linha, 'erro': erro})
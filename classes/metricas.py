@@ -0,0 +1,197 @@
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Limites (em segundos) dos buckets de latência, no estilo do Prometheus
+LIMITES_LATENCIA = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0)
+# Limites dos buckets de fan-in da timeline (número de autores mesclados)
+LIMITES_FAN_IN = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000)
+
+class Histograma:
+    """
+    Histograma com buckets fixos: contagens por bucket, soma e total de observações.
+    """
+
+    def __init__(self, limites: Sequence[float]) -> None:
+        """
+        Args:
+            limites (Sequence[float]): Limites superiores dos buckets, em ordem crescente;
+                o bucket +Inf é implícito.
+        """
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def snapshot(self) -> Dict:
+        """
+        Retorna as contagens cumulativas por limite ('+Inf' por último), a soma e o total.
+        """
+        acumulado, buckets = 0, []
+        for limite, contagem in zip(self.limites + (float('inf'),), self.contagens):
+            acumulado += contagem
+            buckets.append((limite, acumulado))
+        return {'buckets': buckets, 'soma': self.soma, 'total': self.total}
+
+class Metricas:
+    """
+    Métricas de uso do MyTwitter: chamadas, latências e erros (por classe de
+    exceção) de cada método público, fan-in das timelines e custo das buscas no
+    repositório.
+
+    A instrumentação é opcional: um MyTwitter criado sem métricas não envolve seus
+    métodos, então não paga nada além de um teste de None na timeline. A mesma
+    instância pode ser compartilhada por vários MyTwitter, somando as métricas.
+
+    Exemplo de uso:
+        metricas = Metricas()
+        twitter = MyTwitter(metricas=metricas)
+        ...
+        print(metricas.snapshot()['chamadas'])
+        print(metricas.prometheus())
+    """
+
+    def __init__(self) -> None:
+        self.__trava = threading.Lock()
+        self.__chamadas: Dict[str, int] = {}
+        self.__erros: Dict[Tuple[str, str], int] = {}
+        self.__latencias: Dict[str, Histograma] = {}
+        self.__fan_in = Histograma(LIMITES_FAN_IN)
+        self.__buscas = Histograma(LIMITES_LATENCIA)
+
+    def registrar_chamada(self, metodo: str, duracao: float, erro: BaseException | None = None) -> None:
+        """
+        Registra uma chamada de método, com sua duração (segundos) e a exceção levantada, se houver.
+        """
+        with self.__trava:
+            self.__chamadas[metodo] = self.__chamadas.get(metodo, 0) + 1
+            if metodo not in self.__latencias:
+                self.__latencias[metodo] = Histograma(LIMITES_LATENCIA)
+            self.__latencias[metodo].observar(duracao)
+            if erro is not None:
+                chave = (metodo, type(erro).__name__)
+                self.__erros[chave] = self.__erros.get(chave, 0) + 1
+
+    def registrar_fan_in(self, autores: int) -> None:
+        """
+        Registra quantos autores (seguidos e o próprio perfil) uma timeline mesclou.
+        """
+        with self.__trava:
+            self.__fan_in.observar(autores)
+
+    def registrar_busca(self, duracao: float) -> None:
+        """
+        Registra a duração (segundos) de uma busca de perfil no repositório.
+        """
+        with self.__trava:
+            self.__buscas.observar(duracao)
+
+    def instrumentar(self, metodo: str, funcao: Callable) -> Callable:
+        """
+        Envolve uma função, registrando chamadas, duração e exceções sob o nome `metodo`.
+        """
+        @wraps(funcao)
+        def instrumentada(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                resultado = funcao(*args, **kwargs)
+            except Exception as erro:
+                self.registrar_chamada(metodo, time.perf_counter() - inicio, erro)
+                raise
+            self.registrar_chamada(metodo, time.perf_counter() - inicio)
+            return resultado
+        return instrumentada
+
+    def snapshot(self) -> Dict:
+        """
+        Retorna uma cópia consistente das métricas.
+
+        Returns:
+            Dict: 'chamadas' ({metodo: n}), 'erros' ({metodo: {excecao: n}}),
+                'latencia' ({metodo: histograma}), 'timeline_fan_in' e
+                'busca_repositorio' (histogramas; veja Histograma.snapshot).
+        """
+        with self.__trava:
+            erros: Dict[str, Dict[str, int]] = {}
+            for (metodo, excecao), quantidade in self.__erros.items():
+                erros.setdefault(metodo, {})[excecao] = quantidade
+            return {
+                'chamadas': dict(self.__chamadas),
+                'erros': erros,
+                'latencia': {metodo: histograma.snapshot() for metodo, histograma in self.__latencias.items()},
+                'timeline_fan_in': self.__fan_in.snapshot(),
+                'busca_repositorio': self.__buscas.snapshot(),
+            }
+
+    def prometheus(self) -> str:
+        """
+        Exporta as métricas no formato de texto do Prometheus.
+        """
+        dados = self.snapshot()
+        linhas: List[str] = [
+            '# HELP mytwitter_chamadas_total Chamadas aos métodos públicos do MyTwitter.',
+            '# TYPE mytwitter_chamadas_total counter',
+        ]
+        linhas += [f'mytwitter_chamadas_total{{metodo="{metodo}"}} {n}' for metodo, n in sorted(dados['chamadas'].items())]
+        linhas += [
+            '# HELP mytwitter_erros_total Exceções levantadas pelos métodos públicos, por classe.',
+            '# TYPE mytwitter_erros_total counter',
+        ]
+        linhas += [f'mytwitter_erros_total{{metodo="{metodo}",excecao="{excecao}"}} {n}'
+                   for metodo, excecoes in sorted(dados['erros'].items()) for excecao, n in sorted(excecoes.items())]
+        linhas += [
+            '# HELP mytwitter_latencia_segundos Latência dos métodos públicos.',
+            '# TYPE mytwitter_latencia_segundos histogram',
+        ]
+        for metodo, histograma in sorted(dados['latencia'].items()):
+            linhas += formatar_histograma('mytwitter_latencia_segundos', histograma, f'metodo="{metodo}"')
+        linhas += [
+            '# HELP mytwitter_timeline_fan_in Autores mesclados por consulta de timeline.',
+            '# TYPE mytwitter_timeline_fan_in histogram',
+        ]
+        linhas += formatar_histograma('mytwitter_timeline_fan_in', dados['timeline_fan_in'])
+        linhas += [
+            '# HELP mytwitter_busca_repositorio_segundos Duração das buscas de perfil no repositório.',
+            '# TYPE mytwitter_busca_repositorio_segundos histogram',
+        ]
+        linhas += formatar_histograma('mytwitter_busca_repositorio_segundos', dados['busca_repositorio'])
+        return '\n'.join(linhas) + '\n'
+
+def formatar_histograma(nome: str, histograma: Dict, rotulos: str = '') -> List[str]:
+    """
+    Formata um histograma (Histograma.snapshot) como linhas do Prometheus.
+    """
+    prefixo = rotulos + ',' if rotulos else ''
+    linhas = [f'{nome}_bucket{{{prefixo}le="{"+Inf" if limite == float("inf") else repr(limite)}"}} {contagem}'
+              for limite, contagem in histograma['buckets']]
+    sufixo = f'{{{rotulos}}}' if rotulos else ''
+    linhas.append(f'{nome}_sum{sufixo} {histograma["soma"]!r}')
+    linhas.append(f'{nome}_count{sufixo} {histograma["total"]}')
+    return linhas
+
+class RepositorioInstrumentado:
+    """
+    Envolve um repositório de usuários medindo a duração de cada busca; os demais
+    métodos são repassados ao repositório original.
+    """
+
+    def __init__(self, repositorio, metricas: Metricas) -> None:
+        self.__repositorio = repositorio
+        self.__metricas = metricas
+
+    def buscar(self, usuario: str):
+        inicio = time.perf_counter()
+        try:
+            return self.__repositorio.buscar(usuario)
+        finally:
+            self.__metricas.registrar_busca(time.perf_counter() - inicio)
+
+    def __getattr__(self, nome: str):
+        return getattr(self.__repositorio, nome)
@@ -1,8 +1,28 @@
-from typing import List, Generator
+import json
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Generator, TextIO, Tuple
 from .perfis import Perfil, PessoaFisica, PessoaJuridica
-from .repositorio import RepositorioUsuarios
-from .tweet import Tweet
-from exceptions import PEException, PDException, PIException, MFPException, SIException, NFPException, PJSException 
+from .repositorio import RepositorioUsuarios, chave_usuario
+from .tweet import Tweet, gerador
+from .concorrencia import TravasPerfis
+from .metricas import Metricas, RepositorioInstrumentado
+from .fanout import TimelinesMaterializadas
+from .busca import IndiceInvertido, IndiceTextual, normalizar
+from .topicos import Tendencias, extrair_hashtags, extrair_mencoes
+from .autocompletar import IndiceUsuarios
+from .sugestoes import SugestoesSeguir
+from .tweetstore import TweetStore
+from .paginacao import Pagina, paginar
+from .exportacao import blocos_exportacao
+from .importacao import ler_linhas, ler_perfil, ler_seguir, ler_tweet, rejeitar
+from exceptions import PEException, PDException, PIException, MFPException, SIException, NFPException, PJSException, PNSException, PBException, TIException, TEException
+
+# Erros que fazem uma linha ser recusada em MyTwitter.bulk_load
+ERROS_IMPORTACAO = (KeyError, TypeError, ValueError, NFPException, PEException, PIException, PDException,
+                    SIException, PJSException, PBException, MFPException, TEException)
 
 class MyTwitter:
     """
@@ -12,11 +32,138 @@ class MyTwitter:
     - Seguir e obter informações sobre seguidores e seguidos
     """
 
-    def __init__(self):
+    def __init__(self, modo_push: bool = False, capacidade_timeline: int = 800, limiar_celebridade: int = 10000,
+                 tweetstore: TweetStore | None = None, repositorio: RepositorioUsuarios | None = None,
+                 travas: int = 64, metricas: Metricas | None = None, tendencias: Tendencias | None = None):
         """
         Inicializa a rede social com um repositório de usuários.
+
+        As operações podem ser chamadas de várias threads: escritas travam apenas os
+        perfis envolvidos (adquiridos em ordem, sem deadlock) e leituras como timeline
+        não bloqueiam nem são bloqueadas, vendo um snapshot de cada perfil. Com
+        threads, o gerador de IDs passado a tweetar também precisa ser thread-safe
+        (por exemplo, GeradorSnowflake).
+
+        :param modo_push: Se True, as timelines são materializadas por fan-out na escrita.
+        :param capacidade_timeline: Número de tweets mantidos em cada timeline materializada.
+        :param limiar_celebridade: Número de seguidores acima do qual um autor não sofre fan-out
+            (seus tweets são mesclados na leitura).
+        :param tweetstore: Armazenamento colunar onde os tweets dos perfis serão guardados
+            (None para manter uma lista de Tweet em cada perfil).
+        :param repositorio: Repositório de usuários (por exemplo, um repositório persistente).
+            Se já tiver perfis, os índices derivados são reconstruídos a partir deles; perfis
+            carregados sob demanda são indexados à medida que são materializados.
+        :param travas: Número de travas (stripes) distribuídas entre os perfis.
+        :param metricas: Métricas onde registrar chamadas, latências e erros dos métodos
+            públicos, o fan-in das timelines e as buscas no repositório (None para não
+            instrumentar, sem custo).
+        :param tendencias: Contadores das hashtags em alta (padrão: janela de uma hora).
+        """
+        self.__repositorio = repositorio if repositorio is not None else RepositorioUsuarios()
+        self.__metricas = metricas
+        if metricas is not None:
+            self.__repositorio = RepositorioInstrumentado(self.__repositorio, metricas)
+            for nome in dir(MyTwitter):
+                if not nome.startswith('_'):
+                    setattr(self, nome, metricas.instrumentar(nome, getattr(self, nome)))
+        self.__timelines = TimelinesMaterializadas(capacidade_timeline, limiar_celebridade) if modo_push else None
+        self.__tweetstore = tweetstore
+        self.__tweets_por_id: Dict[int, Tweet] = {} # sem armazenamento colunar (que tem índice próprio)
+        self.__indice_textual = IndiceTextual()
+        self.__hashtags = IndiceInvertido()
+        self.__mencoes = IndiceInvertido()
+        self.__tendencias = tendencias if tendencias is not None else Tendencias()
+        self.__usuarios = IndiceUsuarios()
+        self.__sugestoes = SugestoesSeguir(self.__seguidos_completos)
+        # Escritas sobre um ou dois perfis usam travas por perfil (striping); cadastros e
+        # timelines materializadas têm travas próprias. Leituras não usam travas.
+        self.__travas = TravasPerfis(travas)
+        self.__trava_cadastro = threading.RLock()
+        self.__trava_timelines = threading.RLock()
+        self.__repositorio.set_ao_carregar(self.__perfil_carregado)
+        carregados = list(self.__repositorio.get_usuarios_carregados())
+        for perfil in carregados:
+            self.__indexar_perfil(perfil)
+        self.__usuarios.adicionar_varios(carregados)
+        self.__usuarios.adicionar_varios(self.__repositorio.iter_usuarios_persistidos())
+        tweets = self.__repositorio.iter_tweets_persistidos()
+        while bloco := list(islice(tweets, 10_000)): # em blocos, sem ler o banco inteiro de uma vez
+            self.__indexar_conteudo(bloco)
+        if modo_push:
+            # o fan-out depende do número de seguidores de todos os perfis
+            self.__repositorio.get_usuarios()
+
+    @contextmanager
+    def __escrita(self, *usuarios: str) -> Iterator[None]:
+        """
+        Trava os perfis de uma escrita e, ao final, compacta o repositório se preciso.
+        """
+        with self.__travas.travar(*usuarios):
+            yield
+        self.__compactar_se_preciso()
+
+    def __compactar_se_preciso(self) -> None:
+        """
+        Compacta o repositório quando ele pede, com todas as travas: nenhum perfil é
+        alterado enquanto o snapshot é gravado. Deve ser chamado sem travas adquiridas.
+        """
+        if self.__repositorio.precisa_compactar():
+            with self.__travas.travar_todos(), self.__trava_cadastro:
+                if self.__repositorio.precisa_compactar():
+                    self.__repositorio.compactar()
+
+    def __perfil_carregado(self, perfil: Perfil) -> None:
+        """
+        Indexa um perfil materializado sob demanda pelo repositório.
+        """
+        self.__indexar_perfil(perfil)
+        self.__usuarios.adicionar(perfil)
+
+    def __indexar_perfil(self, perfil: Perfil) -> None:
+        """
+        Inclui nas estruturas derivadas (armazenamento colunar, índice de tweets e
+        índice textual) um perfil que já chegou com tweets do repositório.
+        """
+        if self.__tweetstore is not None:
+            perfil.set_tweetstore(self.__tweetstore)
+        else:
+            for tweet in perfil.iter_tweets():
+                self.__tweets_por_id[tweet.get_id()] = tweet
+        self.__indexar_conteudo(perfil.iter_tweets())
+
+    def __indexar_tweet(self, tweet: Tweet) -> None:
+        """
+        Inclui um tweet recém-publicado no índice textual, nos índices de hashtags e
+        menções e nas tendências (caminho rápido de __indexar_conteudo para um tweet).
+        """
+        tweet_id, mensagem = tweet.get_id(), tweet.get_mensagem()
+        self.__indice_textual.adicionar(tweet_id, mensagem)
+        if '#' in mensagem:
+            tags = extrair_hashtags(mensagem)
+            self.__hashtags.adicionar(tweet_id, tags)
+            self.__tendencias.registrar(tags, tweet.get_timestamp() / 1_000_000)
+        if '@' in mensagem:
+            self.__mencoes.adicionar(tweet_id, extrair_mencoes(mensagem))
+
+    def __indexar_conteudo(self, tweets: Iterable[Tweet]) -> None:
+        """
+        Inclui tweets no índice textual, nos índices de hashtags e menções e nas tendências.
+
+        Hashtags e menções são extraídas uma única vez, aqui, no momento da escrita.
         """
-        self.__repositorio = RepositorioUsuarios()
+        textos, hashtags, mencoes = [], [], []
+        for tweet in tweets:
+            tweet_id, mensagem = tweet.get_id(), tweet.get_mensagem()
+            textos.append((tweet_id, mensagem))
+            if '#' in mensagem:
+                tags = extrair_hashtags(mensagem)
+                hashtags.append((tweet_id, tags))
+                self.__tendencias.registrar(tags, tweet.get_timestamp() / 1_000_000)
+            if '@' in mensagem:
+                mencoes.append((tweet_id, extrair_mencoes(mensagem)))
+        self.__indice_textual.adicionar_varios(textos)
+        self.__hashtags.adicionar_varios(hashtags)
+        self.__mencoes.adicionar_varios(mencoes)
 
     def existe_usuario(self, usuario: str) -> bool:
         """
@@ -36,15 +183,149 @@ class MyTwitter:
         :raises NFPException: Se o nome não estiver entre 1 e 15 caracteres.
         :raises PEException: Se o nome de usuário já existir.
         """
-        usuario = perfil.get_usuario().strip()
-        perfil.set_usuario(usuario)
-        if len(usuario) not in range(1, 16):
-            raise NFPException()
+        with self.__trava_cadastro:
+            usuario = perfil.get_usuario().strip()
+            perfil.set_usuario(usuario)
+            if len(usuario) not in range(1, 16):
+                raise NFPException()
       
-        if self.__repositorio.buscar(usuario):
-            raise PEException(usuario)
-        
-        self.__repositorio.cadastrar(perfil)
+            if self.__repositorio.buscar(usuario):
+                raise PEException(usuario)
+
+            if self.__tweetstore is not None:
+                perfil.set_tweetstore(self.__tweetstore)
+            self.__repositorio.cadastrar(perfil)
+            # o índice guarda o objeto do repositório, que é o alterado pelo grafo (repositórios
+            # em disco podem materializar outro objeto a partir do cadastro)
+            self.__usuarios.adicionar(self.__repositorio.buscar(usuario))
+        self.__compactar_se_preciso()
+
+    def bulk_load(self, perfis: Iterable = (), follows: Iterable = (), tweets: Iterable = (),
+                  gerador_id: Generator | None = None) -> Dict:
+        """
+        Importa perfis, vínculos de seguidor e tweets em massa, nessa ordem.
+
+        Cada fonte pode ser um iterável de linhas ou um arquivo de texto aberto (JSONL
+        ou CSV com cabeçalho), lido em fluxo:
+        - perfis: Perfil ou {'usuario', 'tipo', 'documento', 'ativo'};
+        - follows: (seguidor, seguido) ou {'seguidor', 'seguido'};
+        - tweets: (usuario, mensagem) ou {'usuario', 'mensagem'}, com 'id' e 'timestamp'
+          opcionais para preservar tweets já existentes. As timelines são ordenadas
+          pelo ID, então um tweet cujo ID contradiz a ordem dos timestamps dos demais
+          tweets do autor é recusado.
+
+        As linhas passam pelas mesmas validações de criar_perfil, seguir e tweetar,
+        mas os perfis consultados ficam em cache, o repositório recebe tudo em um
+        único lote, os tweets de cada perfil são ordenados uma vez e os índices
+        derivados são montados no fim. Linhas inválidas são recusadas sem
+        interromper a importação.
+
+        :param perfis: Perfis a cadastrar.
+        :param follows: Vínculos de seguidor a criar.
+        :param tweets: Tweets a publicar.
+        :param gerador_id: Gerador de IDs dos tweets novos (padrão: o gerador global).
+        :return: Número de perfis, vínculos e tweets importados e a lista de linhas
+            recusadas ('rejeitados'), cada uma com 'tipo', 'linha' e 'erro' (a exceção).
+        """
+        gerador_id = gerador_id if gerador_id is not None else gerador
+        relatorio = {'perfis': 0, 'follows': 0, 'tweets': 0, 'rejeitados': []}
+        conhecidos: Dict[str, Perfil] = {} # cache de buscas, pelo nome como veio na linha
+        importados: Dict[Perfil, List[Tweet]] = {}
+        cadastrados: List[Perfil] = []
+        # IDs e timestamps dos tweets de cada autor (existentes e aceitos), em ordem de ID
+        ordem: Dict[Perfil, Tuple[List[int], List[int]]] = {}
+
+        def resolver(usuario: str) -> Perfil | None:
+            perfil = conhecidos.get(usuario)
+            if perfil is None:
+                perfil = self.__repositorio.buscar(usuario)
+                if perfil is not None:
+                    conhecidos[usuario] = perfil
+            return perfil
+
+        def ordenar(perfil: Perfil, tweet: Tweet) -> None:
+            if perfil not in ordem:
+                existentes = perfil.get_tweets()[::-1]
+                ordem[perfil] = ([t.get_id() for t in existentes], [t.get_timestamp() for t in existentes])
+            ids_autor, timestamps = ordem[perfil]
+            id, timestamp = tweet.get_id(), tweet.get_timestamp()
+            posicao = bisect_left(ids_autor, id) # em geral no fim: importações costumam vir em ordem
+            if (posicao and timestamps[posicao - 1] > timestamp
+                    or posicao < len(timestamps) and timestamps[posicao] < timestamp):
+                raise TEException(id)
+            ids_autor.insert(posicao, id)
+            timestamps.insert(posicao, timestamp)
+
+        with self.__travas.travar_todos(), self.__trava_cadastro, self.__repositorio.lote():
+            for linha in ler_linhas(perfis):
+                try:
+                    perfil = ler_perfil(linha)
+                    usuario = perfil.get_usuario().strip()
+                    perfil.set_usuario(usuario)
+                    if len(usuario) not in range(1, 16):
+                        raise NFPException()
+                    if resolver(usuario) is not None:
+                        raise PEException(usuario)
+                except ERROS_IMPORTACAO as erro:
+                    rejeitar(relatorio['rejeitados'], 'perfil', linha, erro)
+                    continue
+                if self.__tweetstore is not None:
+                    perfil.set_tweetstore(self.__tweetstore)
+                self.__repositorio.cadastrar(perfil)
+                cadastrados.append(resolver(usuario)) # objeto do repositório (veja criar_perfil)
+                relatorio['perfis'] += 1
+
+            for linha in ler_linhas(follows):
+                try:
+                    seguidor, seguido = ler_seguir(linha)
+                    perfil_seguidor, perfil_seguido = resolver(seguidor), resolver(seguido)
+                    self.__validar_seguir(seguidor, seguido, perfil_seguidor, perfil_seguido)
+                except ERROS_IMPORTACAO as erro:
+                    rejeitar(relatorio['rejeitados'], 'follow', linha, erro)
+                    continue
+                self.__ligar(perfil_seguidor, perfil_seguido)
+                relatorio['follows'] += 1
+
+            ids = set()
+            for linha in ler_linhas(tweets):
+                try:
+                    dados = ler_tweet(linha)
+                    perfil = resolver(dados['usuario'])
+                    if not perfil:
+                        raise PIException(dados['usuario'])
+                    mensagem = dados['mensagem'].strip()
+                    if len(mensagem) not in range(1, 141):
+                        raise MFPException()
+                    if 'id' in dados:
+                        if dados['id'] in ids or self.__buscar_tweet(dados['id']) is not None:
+                            raise TEException(dados['id'])
+                        tweet = Tweet.restaurar(perfil.get_usuario(), mensagem, dados['id'], dados['timestamp'])
+                    else:
+                        tweet = Tweet(perfil.get_usuario(), mensagem, gerador_id)
+                    ordenar(perfil, tweet)
+                except ERROS_IMPORTACAO as erro:
+                    rejeitar(relatorio['rejeitados'], 'tweet', linha, erro)
+                    continue
+                ids.add(tweet.get_id())
+                importados.setdefault(perfil, []).append(tweet)
+                relatorio['tweets'] += 1
+
+            for perfil, novos in importados.items():
+                perfil.add_tweets(novos)
+                for tweet in novos:
+                    self.__repositorio.registrar_tweet(perfil, tweet)
+
+        if self.__tweetstore is None:
+            for novos in importados.values():
+                for tweet in novos:
+                    self.__tweets_por_id[tweet.get_id()] = tweet
+        self.__indexar_conteudo(tweet for novos in importados.values() for tweet in novos)
+        self.__usuarios.adicionar_varios(cadastrados) # também recalcula as sugestões dos perfis seguidos
+        if self.__timelines:
+            with self.__trava_timelines:
+                self.__timelines.limpar()
+        self.__compactar_se_preciso()
+        return relatorio
 
     def cancelar_perfil(self, usuario: str) -> None:
         """
@@ -54,51 +335,88 @@ class MyTwitter:
         :raises PDException: Se o perfil já estiver desativado.
         :raises PIException: Se o perfil não existir.
         """
-        perfil = self.__repositorio.buscar(usuario)
-        if perfil:
-            if perfil.is_ativo():
-                perfil.set_inativo()
-                self.__repositorio.atualizar(perfil)
+        with self.__travas.travar_todos(), self.__trava_cadastro:
+            perfil = self.__repositorio.buscar(usuario)
+            if perfil:
+                if perfil.is_ativo():
+                    perfil.set_inativo()
+                    for seguidor in perfil.get_seguidores():
+                        seguidor.ajustar_seguidos_ativos(-1)
+                        self.__sugestoes.invalidar(seguidor)
+                    for seguido in perfil.get_seguidos():
+                        seguido.ajustar_seguidores_ativos(-1)
+                        self.__usuarios.atualizar(seguido)
+                    self.__repositorio.atualizar(perfil)
+                    self.__usuarios.atualizar(perfil)
+                    self.__sugestoes.invalidar(perfil)
+                    if self.__timelines:
+                        with self.__trava_timelines:
+                            self.__timelines.invalidar(perfil)
+                else:
+                    raise PDException(usuario)
             else:
-                raise PDException(usuario)
-        else:
-            raise PIException(usuario)
+                raise PIException(usuario)
+        self.__compactar_se_preciso()
 
-    def tweetar(self, usuario: str, mensagem: str, gerador_id: Generator) -> None:
+    def tweetar(self, usuario: str, mensagem: str, gerador_id: Generator) -> Tweet:
         """
         Publica um tweet para um usuário.
 
         :param usuario: Nome do usuário que está tweetando.
         :param mensagem: Conteúdo do tweet.
         :param gerador_id: Função geradora passada à classe Tweet
+        :return: O tweet publicado.
         :raises MFPException: Se a mensagem for vazia ou ultrapassar 140 caracteres.
         :raises PIException: Se o perfil do usuário não existir.
+        :raises TEException: Se o gerador repetir o ID de um tweet já existente ou gerar
+            um ID menor que o do último tweet do usuário (fora da ordem da timeline).
         """
-        mensagem = mensagem.strip()
-        perfil = self.__repositorio.buscar(usuario)
-        if perfil:
-            if len(mensagem) in range(1, 141):
-                tweet = Tweet(usuario, mensagem, gerador_id)
-                perfil.add_tweet(tweet)
-                self.__repositorio.atualizar(perfil)
+        with self.__escrita(usuario):
+            mensagem = mensagem.strip()
+            perfil = self.__repositorio.buscar(usuario)
+            if perfil:
+                if len(mensagem) in range(1, 141):
+                    tweet = Tweet(perfil.get_usuario(), mensagem, gerador_id)
+                    ultimo = next(perfil.iter_tweets(), None)
+                    if (ultimo is not None and ultimo.get_id() > tweet.get_id()
+                            or self.__buscar_tweet(tweet.get_id()) is not None):
+                        raise TEException(tweet.get_id())
+                    perfil.add_tweet(tweet)
+                    self.__repositorio.registrar_tweet(perfil, tweet)
+                    if self.__tweetstore is not None:
+                        tweet = perfil.get_tweet(tweet.get_id()) # visão do tweet no armazenamento colunar
+                    else:
+                        self.__tweets_por_id[tweet.get_id()] = tweet
+                    self.__indexar_tweet(tweet)
+                    if self.__timelines:
+                        with self.__trava_timelines:
+                            self.__timelines.publicar(perfil, tweet)
+                    return tweet
+                else:
+                    raise MFPException()
             else:
-                raise MFPException()
-        else:
-            raise PIException(usuario)
+                raise PIException(usuario)
 
-    def timeline(self, usuario: str) -> List[Tweet]:
+    def timeline(self, usuario: str, limit: int | None = None, before_id: int | None = None) -> List[Tweet]:
         """
         Retorna a timeline de um usuário, contendo tweets próprios e de perfis seguidos.
 
         :param usuario: Nome do usuário.
-        :return: Lista de tweets na timeline.
+        :param limit: Número máximo de tweets retornados (None para todos).
+        :param before_id: Cursor de paginação; retorna apenas tweets com ID menor que este.
+        :return: Lista de tweets na timeline, do mais novo para o mais antigo.
         :raises PDException: Se o perfil estiver desativado.
         :raises PIException: Se o perfil não existir.
         """
         perfil = self.__repositorio.buscar(usuario)
         if perfil:
             if perfil.is_ativo():
-                return perfil.get_timeline()
+                if self.__metricas is not None:
+                    self.__metricas.registrar_fan_in(perfil.get_num_seguidos_ativos() + 1)
+                if self.__timelines:
+                    with self.__trava_timelines:
+                        return self.__timelines.ler(perfil, limit, before_id)
+                return perfil.get_timeline(limit, before_id)
             else:
                 raise PDException(usuario)
         else:
@@ -122,6 +440,123 @@ class MyTwitter:
         else:
             raise PIException(usuario)
 
+    def get_tweet(self, tweet_id: int) -> Tweet:
+        """
+        Retorna um tweet pelo seu ID, em O(1), sem precisar conhecer o autor.
+
+        :param tweet_id: ID do tweet.
+        :return: O tweet.
+        :raises TIException: Se não existir tweet com esse ID.
+        :raises PDException: Se o autor do tweet estiver desativado.
+        """
+        tweet = self.__buscar_tweet(tweet_id)
+        if tweet is None:
+            raise TIException(tweet_id)
+        if not self.__repositorio.buscar(tweet.get_usuario()).is_ativo():
+            raise PDException(tweet.get_usuario())
+        return tweet
+
+    def get_tweets_by_ids(self, ids: Iterable[int]) -> List[Tweet]:
+        """
+        Busca vários tweets pelo ID de uma só vez (útil para renderizar timelines).
+
+        IDs inexistentes ou de autores desativados são ignorados.
+
+        :param ids: IDs dos tweets.
+        :return: Lista de tweets encontrados, na ordem dos IDs informados.
+        """
+        tweets = []
+        for tweet_id in ids:
+            tweet = self.__buscar_tweet(tweet_id)
+            if tweet is not None and self.__repositorio.buscar(tweet.get_usuario()).is_ativo():
+                tweets.append(tweet)
+        return tweets
+
+    def buscar_tweets(self, consulta: str, limit: int = 20) -> List[Tweet]:
+        """
+        Busca tweets pelo conteúdo, do mais recente para o mais antigo.
+
+        Todos os termos da consulta precisam aparecer na mensagem; acentos e
+        maiúsculas são ignorados ("promocao" encontra "Promoção"). A consulta usa o
+        índice invertido mantido por tweetar e bulk_load, sem percorrer os tweets,
+        e cobre os tweets publicados ou carregados por esta instância e os que já
+        estavam no repositório ao abri-la. Tweets de autores desativados são ignorados.
+
+        :param consulta: Termos a buscar, separados por espaço.
+        :param limit: Número máximo de tweets retornados.
+        :return: Lista de tweets encontrados.
+        """
+        return self.__resolver_tweets(self.__indice_textual.buscar(consulta), limit)
+
+    def tweets_por_hashtag(self, hashtag: str, limit: int = 20, before_id: int | None = None) -> List[Tweet]:
+        """
+        Retorna os tweets com uma hashtag, do mais recente para o mais antigo.
+
+        As hashtags são extraídas na publicação, então a consulta lê apenas os tweets
+        da página. Acentos e maiúsculas são ignorados ("#Verão" e "#verao" são a
+        mesma hashtag). Tweets de autores desativados são ignorados.
+
+        :param hashtag: Hashtag, com ou sem '#'.
+        :param limit: Número máximo de tweets retornados.
+        :param before_id: Cursor de paginação; retorna apenas tweets com ID menor que este.
+        :return: Lista de tweets com a hashtag.
+        """
+        ids = self.__hashtags.buscar([normalizar(hashtag.strip().lstrip('#'))], before_id)
+        return self.__resolver_tweets(ids, limit)
+
+    def mencoes(self, usuario: str, limit: int = 20, before_id: int | None = None) -> List[Tweet]:
+        """
+        Retorna os tweets que mencionam um usuário (@usuario), do mais recente para o mais antigo.
+
+        :param usuario: Nome do usuário mencionado.
+        :param limit: Número máximo de tweets retornados.
+        :param before_id: Cursor de paginação; retorna apenas tweets com ID menor que este.
+        :return: Lista de tweets que mencionam o usuário.
+        :raises PIException: Se o perfil não existir.
+        :raises PDException: Se o perfil estiver desativado.
+        """
+        perfil = self.__repositorio.buscar(usuario)
+        if not perfil:
+            raise PIException(usuario)
+        if not perfil.is_ativo():
+            raise PDException(usuario)
+        return self.__resolver_tweets(self.__mencoes.buscar([chave_usuario(perfil.get_usuario())], before_id), limit)
+
+    def tendencias(self, k: int = 10) -> List[Tuple[str, int]]:
+        """
+        Retorna as hashtags mais usadas na janela de tempo das tendências.
+
+        :param k: Número de hashtags retornadas.
+        :return: Pares (hashtag, número de tweets), da mais usada para a menos usada.
+        """
+        return self.__tendencias.topicos(k)
+
+    def __resolver_tweets(self, ids: Iterable[int], limit: int) -> List[Tweet]:
+        """
+        Converte IDs de um índice em tweets, ignorando autores desativados, até o limite.
+        """
+        tweets = []
+        for tweet_id in ids:
+            if len(tweets) >= limit:
+                break
+            tweet = self.__buscar_tweet(tweet_id)
+            if tweet is not None and self.__repositorio.buscar(tweet.get_usuario()).is_ativo():
+                tweets.append(tweet)
+        return tweets
+
+    def __buscar_tweet(self, tweet_id: int) -> Tweet | None:
+        """
+        Busca um tweet no índice global (ou no armazenamento colunar, que cria a visão
+        sob demanda), carregando seu autor do repositório se preciso.
+        """
+        if self.__tweetstore is not None:
+            tweet = self.__tweetstore.buscar(tweet_id)
+        else:
+            tweet = self.__tweets_por_id.get(tweet_id)
+        if tweet is None:
+            tweet = self.__repositorio.buscar_tweet(tweet_id)
+        return tweet
+
     def seguir(self, seguidor: str, seguido: str) -> None:
         """
         Permite que um usuário siga outro.
@@ -131,27 +566,130 @@ class MyTwitter:
         :raises PIException: Se algum dos perfis não existir.
         :raises PDException: Se algum dos perfis estiver desativado.
         :raises SIException: Se um usuário tentar seguir a si mesmo.
+        :raises PJSException: Se o usuário já seguir o perfil.
+        :raises PBException: Se houver bloqueio entre os perfis.
+        """
+        with self.__escrita(seguidor, seguido):
+            perfil_seguidor = self.__repositorio.buscar(seguidor)
+            perfil_seguido = self.__repositorio.buscar(seguido)
+            self.__validar_seguir(seguidor, seguido, perfil_seguidor, perfil_seguido)
+            self.__ligar(perfil_seguidor, perfil_seguido)
+            if self.__timelines:
+                with self.__trava_timelines:
+                    self.__timelines.seguir(perfil_seguidor, perfil_seguido)
+
+    @staticmethod
+    def __validar_seguir(seguidor: str, seguido: str, perfil_seguidor: Perfil | None, perfil_seguido: Perfil | None) -> None:
+        """
+        Verifica se um perfil pode seguir outro, levantando a exceção correspondente se não puder.
         """
-        perfil_seguidor = self.__repositorio.buscar(seguidor)
         if not perfil_seguidor:
             raise PIException(seguidor)
         if not perfil_seguidor.is_ativo():
             raise PDException(seguidor)
-
-        perfil_seguido = self.__repositorio.buscar(seguido)
         if not perfil_seguido:
             raise PIException(seguido)
         if not perfil_seguido.is_ativo():
             raise PDException(seguido)
-        if seguidor == seguido:
+        if perfil_seguidor is perfil_seguido:
             raise SIException(seguidor)
-        
-        lista_seguidores_seguido = self.seguidores(seguido)
-        if seguidor in lista_seguidores_seguido:
+        if perfil_seguidor.segue(perfil_seguido):
             raise PJSException()
+        if perfil_seguido.bloqueou(perfil_seguidor) or perfil_seguidor.bloqueou(perfil_seguido):
+            raise PBException(seguido)
 
+    def __ligar(self, perfil_seguidor: Perfil, perfil_seguido: Perfil) -> None:
+        """
+        Liga dois perfis no grafo e atualiza os contadores e o repositório.
+        """
         perfil_seguidor.add_seguidos(perfil_seguido)
         perfil_seguido.add_seguidor(perfil_seguidor)
+        perfil_seguidor.ajustar_seguidos_ativos(1)
+        perfil_seguido.ajustar_seguidores_ativos(1)
+        self.__repositorio.registrar_seguir(perfil_seguidor, perfil_seguido)
+        self.__usuarios.atualizar(perfil_seguido)
+        self.__sugestoes.invalidar(perfil_seguidor)
+
+    def deixar_de_seguir(self, seguidor: str, seguido: str) -> None:
+        """
+        Permite que um usuário deixe de seguir outro.
+
+        Os dois lados do grafo são atualizados em O(1) e, no modo push, apenas os
+        tweets do perfil deixado são removidos da timeline materializada.
+
+        :param seguidor: Nome do usuário que deixará de seguir.
+        :param seguido: Nome do usuário que deixará de ser seguido.
+        :raises PIException: Se algum dos perfis não existir.
+        :raises PDException: Se o seguidor estiver desativado.
+        :raises PNSException: Se o usuário não seguir o perfil.
+        """
+        with self.__escrita(seguidor, seguido):
+            perfil_seguidor = self.__repositorio.buscar(seguidor)
+            if not perfil_seguidor:
+                raise PIException(seguidor)
+            if not perfil_seguidor.is_ativo():
+                raise PDException(seguidor)
+
+            perfil_seguido = self.__repositorio.buscar(seguido)
+            if not perfil_seguido:
+                raise PIException(seguido)
+            if not perfil_seguidor.segue(perfil_seguido):
+                raise PNSException()
+
+            self.__desfazer_seguir(perfil_seguidor, perfil_seguido)
+
+    def bloquear(self, usuario: str, bloqueado: str) -> None:
+        """
+        Bloqueia um perfil: desfaz os vínculos entre os dois perfis, nos dois sentidos,
+        e impede que voltem a se seguir.
+
+        :param usuario: Nome do usuário que está bloqueando.
+        :param bloqueado: Nome do usuário a ser bloqueado.
+        :raises PIException: Se algum dos perfis não existir.
+        :raises PDException: Se o usuário estiver desativado.
+        :raises SIException: Se um usuário tentar bloquear a si mesmo.
+        :raises PBException: Se o perfil já estiver bloqueado.
+        """
+        with self.__escrita(usuario, bloqueado):
+            perfil = self.__repositorio.buscar(usuario)
+            if not perfil:
+                raise PIException(usuario)
+            if not perfil.is_ativo():
+                raise PDException(usuario)
+
+            perfil_bloqueado = self.__repositorio.buscar(bloqueado)
+            if not perfil_bloqueado:
+                raise PIException(bloqueado)
+            if perfil is perfil_bloqueado:
+                raise SIException(usuario)
+            if perfil.bloqueou(perfil_bloqueado):
+                raise PBException(bloqueado)
+
+            perfil.add_bloqueado(perfil_bloqueado)
+            self.__repositorio.registrar_bloqueio(perfil, perfil_bloqueado)
+            if perfil.segue(perfil_bloqueado):
+                self.__desfazer_seguir(perfil, perfil_bloqueado)
+            if perfil_bloqueado.segue(perfil):
+                self.__desfazer_seguir(perfil_bloqueado, perfil)
+            self.__sugestoes.invalidar(perfil)
+            self.__sugestoes.invalidar(perfil_bloqueado)
+
+    def __desfazer_seguir(self, perfil_seguidor: Perfil, perfil_seguido: Perfil) -> None:
+        """
+        Remove o vínculo de seguidor nos dois lados do grafo e atualiza as estruturas derivadas.
+        """
+        perfil_seguidor.remove_seguidos(perfil_seguido)
+        perfil_seguido.remove_seguidor(perfil_seguidor)
+        if perfil_seguido.is_ativo():
+            perfil_seguidor.ajustar_seguidos_ativos(-1)
+        if perfil_seguidor.is_ativo():
+            perfil_seguido.ajustar_seguidores_ativos(-1)
+        self.__repositorio.registrar_deixar_de_seguir(perfil_seguidor, perfil_seguido)
+        self.__usuarios.atualizar(perfil_seguido)
+        self.__sugestoes.invalidar(perfil_seguidor)
+        if self.__timelines:
+            with self.__trava_timelines:
+                self.__timelines.deixar_de_seguir(perfil_seguidor, perfil_seguido)
 
     def numero_seguidores(self, usuario: str) -> int:
         """
@@ -167,30 +705,33 @@ class MyTwitter:
             raise PIException(usuario)
         if not perfil.is_ativo():
             raise PDException(usuario)
-        return perfil.get_numero_seguidores()
+        return perfil.get_num_seguidores_ativos()
 
-    def seguidores(self, usuario: str) -> List[Perfil]:
+    def perfil_stats(self, usuario: str) -> Dict[str, int]:
         """
-        Obtém a lista de seguidores ativos de um usuário.
+        Retorna, em O(1), os contadores de um perfil a partir dos contadores mantidos
+        por seguir, deixar_de_seguir, cancelar_perfil e tweetar.
 
-        :param usuario: Nome do usuário cujo seguidores serão retornados.
-        :return: Lista de perfis que seguem o usuário e estão ativos.
-        :raises PIException: Se o usuário não existir.
-        :raises PDException: Se o usuário estiver desativado.
+        :param usuario: Nome do usuário.
+        :return: Dicionário com o número de tweets, seguidores ativos e seguidos ativos.
+        :raises PIException: Se o perfil não existir.
+        :raises PDException: Se o perfil estiver desativado.
         """
         perfil = self.__repositorio.buscar(usuario)
         if not perfil:
             raise PIException(usuario)
         if not perfil.is_ativo():
             raise PDException(usuario)
-        return [seguidor for seguidor in perfil.get_seguidores() if seguidor.is_ativo()]
+        return {
+            'tweets': perfil.get_num_tweets(),
+            'seguidores': perfil.get_num_seguidores_ativos(),
+            'seguidos': perfil.get_num_seguidos_ativos(),
+        }
 
-    def seguidos(self, usuario: str) -> List[Perfil]:
+    def __perfil_ativo(self, usuario: str) -> Perfil:
         """
-        Obtém a lista de usuários que um perfil segue e que estão ativos.
+        Busca um usuário que deve existir e estar ativo.
 
-        :param usuario: Nome do usuário cujo seguidos serão retornados.
-        :return: Lista de perfis seguidos que estão ativos.
         :raises PIException: Se o usuário não existir.
         :raises PDException: Se o usuário estiver desativado.
         """
@@ -199,16 +740,177 @@ class MyTwitter:
             raise PIException(usuario)
         if not perfil.is_ativo():
             raise PDException(usuario)
-        return [seguido for seguido in perfil.get_seguidos() if seguido.is_ativo()]
+        return perfil
+
+    def seguidores(self, usuario: str, limit: int | None = None, cursor: int | None = None) -> Pagina[Perfil]:
+        """
+        Obtém a lista de seguidores ativos de um usuário, na ordem em que passaram a segui-lo.
+
+        A listagem pode ser paginada: cada página custa O(limit), e `pagina.cursor`
+        continua a listagem de onde ela parou, mesmo que o grafo mude entre as páginas
+        (perfis que deixarem de seguir somem, novos seguidores aparecem no fim).
+
+        :param usuario: Nome do usuário cujo seguidores serão retornados.
+        :param limit: Número máximo de perfis (None para todos).
+        :param cursor: Cursor de paginação (Pagina.cursor da página anterior).
+        :return: Página (lista) de perfis que seguem o usuário e estão ativos.
+        :raises PIException: Se o usuário não existir.
+        :raises PDException: Se o usuário estiver desativado.
+        """
+        perfil = self.__perfil_ativo(usuario)
+        if limit is None and cursor is None:
+            return Pagina([seguidor for seguidor in perfil.get_seguidores() if seguidor.is_ativo()])
+        return paginar(((chave, seguidor) for chave, seguidor in perfil.iter_seguidores(cursor) if seguidor.is_ativo()),
+                       limit, cursor)
+
+    def iter_seguidores(self, usuario: str, cursor: int | None = None) -> Iterator[Perfil]:
+        """
+        Itera sobre os seguidores ativos de um usuário, na ordem de seguidores(), sem montar a lista.
+
+        :param usuario: Nome do usuário cujo seguidores serão percorridos.
+        :param cursor: Cursor de paginação (Pagina.cursor de seguidores()).
+        :raises PIException: Se o usuário não existir.
+        :raises PDException: Se o usuário estiver desativado.
+        """
+        perfil = self.__perfil_ativo(usuario)
+        return (seguidor for _, seguidor in perfil.iter_seguidores(cursor) if seguidor.is_ativo())
+
+    def seguidos(self, usuario: str, limit: int | None = None, cursor: int | None = None) -> Pagina[Perfil]:
+        """
+        Obtém a lista de usuários que um perfil segue e que estão ativos, na ordem em
+        que foram seguidos. A listagem pode ser paginada como em seguidores().
+
+        :param usuario: Nome do usuário cujo seguidos serão retornados.
+        :param limit: Número máximo de perfis (None para todos).
+        :param cursor: Cursor de paginação (Pagina.cursor da página anterior).
+        :return: Página (lista) de perfis seguidos que estão ativos.
+        :raises PIException: Se o usuário não existir.
+        :raises PDException: Se o usuário estiver desativado.
+        """
+        perfil = self.__perfil_ativo(usuario)
+        if limit is None and cursor is None:
+            return Pagina([seguido for seguido in perfil.get_seguidos() if seguido.is_ativo()])
+        return paginar(((chave, seguido) for chave, seguido in perfil.iter_seguidos(cursor) if seguido.is_ativo()),
+                       limit, cursor)
+
+    def iter_seguidos(self, usuario: str, cursor: int | None = None) -> Iterator[Perfil]:
+        """
+        Itera sobre os perfis ativos seguidos por um usuário, na ordem de seguidos(), sem montar a lista.
+
+        :param usuario: Nome do usuário cujo seguidos serão percorridos.
+        :param cursor: Cursor de paginação (Pagina.cursor de seguidos()).
+        :raises PIException: Se o usuário não existir.
+        :raises PDException: Se o usuário estiver desativado.
+        """
+        perfil = self.__perfil_ativo(usuario)
+        return (seguido for _, seguido in perfil.iter_seguidos(cursor) if seguido.is_ativo())
+
+    @staticmethod
+    def __nome_listado(perfil: Perfil) -> str:
+        return perfil.get_usuario() if perfil.is_ativo() else f"{perfil.get_usuario()} (inativo)"
+
+    def usuarios_cadastrados(self, limit: int | None = None, cursor: int | None = None) -> Pagina[str]:
+        """
+        Retorna uma lista de nomes de usuários cadastrados, em ordem de cadastro,
+        indicando se estão ativos ou inativos.
+
+        A listagem pode ser paginada: cada página custa O(limit), e `pagina.cursor`
+        continua a listagem de onde ela parou; perfis cadastrados depois aparecem no fim.
+
+        :param limit: Número máximo de nomes (None para todos).
+        :param cursor: Cursor de paginação (Pagina.cursor da página anterior).
+        :return: Página (lista) com os nomes dos usuários, com um indicador de inatividade quando aplicável.
+        """
+        if limit is None and cursor is None:
+            return Pagina([perfil.get_usuario() if perfil.is_ativo() else f"{perfil.get_usuario()} (inativo)"
+                           for perfil in self.__repositorio.get_usuarios()])
+        return paginar(((chave, self.__nome_listado(perfil)) for chave, perfil in self.__repositorio.iter_usuarios(cursor)),
+                       limit, cursor)
+
+    def iter_usuarios_cadastrados(self, cursor: int | None = None) -> Iterator[str]:
+        """
+        Itera sobre os nomes de usuários cadastrados, como em usuarios_cadastrados(), sem montar a lista.
+
+        :param cursor: Cursor de paginação (Pagina.cursor de usuarios_cadastrados()).
+        """
+        return (self.__nome_listado(perfil) for _, perfil in self.__repositorio.iter_usuarios(cursor))
+
+    def export(self, arquivo: TextIO, tamanho_bloco: int = 10_000) -> Dict[str, int]:
+        """
+        Exporta perfis, grafo de seguidores, bloqueios e tweets para um arquivo JSONL,
+        um bloco por linha, sem montar cópias ordenadas da rede.
+
+        O ponto de corte é o momento da chamada, lido com todas as travas e sem copiar
+        a rede: perfis cadastrados, vínculos criados e tweets publicados depois dele não
+        entram na exportação (mudanças de estado, vínculos desfeitos e bloqueios são
+        lidos à medida que os blocos são gravados). Os tweets são gravados em blocos
+        de colunas, que podem ser recarregados com TweetStore.adicionar_bloco; veja
+        exportacao.blocos_exportacao e exportacao.ler_exportacao.
+
+        :param arquivo: Arquivo de texto aberto para escrita.
+        :param tamanho_bloco: Número máximo de linhas por bloco.
+        :return: Número de linhas exportadas em cada seção.
+        """
+        contagem = {'perfis': 0, 'follows': 0, 'bloqueios': 0, 'tweets': 0}
+        with self.__travas.travar_todos(), self.__trava_cadastro:
+            blocos = blocos_exportacao(self.__repositorio, tamanho_bloco)
+            cabecalho = next(blocos) # o cabeçalho fixa o ponto de corte
+        for bloco in chain([cabecalho], blocos):
+            arquivo.write(json.dumps(bloco, ensure_ascii=False, separators=(',', ':')) + '\n')
+            if bloco['secao'] == 'tweets':
+                contagem['tweets'] += len(bloco['id'])
+            elif bloco['secao'] != 'cabecalho':
+                contagem[bloco['secao']] += len(bloco['linhas'])
+        return contagem
+
+    def sugerir_usuarios(self, prefixo: str, limit: int = 10) -> List[str]:
+        """
+        Sugere nomes de usuário que começam com um prefixo (busca enquanto se digita).
+
+        Perfis ativos vêm primeiro, ordenados pelo número de seguidores ativos; empates
+        ficam em ordem alfabética. O índice de prefixos é mantido por criar_perfil,
+        cancelar_perfil e pelas mudanças de seguidores, então a consulta não percorre
+        os perfis cadastrados.
+
+        :param prefixo: Começo do nome de usuário (sem diferenciar maiúsculas de minúsculas).
+        :param limit: Número máximo de sugestões.
+        :return: Lista de nomes de usuário.
+        """
+        return [perfil.get_usuario() for perfil in self.__usuarios.sugerir(prefixo.strip(), limit)]
+
+    def __seguidos_completos(self, perfil: Perfil) -> List[Perfil]:
+        """
+        Retorna os seguidos de um perfil, buscando-o no repositório para que perfis
+        carregados sob demanda tenham seus vínculos completos.
+        """
+        return (self.__repositorio.buscar(perfil.get_usuario()) or perfil).get_seguidos()
+
+    def sugestoes_para_seguir(self, usuario: str, k: int = 10) -> List[str]:
+        """
+        Sugere perfis para um usuário seguir: os mais seguidos pelos perfis que ele já
+        segue (amigos de amigos), sem perfis inativos ou com bloqueio entre os dois.
+
+        As sugestões ficam em cache por usuário e são recalculadas apenas quando o
+        usuário ou um perfil que ele segue muda de vínculos; veja recalcular_sugestoes
+        para calcular as de todos os perfis de uma vez.
+
+        :param usuario: Nome do usuário.
+        :param k: Número máximo de sugestões.
+        :return: Nomes dos perfis sugeridos, do mais para o menos relevante.
+        :raises PIException: Se o usuário não existir.
+        :raises PDException: Se o usuário estiver desativado.
+        """
+        perfil = self.__perfil_ativo(usuario)
+        return [sugerido.get_usuario() for sugerido in self.__sugestoes.sugerir(perfil, k)]
 
-    def usuarios_cadastrados(self) -> List[str]:
+    def recalcular_sugestoes(self) -> int:
         """
-        Retorna uma lista de nomes de usuários cadastrados, indicando se estão ativos ou inativos.
+        Calcula as sugestões para seguir de todos os perfis ativos de uma vez (por
+        exemplo, periodicamente ou após um bulk_load), deixando-as em cache.
 
-        :return: Lista contendo os nomes dos usuários, com um indicador de inatividade quando aplicável.
+        :return: Número de perfis com sugestões calculadas.
         """
-        lista_perfis = self.__repositorio.get_usuarios()
-        return [perfil.get_usuario() if perfil.is_ativo() else f"{perfil.get_usuario()} (inativo)" for perfil in lista_perfis]
+        return self.__sugestoes.recalcular(self.__repositorio.get_usuarios())
 
     def get_instance_perfil(self, usuario: str) -> str:
         """
@@ -0,0 +1,148 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import count
+from typing import Dict, Generic, Hashable, Iterable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+SEQUENCIAS = count() # números de sequência dos itens de todos os ConjuntoOrdenado
+
+def proxima_sequencia() -> int:
+    """
+    Reserva um número de sequência: todo item inserido depois em um ConjuntoOrdenado
+    recebe um número maior (por exemplo, para um ponto de corte de exportação).
+    """
+    return next(SEQUENCIAS)
+
+class Pagina(list, Generic[T]):
+    """
+    Página de uma listagem paginada: uma lista com os itens e o cursor da próxima página.
+
+    Atributos:
+        cursor (int | None): Valor a passar como `cursor` para obter a próxima página,
+            ou None se a listagem chegou ao fim.
+    """
+
+    def __init__(self, itens: Iterable[T] = (), cursor: int | None = None) -> None:
+        super().__init__(itens)
+        self.cursor = cursor
+
+def paginar(pares: Iterable[Tuple[int, T]], limit: int | None, cursor: int | None = None) -> Pagina[T]:
+    """
+    Monta uma página a partir de pares (cursor, item) em ordem crescente de cursor.
+
+    Consome no máximo `limit` + 1 pares: o excedente só indica que há uma próxima
+    página, cujo cursor é o do último item retornado.
+
+    Args:
+        pares (Iterable[Tuple[int, T]]): Pares a partir do início da página.
+        limit (int | None): Número máximo de itens (None para todos).
+        cursor (int | None): Cursor usado para obter a página.
+
+    Returns:
+        Pagina[T]: Itens da página e o cursor da próxima.
+    """
+    if limit is None:
+        return Pagina([item for _, item in pares])
+    itens: List[T] = []
+    for chave, item in pares:
+        if len(itens) >= limit:
+            return Pagina(itens, cursor)
+        itens.append(item)
+        cursor = chave
+    return Pagina(itens, None)
+
+class ConjuntoOrdenado:
+    """
+    Conjunto em ordem de inserção que pode ser percorrido a partir de um cursor.
+
+    Cada item recebe um número de sequência crescente ao ser inserido (reinserções
+    vão para o fim), tirado de um contador comum a todos os conjuntos: um único
+    número separa os itens inseridos antes e depois de um momento. Os itens ficam em uma lista de posições, com os números de
+    sequência em um array paralelo: retomar a partir de um cursor é uma busca
+    binária, e percorrer uma página custa O(página). Remoções deixam a posição vazia;
+    quando mais da metade das posições está vazia, a lista é compactada em uma cópia
+    (copy-on-write), de modo que leitores em andamento continuam na lista antiga.
+    Cursores continuam válidos após remoções e compactações.
+
+    Atributos:
+        FATIA (int): Número de posições lidas por vez ao percorrer o conjunto.
+    """
+
+    FATIA = 64
+
+    __slots__ = ('__sequencias', '__posicoes', '__remocoes')
+
+    def __init__(self) -> None:
+        self.__sequencias: Dict[Hashable, int] = {}
+        # números de sequência, itens (None nas posições removidas) e o total de remoções
+        # quando a lista foi criada; os três são trocados juntos na compactação
+        self.__posicoes: Tuple[array, List, int] = (array('q'), [], 0)
+        self.__remocoes = 0
+
+    def __len__(self) -> int:
+        return len(self.__sequencias)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self.__sequencias
+
+    def __iter__(self) -> Iterator:
+        return iter(self.lista())
+
+    def lista(self) -> List:
+        """
+        Retorna uma cópia dos itens, em ordem de inserção.
+        """
+        _, itens, remocoes = self.__posicoes
+        copia = itens[:]
+        # remover conta a remoção antes de esvaziar a posição: se a cópia tem posições
+        # vazias, o contador já mudou desde a criação da lista
+        if self.__remocoes != remocoes:
+            copia = [item for item in copia if item is not None]
+        return copia
+
+    def adicionar(self, item: Hashable) -> None:
+        """
+        Inclui um item no fim do conjunto, se ainda não estiver nele.
+        """
+        if item in self.__sequencias:
+            return
+        sequencias, itens, _ = self.__posicoes
+        sequencia = proxima_sequencia()
+        sequencias.append(sequencia) # antes do item: leitores só veem posições completas
+        itens.append(item)
+        self.__sequencias[item] = sequencia
+
+    def remover(self, item: Hashable) -> None:
+        """
+        Remove um item do conjunto, se estiver nele.
+        """
+        sequencia = self.__sequencias.pop(item, None)
+        if sequencia is None:
+            return
+        sequencias, itens, remocoes = self.__posicoes
+        self.__remocoes += 1
+        itens[bisect_left(sequencias, sequencia)] = None
+        if (self.__remocoes - remocoes) * 2 > len(itens):
+            self.__posicoes = (array('q', self.__sequencias.values()), list(self.__sequencias), self.__remocoes)
+
+    def iter_desde(self, cursor: int | None = None) -> Iterator[Tuple[int, object]]:
+        """
+        Itera sobre os pares (número de sequência, item), em ordem de inserção.
+
+        Args:
+            cursor (int | None): Se informado, começa pelo primeiro item inserido depois
+                do item com este número de sequência.
+        """
+        sequencias, itens, _ = self.__posicoes
+        posicao = 0 if cursor is None else bisect_right(sequencias, cursor)
+        while posicao < len(itens):
+            # em fatias, para não percorrer item a item em Python; os números de
+            # sequência são gravados antes dos itens, então o zip para no último item completo
+            fatia = itens[posicao:posicao + self.FATIA]
+            for sequencia, item in zip(sequencias[posicao:posicao + len(fatia)], fatia):
+                if item is not None:
+                    yield sequencia, item
+            posicao += len(fatia)
+
+VAZIO = ConjuntoOrdenado() # compartilhado pelos perfis sem vínculos; nunca é alterado
@@ -1,6 +1,10 @@
 from __future__ import annotations
-from typing import List
+from bisect import bisect_left, insort
+from itertools import chain
+from typing import Dict, Iterator, List, Tuple
 from .tweet import Tweet
+from .timeline import chave_tweet, mesclar_timelines
+from .paginacao import VAZIO, ConjuntoOrdenado
 
 class Perfil:
     def __init__(self, usuario: str) -> None: 
@@ -11,19 +15,65 @@ class Perfil:
             usuario (str): Nome de usuário do perfil.
         """
         self.__usuario = usuario
-        self.__seguidos = []
-        self.__seguidores = []
+        # Grafo social em conjuntos ordenados (ordem de inserção), paginados por cursor;
+        # os perfis sem vínculos compartilham o conjunto vazio
+        self.__seguidos: ConjuntoOrdenado = VAZIO
+        self.__seguidores: ConjuntoOrdenado = VAZIO
+        self.__bloqueados: Dict[Perfil, None] = {}
         self.__tweets = []
         self.__ativo = True
+        # Contadores de vínculos com perfis ativos, mantidos pelo MyTwitter
+        self.__seguidores_ativos = 0
+        self.__seguidos_ativos = 0
 
     def add_tweet(self, tweet: Tweet) -> None:
         """
-        Adiciona um tweet ao perfil.
+        Adiciona um tweet ao perfil, mantendo a lista em ordem de ID (ver chave_tweet).
+
+        Tweets novos vão para o fim da lista, o que não afeta leitores que estejam
+        percorrendo as posições anteriores. Um tweet fora de ordem é inserido em uma
+        cópia da lista (copy-on-write), para que esses leitores continuem vendo um
+        snapshot consistente.
 
         Args:
             tweet (Tweet): Tweet a ser adicionado.
         """
-        self.__tweets.append(tweet)
+        tweets = self.__tweets
+        if not tweets or chave_tweet(tweets[-1]) <= chave_tweet(tweet):
+            tweets.append(tweet)
+        elif isinstance(tweets, list):
+            tweets = tweets[:]
+            insort(tweets, tweet, key=chave_tweet)
+            self.__tweets = tweets
+        else:
+            insort(tweets, tweet, key=chave_tweet)
+
+    def add_tweets(self, tweets: List[Tweet]) -> None:
+        """
+        Adiciona vários tweets de uma vez (importação em massa), ordenando uma única vez.
+
+        Args:
+            tweets (List[Tweet]): Tweets a serem adicionados, em qualquer ordem.
+        """
+        if isinstance(self.__tweets, list):
+            # nova lista (copy-on-write); o Timsort apenas intercala as duas partes já ordenadas
+            self.__tweets = sorted(chain(self.__tweets, tweets), key=chave_tweet)
+        else:
+            for tweet in sorted(tweets, key=chave_tweet):
+                self.add_tweet(tweet)
+
+    def set_tweetstore(self, store) -> None:
+        """
+        Passa a guardar os tweets do perfil em um armazenamento colunar,
+        migrando os tweets já existentes.
+
+        Args:
+            store (TweetStore): Armazenamento colunar compartilhado.
+        """
+        tweets = store.sequencia_autor()
+        for tweet in self.__tweets:
+            tweets.append(tweet)
+        self.__tweets = tweets
 
     def add_seguidos(self, perfil: Perfil) -> None:
         """
@@ -32,42 +82,101 @@ class Perfil:
         Args:
             perfil (Perfil): Perfil a ser seguido.
         """
-        if perfil not in self.__seguidos:
-            self.__seguidos.append(perfil)
+        if self.__seguidos is VAZIO:
+            self.__seguidos = ConjuntoOrdenado()
+        self.__seguidos.adicionar(perfil)
 
     def add_seguidor(self, perfil: Perfil) -> None:
         """
         Adiciona um perfil à lista de seguidores.
         """
-        if perfil not in self.__seguidores:
-            self.__seguidores.append(perfil)
+        if self.__seguidores is VAZIO:
+            self.__seguidores = ConjuntoOrdenado()
+        self.__seguidores.adicionar(perfil)
+
+    def remove_seguidos(self, perfil: Perfil) -> None:
+        """
+        Remove um perfil da lista de seguidos.
+
+        Args:
+            perfil (Perfil): Perfil que deixará de ser seguido.
+        """
+        self.__seguidos.remover(perfil)
+
+    def remove_seguidor(self, perfil: Perfil) -> None:
+        """
+        Remove um perfil da lista de seguidores.
+        """
+        self.__seguidores.remover(perfil)
+
+    def add_bloqueado(self, perfil: Perfil) -> None:
+        """
+        Adiciona um perfil à lista de bloqueados.
+        """
+        self.__bloqueados[perfil] = None
+
+    def bloqueou(self, perfil: Perfil) -> bool:
+        """
+        Verifica, em O(1), se este perfil bloqueou o perfil informado.
+        """
+        return perfil in self.__bloqueados
+
+    def segue(self, perfil: Perfil) -> bool:
+        """
+        Verifica, em O(1), se este perfil segue o perfil informado.
+        """
+        return perfil in self.__seguidos
+
+    def is_seguido_por(self, perfil: Perfil) -> bool:
+        """
+        Verifica, em O(1), se o perfil informado segue este perfil.
+        """
+        return perfil in self.__seguidores
 
     def get_tweet(self, id: int) -> Tweet | None:
         """
-        Retorna um tweet pelo seu ID.
+        Retorna um tweet pelo seu ID, ou None se o perfil não tiver esse tweet.
+
+        Os tweets estão em ordem de ID, então a busca é binária.
         """
-        for i in self.__tweets:
-            if i.get_id() == id:
-                return i
-        print('Tweet não encontrado, tente novamente')
+        tweets = self.__tweets
+        posicao = bisect_left(tweets, id, key=lambda tweet: tweet.get_id())
+        if posicao < len(tweets) and tweets[posicao].get_id() == id:
+            return tweets[posicao]
+        return None
 
     def get_tweets(self) -> List[Tweet]:
         """
-        Retorna a lista de tweets ordenados por data de postagem.
+        Retorna a lista de tweets ordenados por data de postagem (do mais novo para o mais antigo).
+        """
+        return self.__tweets[::-1]
+
+    def iter_tweets(self, before_id: int | None = None) -> Iterator[Tweet]:
+        """
+        Itera preguiçosamente sobre os tweets do perfil, do mais novo para o mais antigo.
+
+        Os tweets são mantidos em ordem de postagem, então não há ordenação.
+
+        Args:
+            before_id (int | None): Se informado, considera apenas tweets com ID menor que este (cursor).
         """
-        tweets_ordenados = sorted(self.__tweets, key=lambda x: x.get_data_postagem(), reverse=True)
-        return tweets_ordenados
+        tweets = self.__tweets # snapshot: tweets posteriores não alteram as posições já lidas
+        fim = len(tweets)
+        if before_id is not None:
+            fim = bisect_left(tweets, before_id, key=lambda tweet: tweet.get_id())
+        return (tweets[i] for i in range(fim - 1, -1, -1))
 
-    def get_timeline(self) -> List[Tweet]:
+    def get_timeline(self, limit: int | None = None, before_id: int | None = None) -> List[Tweet]:
         """
         Retorna a timeline do perfil, incluindo tweets dos perfis seguidos.
+
+        Args:
+            limit (int | None): Número máximo de tweets retornados.
+            before_id (int | None): Cursor de paginação; retorna apenas tweets com ID menor que este.
         """
-        timeline = []
-        for i in self.__seguidos:
-            timeline += i.get_tweets()
-        timeline += self.__tweets
-        timeline = sorted(timeline, key=lambda x: x.get_data_postagem(), reverse=True)
-        return timeline
+        fontes = [seguido.iter_tweets(before_id) for seguido in self.__seguidos.lista()] # cópia atômica
+        fontes.append(self.iter_tweets(before_id))
+        return mesclar_timelines(fontes, limit)
 
     def get_usuario(self) -> str:
         """
@@ -108,17 +217,83 @@ class Perfil:
         """
         return len(self.__seguidores)
 
+    def get_num_tweets(self) -> int:
+        """
+        Retorna o número de tweets do perfil.
+        """
+        return len(self.__tweets)
+
+    def get_num_seguidores_ativos(self) -> int:
+        """
+        Retorna o número de seguidores ativos do perfil.
+        """
+        return self.__seguidores_ativos
+
+    def get_num_seguidos_ativos(self) -> int:
+        """
+        Retorna o número de perfis ativos seguidos pelo perfil.
+        """
+        return self.__seguidos_ativos
+
+    def ajustar_seguidores_ativos(self, delta: int) -> None:
+        """
+        Ajusta o contador de seguidores ativos.
+
+        Args:
+            delta (int): Valor somado ao contador.
+        """
+        self.__seguidores_ativos += delta
+
+    def ajustar_seguidos_ativos(self, delta: int) -> None:
+        """
+        Ajusta o contador de perfis ativos seguidos.
+
+        Args:
+            delta (int): Valor somado ao contador.
+        """
+        self.__seguidos_ativos += delta
+
     def get_seguidores(self) -> List[Perfil]:
         """
-        Retorna a lista de seguidores do perfil.
+        Retorna a lista de seguidores do perfil, em ordem de inserção.
         """
-        return self.__seguidores
+        return self.__seguidores.lista()
 
     def get_seguidos(self) -> List[Perfil]:
         """
-        Retorna a lista de perfis seguidos.
+        Retorna a lista de perfis seguidos, em ordem de inserção.
+        """
+        return self.__seguidos.lista()
+
+    def iter_seguidores(self, cursor: int | None = None) -> Iterator[Tuple[int, Perfil]]:
+        """
+        Itera sobre os seguidores em ordem de inserção, a partir de um cursor.
+
+        Args:
+            cursor (int | None): Se informado, começa após o seguidor com este cursor.
+
+        Returns:
+            Iterator[Tuple[int, Perfil]]: Pares (cursor, seguidor).
+        """
+        return self.__seguidores.iter_desde(cursor)
+
+    def iter_seguidos(self, cursor: int | None = None) -> Iterator[Tuple[int, Perfil]]:
+        """
+        Itera sobre os perfis seguidos em ordem de inserção, a partir de um cursor.
+
+        Args:
+            cursor (int | None): Se informado, começa após o perfil com este cursor.
+
+        Returns:
+            Iterator[Tuple[int, Perfil]]: Pares (cursor, perfil seguido).
+        """
+        return self.__seguidos.iter_desde(cursor)
+
+    def get_bloqueados(self) -> List[Perfil]:
+        """
+        Retorna a lista de perfis bloqueados, em ordem de inserção.
         """
-        return self.__seguidos
+        return list(self.__bloqueados)
     
 
 class PessoaFisica(Perfil):
@@ -1,13 +1,28 @@
-from typing import List
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+from .paginacao import proxima_sequencia
 from .perfis import Perfil
+from .tweet import Tweet
 from exceptions import UJCException, UNCException
 
+def chave_usuario(usuario: str) -> str:
+  """
+  Normaliza um nome de usuário para uso como chave de índice (Case Insensitive).
+  """
+  return usuario.casefold()
+
 class RepositorioUsuarios:
   def __init__(self):
     """
     Inicializa o repositório de usuários.
+
+    Os perfis ficam em uma lista (ordem de cadastro, usada por get_usuarios) e em
+    um índice por nome de usuário normalizado, que torna busca, cadastro e
+    atualização O(1).
     """
     self.__usuarios = []
+    self.__indice: Dict[str, int] = {}
+    self.__chaves: Dict[int, str] = {}
 
   def cadastrar(self, usuario: Perfil) -> None:
     """
@@ -16,35 +31,161 @@ class RepositorioUsuarios:
     Raise:
         UJCException: Se o usuário já estiver cadastrado.
     """
-    if not self.buscar(usuario.get_usuario()):
-      self.__usuarios.append(usuario)
-    else:
+    chave = chave_usuario(usuario.get_usuario())
+    if chave in self.__indice:
       raise UJCException(usuario)
+    self.__usuarios.append(usuario)
+    self.__chaves[id(usuario)] = chave
+    self.__indice[chave] = len(self.__usuarios) - 1 # por último: leitores concorrentes só veem o perfil completo
 
   def buscar(self, usuario: str) -> Perfil | None:
     """
     Busca um usuário pelo nome de usuário.
     """
-    for perfil in self.__usuarios:
-      if perfil.get_usuario().lower() == usuario.lower():
-        return perfil
-    return None
+    chave = chave_usuario(usuario)
+    posicao = self.__indice.get(chave)
+    if posicao is None:
+      return None
+    perfil = self.__usuarios[posicao]
+    if chave_usuario(perfil.get_usuario()) != chave:
+      return None # perfil renomeado e ainda não atualizado
+    return perfil
 
   def atualizar(self, perfil: Perfil) -> None:
     """
     Atualiza as informações de um perfil no repositório.
-     
+
     raise:
         UNCException: Se o usuário não estiver cadastrado.
     """
-    usuario = self.buscar(perfil.get_usuario())
-    if usuario: # verifica se usuario existe
-      self.__usuarios[self.__usuarios.index(usuario)] = perfil
+    chave = chave_usuario(perfil.get_usuario())
+    chave_antiga = self.__chaves.get(id(perfil))
+    if chave_antiga is not None and self.__usuarios[self.__indice[chave_antiga]] is not perfil:
+      chave_antiga = None # id reaproveitado por outro objeto
+
+    if chave in self.__indice: # substitui o perfil cadastrado com o mesmo nome
+      posicao = self.__indice[chave]
+      del self.__chaves[id(self.__usuarios[posicao])]
+    elif chave_antiga is not None: # perfil renomeado
+      posicao = self.__indice.pop(chave_antiga)
     else:
       raise UNCException(perfil.get_usuario())
 
+    self.__usuarios[posicao] = perfil
+    self.__indice[chave] = posicao
+    self.__chaves[id(perfil)] = chave
+
   def get_usuarios(self) -> List[Perfil]:
     """
-    Retorna a lista de todos os perfis cadastrados.
+    Retorna uma cópia da lista de todos os perfis cadastrados, em ordem de cadastro.
+    """
+    return list(self.__usuarios)
+
+  def iter_usuarios(self, cursor: int | None = None) -> Iterator[Tuple[int, Perfil]]:
+    """
+    Itera sobre os perfis em ordem de cadastro, sem copiar a lista.
+
+    Cada perfil vem com sua posição no cadastro, que não muda (atualizar mantém a
+    posição), e serve de cursor para retomar a listagem depois dele.
+    """
+    usuarios = self.__usuarios
+    posicao = 0 if cursor is None else cursor + 1
+    while posicao < len(usuarios):
+      yield posicao, usuarios[posicao]
+      posicao += 1
+
+  def ponto_de_corte(self) -> Tuple[int, int | None, int, int]:
+    """
+    Retorna o ponto de corte de uma exportação, sem copiar os perfis: o número de
+    perfis cadastrados, o cursor do último deles (veja iter_usuarios), um número de
+    sequência maior que o de todos os vínculos de seguidor (veja Perfil.iter_seguidos)
+    e o maior ID de tweet. Perfis, vínculos e tweets criados depois ficam além desses
+    valores.
+    """
+    usuarios = self.__usuarios
+    maior_id = 0
+    for perfil in usuarios:
+      ultimo = next(perfil.iter_tweets(), None)
+      if ultimo is not None and ultimo.get_id() > maior_id:
+        maior_id = ultimo.get_id()
+    return len(usuarios), len(usuarios) - 1 if usuarios else None, proxima_sequencia(), maior_id
+
+  # Carregamento sob demanda. No repositório em memória todos os perfis já estão
+  # carregados; repositórios preguiçosos materializam perfis no primeiro acesso.
+
+  def get_usuarios_carregados(self) -> List[Perfil]:
+    """
+    Retorna os perfis já carregados em memória (aqui, todos os cadastrados).
+    """
+    return list(self.__usuarios)
+
+  def set_ao_carregar(self, callback: Callable[[Perfil], None]) -> None:
+    """
+    Define a função chamada sempre que um perfil for carregado sob demanda.
+    """
+
+  def iter_usuarios_persistidos(self) -> Iterator[Perfil]:
+    """
+    Itera sobre os perfis mantidos apenas no armazenamento, que não estão em
+    get_usuarios_carregados nem passam por set_ao_carregar (aqui, nenhum). O
+    MyTwitter os inclui nos seus índices na abertura.
+    """
+    return iter(())
+
+  def iter_tweets_persistidos(self) -> Iterator[Tweet]:
+    """
+    Itera sobre os tweets dos perfis de iter_usuarios_persistidos (aqui, nenhum),
+    para que o MyTwitter monte na abertura os índices de busca, hashtags e menções.
+    """
+    return iter(())
+
+  def buscar_tweet(self, tweet_id: int) -> Tweet | None:
+    """
+    Busca um tweet que ainda não esteja em memória, carregando seu autor se preciso.
+    Aqui todos os tweets já estão carregados, então retorna None.
+    """
+    return None
+
+  @contextmanager
+  def lote(self) -> Iterator[None]:
+    """
+    Agrupa muitas alterações (por exemplo, uma importação em massa). No repositório
+    em memória não há nada a agrupar; repositórios em disco podem usar uma única transação.
+    """
+    yield
+
+  def precisa_compactar(self) -> bool:
+    """
+    Indica se o repositório acumulou alterações suficientes para ser compactado.
+    O repositório em memória não tem o que compactar.
+    """
+    return False
+
+  def compactar(self) -> None:
+    """
+    Compacta o armazenamento do repositório. Quem chama deve impedir escritas
+    concorrentes (MyTwitter compacta com todas as travas).
+    """
+
+  # Eventos do grafo e dos tweets. O repositório em memória não precisa fazer nada,
+  # pois os perfis já foram alterados; repositórios persistentes os registram.
+
+  def registrar_tweet(self, perfil: Perfil, tweet: Tweet) -> None:
+    """
+    Registra um tweet publicado por um perfil cadastrado.
+    """
+
+  def registrar_seguir(self, seguidor: Perfil, seguido: Perfil) -> None:
+    """
+    Registra que um perfil passou a seguir outro.
+    """
+
+  def registrar_deixar_de_seguir(self, seguidor: Perfil, seguido: Perfil) -> None:
+    """
+    Registra que um perfil deixou de seguir outro.
+    """
+
+  def registrar_bloqueio(self, perfil: Perfil, bloqueado: Perfil) -> None:
+    """
+    Registra que um perfil bloqueou outro.
     """
-    return self.__usuarios
\ No newline at end of file
@@ -0,0 +1,428 @@
+from __future__ import annotations
+import sqlite3
+import weakref
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+from .perfis import Perfil, PessoaFisica, PessoaJuridica
+from .repositorio import RepositorioUsuarios, chave_usuario
+from .tweet import Tweet
+from exceptions import UJCException, UNCException
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS perfis (
+    id INTEGER PRIMARY KEY,
+    usuario TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    documento TEXT,
+    ativo INTEGER NOT NULL DEFAULT 1
+);
+CREATE UNIQUE INDEX IF NOT EXISTS perfis_chave ON perfis (chave);
+
+CREATE TABLE IF NOT EXISTS tweets (
+    id INTEGER PRIMARY KEY,
+    autor INTEGER NOT NULL REFERENCES perfis (id),
+    mensagem TEXT NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+DROP INDEX IF EXISTS tweets_autor;
+CREATE INDEX IF NOT EXISTS tweets_autor_id ON tweets (autor, id);
+
+CREATE TABLE IF NOT EXISTS seguidores (
+    seguidor INTEGER NOT NULL REFERENCES perfis (id),
+    seguido INTEGER NOT NULL REFERENCES perfis (id),
+    PRIMARY KEY (seguidor, seguido)
+);
+-- índices de uma coluna guardam o rowid logo depois dela: seguidores e seguidos de um
+-- perfil saem em ordem de inserção, e as páginas retomam de um rowid sem ordenar nada
+DROP INDEX IF EXISTS seguidores_seguido;
+CREATE INDEX IF NOT EXISTS seguidores_por_seguido ON seguidores (seguido);
+CREATE INDEX IF NOT EXISTS seguidores_por_seguidor ON seguidores (seguidor);
+
+CREATE TABLE IF NOT EXISTS bloqueios (
+    usuario INTEGER NOT NULL REFERENCES perfis (id),
+    bloqueado INTEGER NOT NULL REFERENCES perfis (id),
+    PRIMARY KEY (usuario, bloqueado)
+);
+"""
+
+COLUNAS_PERFIL = 'p.id, p.usuario, p.tipo, p.documento, p.ativo'
+COLUNAS_TWEET = 'p.usuario, t.mensagem, t.id, t.timestamp' # na ordem de Tweet.restaurar
+
+
+class PerfilSQLiteMixin:
+    """
+    Comportamento comum dos perfis lidos do RepositorioUsuariosSQLite.
+
+    Só os dados cadastrais ficam no objeto; tweets, vínculos e contadores são
+    consultados no banco, e as alterações são gravadas imediatamente. Os métodos
+    têm a mesma assinatura dos de Perfil.
+    """
+
+    def _vincular(self, repositorio: RepositorioUsuariosSQLite, id: int, ativo: bool) -> None:
+        """
+        Associa o perfil à sua linha no banco.
+        """
+        self._repositorio = repositorio
+        self._id = id
+        self._ativo = ativo
+
+    def __consulta(self, sql: str, *parametros) -> sqlite3.Cursor:
+        return self._repositorio.executar(sql, parametros)
+
+    def __contar(self, sql: str) -> int:
+        return self.__consulta(sql, self._id).fetchone()[0]
+
+    def add_tweet(self, tweet: Tweet) -> None:
+        self.__consulta('INSERT INTO tweets (id, autor, mensagem, timestamp) VALUES (?, ?, ?, ?)',
+                        tweet.get_id(), self._id, tweet.get_mensagem(), tweet.get_timestamp())
+
+    def add_tweets(self, tweets: List[Tweet]) -> None:
+        self._repositorio.executar_varios('INSERT INTO tweets (id, autor, mensagem, timestamp) VALUES (?, ?, ?, ?)',
+                                          [(tweet.get_id(), self._id, tweet.get_mensagem(), tweet.get_timestamp())
+                                           for tweet in tweets])
+
+    def set_tweetstore(self, store) -> None:
+        """
+        Os tweets ficam no banco; o armazenamento colunar não é usado.
+        """
+
+    def add_seguidos(self, perfil: Perfil) -> None:
+        self.__consulta('INSERT OR IGNORE INTO seguidores (seguidor, seguido) VALUES (?, ?)', self._id, perfil._id)
+
+    def add_seguidor(self, perfil: Perfil) -> None:
+        self.__consulta('INSERT OR IGNORE INTO seguidores (seguidor, seguido) VALUES (?, ?)', perfil._id, self._id)
+
+    def remove_seguidos(self, perfil: Perfil) -> None:
+        self.__consulta('DELETE FROM seguidores WHERE seguidor = ? AND seguido = ?', self._id, perfil._id)
+
+    def remove_seguidor(self, perfil: Perfil) -> None:
+        self.__consulta('DELETE FROM seguidores WHERE seguidor = ? AND seguido = ?', perfil._id, self._id)
+
+    def add_bloqueado(self, perfil: Perfil) -> None:
+        self.__consulta('INSERT OR IGNORE INTO bloqueios (usuario, bloqueado) VALUES (?, ?)', self._id, perfil._id)
+
+    def bloqueou(self, perfil: Perfil) -> bool:
+        return self.__consulta('SELECT 1 FROM bloqueios WHERE usuario = ? AND bloqueado = ?',
+                               self._id, perfil._id).fetchone() is not None
+
+    def segue(self, perfil: Perfil) -> bool:
+        return self.__consulta('SELECT 1 FROM seguidores WHERE seguidor = ? AND seguido = ?',
+                               self._id, perfil._id).fetchone() is not None
+
+    def is_seguido_por(self, perfil: Perfil) -> bool:
+        return perfil.segue(self)
+
+    def get_tweet(self, id: int) -> Tweet | None:
+        linha = self.__consulta(f'SELECT {COLUNAS_TWEET} FROM tweets t JOIN perfis p ON p.id = t.autor '
+                                'WHERE t.id = ? AND t.autor = ?', id, self._id).fetchone()
+        return None if linha is None else Tweet.restaurar(*linha)
+
+    def get_tweets(self) -> List[Tweet]:
+        return list(self.iter_tweets())
+
+    def iter_tweets(self, before_id: int | None = None) -> Iterator[Tweet]:
+        cursor = self.__consulta(f'SELECT {COLUNAS_TWEET} FROM tweets t JOIN perfis p ON p.id = t.autor '
+                                 'WHERE t.autor = ? AND t.id < ? ORDER BY t.id DESC',
+                                 self._id, 2**63 - 1 if before_id is None else before_id)
+        return (Tweet.restaurar(*linha) for linha in cursor)
+
+    def get_timeline(self, limit: int | None = None, before_id: int | None = None) -> List[Tweet]:
+        """
+        Retorna a timeline do perfil em uma única consulta, usando o índice (autor, id).
+
+        O SQLite percorre o índice autor a autor (o IN sobre o primeiro campo) e, com
+        LIMIT, ordena só o topo e para de ler cada autor quando as próximas linhas não
+        entram mais na página: o custo acompanha limit × seguidos, e não o total de
+        tweets dos seguidos. Isso equivale a mesclar um cursor por seguido, mas em uma
+        consulta só (testado em test_timeline_le_apenas_a_pagina).
+        """
+        cursor = self.__consulta(
+            f'SELECT {COLUNAS_TWEET} FROM tweets t JOIN perfis p ON p.id = t.autor '
+            'WHERE t.autor IN (SELECT seguido FROM seguidores WHERE seguidor = ?1 UNION ALL SELECT ?1) '
+            'AND t.id < ?2 ORDER BY t.id DESC LIMIT ?3',
+            self._id, 2**63 - 1 if before_id is None else before_id, -1 if limit is None else limit)
+        return [Tweet.restaurar(*linha) for linha in cursor]
+
+    def set_usuario(self, usuario) -> None:
+        super().set_usuario(usuario)
+        self.__consulta('UPDATE perfis SET usuario = ?, chave = ? WHERE id = ?', usuario, chave_usuario(usuario), self._id)
+
+    def set_ativo(self) -> None:
+        self.__consulta('UPDATE perfis SET ativo = 1 WHERE id = ?', self._id)
+        self._ativo = True
+
+    def set_inativo(self) -> None:
+        self.__consulta('UPDATE perfis SET ativo = 0 WHERE id = ?', self._id)
+        self._ativo = False
+
+    def is_ativo(self) -> bool:
+        return self._ativo
+
+    def get_numero_seguidores(self):
+        return self.__contar('SELECT COUNT(*) FROM seguidores WHERE seguido = ?')
+
+    def get_num_tweets(self) -> int:
+        return self.__contar('SELECT COUNT(*) FROM tweets WHERE autor = ?')
+
+    def get_num_seguidores_ativos(self) -> int:
+        return self.__contar('SELECT COUNT(*) FROM seguidores s JOIN perfis p ON p.id = s.seguidor '
+                             'WHERE s.seguido = ? AND p.ativo')
+
+    def get_num_seguidos_ativos(self) -> int:
+        return self.__contar('SELECT COUNT(*) FROM seguidores s JOIN perfis p ON p.id = s.seguido '
+                             'WHERE s.seguidor = ? AND p.ativo')
+
+    def ajustar_seguidores_ativos(self, delta: int) -> None:
+        """
+        Os contadores são calculados pelo banco; não há nada a ajustar.
+        """
+
+    def ajustar_seguidos_ativos(self, delta: int) -> None:
+        """
+        Os contadores são calculados pelo banco; não há nada a ajustar.
+        """
+
+    def get_seguidores(self) -> List[Perfil]:
+        return self._repositorio.consultar_perfis(
+            f'SELECT {COLUNAS_PERFIL} FROM seguidores s JOIN perfis p ON p.id = s.seguidor '
+            'WHERE s.seguido = ? ORDER BY s.rowid', self._id)
+
+    def get_seguidos(self) -> List[Perfil]:
+        return self._repositorio.consultar_perfis(
+            f'SELECT {COLUNAS_PERFIL} FROM seguidores s JOIN perfis p ON p.id = s.seguido '
+            'WHERE s.seguidor = ? ORDER BY s.rowid', self._id)
+
+    def iter_seguidores(self, cursor: int | None = None) -> Iterator[Tuple[int, Perfil]]:
+        """
+        Itera sobre os seguidores em ordem de inserção; o cursor é o rowid do vínculo.
+        """
+        return self._repositorio.iterar_perfis(
+            f'SELECT s.rowid, {COLUNAS_PERFIL} FROM seguidores s JOIN perfis p ON p.id = s.seguidor '
+            'WHERE s.seguido = ? AND s.rowid > ? ORDER BY s.rowid', self._id, -1 if cursor is None else cursor)
+
+    def iter_seguidos(self, cursor: int | None = None) -> Iterator[Tuple[int, Perfil]]:
+        """
+        Itera sobre os perfis seguidos em ordem de inserção; o cursor é o rowid do vínculo.
+        """
+        return self._repositorio.iterar_perfis(
+            f'SELECT s.rowid, {COLUNAS_PERFIL} FROM seguidores s JOIN perfis p ON p.id = s.seguido '
+            'WHERE s.seguidor = ? AND s.rowid > ? ORDER BY s.rowid', self._id, -1 if cursor is None else cursor)
+
+    def get_bloqueados(self) -> List[Perfil]:
+        return self._repositorio.consultar_perfis(
+            f'SELECT {COLUNAS_PERFIL} FROM bloqueios b JOIN perfis p ON p.id = b.bloqueado '
+            'WHERE b.usuario = ? ORDER BY b.rowid', self._id)
+
+
+class PerfilSQLite(PerfilSQLiteMixin, Perfil):
+    """
+    Perfil armazenado no RepositorioUsuariosSQLite.
+    """
+
+
+class PessoaFisicaSQLite(PerfilSQLiteMixin, PessoaFisica):
+    """
+    Perfil de Pessoa Física armazenado no RepositorioUsuariosSQLite.
+    """
+
+
+class PessoaJuridicaSQLite(PerfilSQLiteMixin, PessoaJuridica):
+    """
+    Perfil de Pessoa Jurídica armazenado no RepositorioUsuariosSQLite.
+    """
+
+
+class RepositorioUsuariosSQLite(RepositorioUsuarios):
+    """
+    Repositório de usuários armazenado em um banco SQLite.
+
+    Pode substituir o RepositorioUsuarios: buscar() devolve perfis cujos tweets,
+    vínculos e contadores são consultados no banco (tabelas indexadas de perfis,
+    tweets e seguidores), então a timeline, os seguidores e os seguidos de um
+    usuário são consultas únicas e o volume de dados não fica limitado à memória.
+    Enquanto um perfil estiver em uso, buscas pelo mesmo usuário devolvem o mesmo
+    objeto.
+
+    Exemplo de uso:
+        repositorio = RepositorioUsuariosSQLite('dados/mytwitter.db')
+        twitter = MyTwitter(repositorio=repositorio)
+        ...
+        repositorio.fechar()
+    """
+
+    TIPOS = {'Perfil': PerfilSQLite, 'PessoaFisica': PessoaFisicaSQLite, 'PessoaJuridica': PessoaJuridicaSQLite}
+
+    def __init__(self, caminho: str = ':memory:'):
+        """
+        Abre (ou cria) o banco de dados.
+
+        Cada alteração é gravada em sua própria transação; o journal em modo WAL
+        evita um fsync por escrita. A conexão pode ser usada por outra thread (por
+        exemplo, a do AsyncMyTwitter), desde que uma de cada vez.
+
+        :param caminho: Caminho do arquivo do banco (':memory:' para um banco temporário).
+        """
+        super().__init__()
+        self.__conexao = sqlite3.connect(caminho, isolation_level=None, check_same_thread=False)
+        self.__conexao.execute('PRAGMA journal_mode = WAL')
+        self.__conexao.execute('PRAGMA synchronous = NORMAL')
+        self.__conexao.executescript(ESQUEMA)
+        self.__perfis = weakref.WeakValueDictionary()
+
+    def executar(self, sql: str, parametros=()) -> sqlite3.Cursor:
+        """
+        Executa um comando SQL na conexão do repositório.
+        """
+        return self.__conexao.execute(sql, parametros)
+
+    def executar_varios(self, sql: str, parametros) -> sqlite3.Cursor:
+        """
+        Executa um comando SQL para cada conjunto de parâmetros.
+        """
+        return self.__conexao.executemany(sql, parametros)
+
+    def consultar_perfis(self, sql: str, *parametros) -> List[Perfil]:
+        """
+        Executa uma consulta que retorna as colunas COLUNAS_PERFIL e devolve os perfis.
+        """
+        return [self.__perfil(*linha) for linha in self.__conexao.execute(sql, parametros)]
+
+    def iterar_perfis(self, sql: str, *parametros) -> Iterator[Tuple[int, Perfil]]:
+        """
+        Executa uma consulta que retorna um cursor seguido das colunas COLUNAS_PERFIL e
+        devolve os pares (cursor, perfil) à medida que as linhas são lidas.
+        """
+        return ((linha[0], self.__perfil(*linha[1:])) for linha in self.__conexao.execute(sql, parametros))
+
+    def cadastrar(self, usuario: Perfil) -> None:
+        """
+        Cadastra um novo usuário no banco.
+
+        Raise:
+            UJCException: Se o usuário já estiver cadastrado.
+        """
+        tipo, documento = self.__tipo_documento(usuario)
+        try:
+            self.__conexao.execute('INSERT INTO perfis (usuario, chave, tipo, documento, ativo) VALUES (?, ?, ?, ?, ?)',
+                                   (usuario.get_usuario(), chave_usuario(usuario.get_usuario()), tipo, documento,
+                                    usuario.is_ativo()))
+        except sqlite3.IntegrityError:
+            raise UJCException(usuario) from None
+
+    def buscar(self, usuario: str) -> Perfil | None:
+        """
+        Busca um usuário pelo nome de usuário (Case Insensitive).
+        """
+        perfis = self.consultar_perfis(f'SELECT {COLUNAS_PERFIL} FROM perfis p WHERE p.chave = ?', chave_usuario(usuario))
+        return perfis[0] if perfis else None
+
+    def atualizar(self, perfil: Perfil) -> None:
+        """
+        Grava os dados cadastrais de um perfil.
+
+        raise:
+            UNCException: Se o usuário não estiver cadastrado.
+        """
+        tipo, documento = self.__tipo_documento(perfil)
+        cursor = self.__conexao.execute('UPDATE perfis SET usuario = ?, tipo = ?, documento = ?, ativo = ? WHERE chave = ?',
+                                        (perfil.get_usuario(), tipo, documento, perfil.is_ativo(),
+                                         chave_usuario(perfil.get_usuario())))
+        if cursor.rowcount == 0:
+            raise UNCException(perfil.get_usuario())
+
+    def get_usuarios(self) -> List[Perfil]:
+        """
+        Retorna a lista de todos os perfis cadastrados, em ordem de cadastro.
+        """
+        return self.consultar_perfis(f'SELECT {COLUNAS_PERFIL} FROM perfis p ORDER BY p.id')
+
+    def iter_usuarios(self, cursor: int | None = None) -> Iterator[Tuple[int, Perfil]]:
+        """
+        Itera sobre os perfis em ordem de cadastro, lendo do banco à medida que a
+        iteração avança; o cursor é o id do perfil.
+        """
+        return self.iterar_perfis(f'SELECT p.id, {COLUNAS_PERFIL} FROM perfis p WHERE p.id > ? ORDER BY p.id',
+                                  -1 if cursor is None else cursor)
+
+    def ponto_de_corte(self) -> Tuple[int, int | None, int, int]:
+        """
+        Lê o ponto de corte no banco: os cursores são o id do perfil e o rowid do vínculo.
+
+        Um vínculo criado depois do corte só fica abaixo dele se o SQLite reaproveitar o
+        rowid do último vínculo, removido depois do corte.
+        """
+        return self.__conexao.execute(
+            'SELECT (SELECT COUNT(*) FROM perfis), (SELECT MAX(id) FROM perfis), '
+            '(SELECT IFNULL(MAX(rowid), 0) + 1 FROM seguidores), (SELECT IFNULL(MAX(id), 0) FROM tweets)').fetchone()
+
+    def get_usuarios_carregados(self) -> List[Perfil]:
+        """
+        Nenhum perfil é mantido em memória pelo repositório.
+        """
+        return []
+
+    def iter_usuarios_persistidos(self) -> Iterator[Perfil]:
+        """
+        Itera sobre todos os perfis do banco, em ordem de cadastro.
+        """
+        return (perfil for _, perfil in self.iter_usuarios())
+
+    def iter_tweets_persistidos(self) -> Iterator[Tweet]:
+        """
+        Itera sobre todos os tweets do banco, em ordem de ID, lendo-os à medida que a
+        iteração avança.
+        """
+        cursor = self.__conexao.execute(f'SELECT {COLUNAS_TWEET} FROM tweets t JOIN perfis p ON p.id = t.autor '
+                                        'ORDER BY t.id')
+        return (Tweet.restaurar(*linha) for linha in cursor)
+
+    def buscar_tweet(self, tweet_id: int) -> Tweet | None:
+        """
+        Busca um tweet pelo ID.
+        """
+        linha = self.__conexao.execute(f'SELECT {COLUNAS_TWEET} FROM tweets t JOIN perfis p ON p.id = t.autor '
+                                       'WHERE t.id = ?', (tweet_id,)).fetchone()
+        return None if linha is None else Tweet.restaurar(*linha)
+
+    @contextmanager
+    def lote(self) -> Iterator[None]:
+        """
+        Executa as alterações do bloco em uma única transação (desfeita em caso de erro).
+        """
+        self.__conexao.execute('BEGIN')
+        try:
+            yield
+        except BaseException:
+            self.__conexao.execute('ROLLBACK')
+            raise
+        self.__conexao.execute('COMMIT')
+
+    def fechar(self) -> None:
+        """
+        Fecha a conexão com o banco.
+        """
+        self.__conexao.close()
+
+    def __perfil(self, id: int, usuario: str, tipo: str, documento: str | None, ativo: int) -> Perfil:
+        """
+        Devolve o objeto do perfil da linha informada, reaproveitando o que estiver em uso.
+        """
+        perfil = self.__perfis.get(id)
+        if perfil is None:
+            classe = self.TIPOS[tipo]
+            perfil = classe(usuario) if documento is None else classe(usuario, documento)
+            perfil._vincular(self, id, bool(ativo))
+            self.__perfis[id] = perfil
+        return perfil
+
+    @staticmethod
+    def __tipo_documento(perfil: Perfil):
+        """
+        Retorna o tipo do perfil e seu documento (CPF, CNPJ ou None).
+        """
+        if isinstance(perfil, PessoaFisica):
+            return 'PessoaFisica', perfil.get_cpf()
+        if isinstance(perfil, PessoaJuridica):
+            return 'PessoaJuridica', perfil.get_cnpj()
+        return 'Perfil', None
@@ -0,0 +1,130 @@
+"""
+Servidor de linha (JSON por linha) sobre o AsyncMyTwitter, usando streams do asyncio.
+
+Cada requisição é um objeto JSON em uma linha, com a operação e seus argumentos
+posicionais; a resposta é uma linha JSON com o resultado ou o erro:
+
+    -> {"op": "tweetar", "args": ["ana", "oi"]}
+    <- {"ok": true, "resultado": {"id": 1, "usuario": "ana", "mensagem": "oi", "timestamp": ...}}
+    -> {"op": "seguir", "args": ["ana", "ana"]}
+    <- {"ok": false, "erro": "SIException", "mensagem": "..."}
+
+Em criar_perfil, o argumento é um objeto {"usuario", "tipo", "documento"}. Tweets
+são devolvidos como objetos e perfis pelo nome de usuário; listagens paginadas
+(seguidores, seguidos, usuarios_cadastrados) vêm como {"itens": [...], "cursor": ...},
+e o cursor é passado de volta como argumento para obter a próxima página.
+
+Uso:
+    python -m classes.servidor [porta]
+"""
+import asyncio
+import json
+import sys
+from .assincrono import AsyncMyTwitter
+from .importacao import ler_perfil
+from .paginacao import Pagina
+from .perfis import Perfil
+
+OPERACOES = {
+    'existe_usuario', 'criar_perfil', 'cancelar_perfil', 'tweetar', 'timeline', 'tweets', 'get_tweet',
+    'get_tweets_by_ids', 'seguir', 'deixar_de_seguir', 'bloquear', 'numero_seguidores', 'perfil_stats',
+    'seguidores', 'seguidos', 'usuarios_cadastrados', 'get_instance_perfil',
+}
+
+def serializar(valor):
+    """
+    Converte o resultado de uma operação em um valor JSON.
+    """
+    if isinstance(valor, Perfil):
+        return valor.get_usuario()
+    if isinstance(valor, Pagina):
+        return {'itens': [serializar(item) for item in valor], 'cursor': valor.cursor}
+    if isinstance(valor, (list, tuple)):
+        return [serializar(item) for item in valor]
+    if hasattr(valor, 'get_mensagem'): # Tweet ou TweetView
+        return {'id': valor.get_id(), 'usuario': valor.get_usuario(), 'mensagem': valor.get_mensagem(),
+                'timestamp': valor.get_timestamp()}
+    return valor
+
+async def responder(twitter: AsyncMyTwitter, linha: bytes) -> dict:
+    """
+    Executa a requisição de uma linha e monta a resposta.
+    """
+    try:
+        requisicao = json.loads(linha)
+        operacao, args = requisicao['op'], requisicao.get('args', [])
+        if operacao not in OPERACOES:
+            raise ValueError(f"Operação '{operacao}' inexistente")
+        if operacao == 'criar_perfil':
+            args = [ler_perfil(args[0])]
+        resultado = await getattr(twitter, operacao)(*args)
+    except Exception as erro:
+        return {'ok': False, 'erro': type(erro).__name__, 'mensagem': str(erro)}
+    return {'ok': True, 'resultado': serializar(resultado)}
+
+async def atender(twitter: AsyncMyTwitter, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+    """
+    Atende uma conexão, respondendo às requisições na ordem em que chegam.
+
+    Uma linha maior que o limite do leitor recebe uma resposta de erro e encerra a
+    conexão, já que o restante dela não pode mais ser delimitado com segurança.
+    """
+    try:
+        while True:
+            try:
+                linha = await leitor.readline()
+            except (ValueError, asyncio.LimitOverrunError) as erro:
+                await enviar(escritor, {'ok': False, 'erro': 'LimitOverrunError', 'mensagem': str(erro)})
+                await descartar_entrada(leitor, escritor)
+                break
+            if not linha:
+                break
+            if not linha.strip():
+                continue
+            await enviar(escritor, await responder(twitter, linha))
+    except ConnectionError:
+        pass
+    finally:
+        escritor.close()
+
+async def descartar_entrada(leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter,
+                            espera: float = 1.0) -> None:
+    """
+    Encerra o envio e descarta o que o cliente ainda mandar, por até `espera` segundos.
+
+    Fechar o socket com dados não lidos faz o sistema responder com RST, e o cliente
+    pode perder a resposta de erro que acabou de ser enviada.
+    """
+    escritor.write_eof()
+    try:
+        async with asyncio.timeout(espera):
+            while await leitor.read(2**16):
+                pass
+    except (TimeoutError, ValueError):
+        pass
+
+async def enviar(escritor: asyncio.StreamWriter, resposta: dict) -> None:
+    """
+    Escreve uma resposta como uma linha JSON.
+    """
+    escritor.write(json.dumps(resposta, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+    await escritor.drain()
+
+async def servir(twitter: AsyncMyTwitter, host: str = '127.0.0.1', porta: int = 8765) -> asyncio.Server:
+    """
+    Inicia o servidor (porta 0 escolhe uma porta livre).
+
+    :return: Servidor do asyncio, já aceitando conexões.
+    """
+    return await asyncio.start_server(lambda leitor, escritor: atender(twitter, leitor, escritor), host, porta,
+                                      limit=2**16)
+
+async def main():
+    porta = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    servidor = await servir(AsyncMyTwitter(), porta=porta)
+    print(f"MyTwitter ouvindo em {servidor.sockets[0].getsockname()}")
+    async with servidor:
+        await servidor.serve_forever()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,456 @@
+"""
+Implantação particionada (sharding) do MyTwitter em vários processos.
+
+Cada shard é um processo com seu próprio MyTwitter, dono dos perfis cujo nome
+normalizado cai nele pelo hash (crc32, estável entre processos). O roteador,
+MyTwitterShardeado, implementa a API do MyTwitter e conversa com os shards por
+pipes do multiprocessing.
+
+Vínculos entre shards (seguir e bloquear) são aplicados nos dois lados: cada
+shard mantém uma réplica mínima (sem tweets) dos perfis remotos com que seus
+perfis se relacionam, de modo que a validação e os contadores continuam sendo os
+do próprio MyTwitter. Consultas que envolvem vários shards (timeline,
+get_tweets_by_ids, usuarios_cadastrados) são feitas por scatter-gather.
+"""
+import multiprocessing
+import threading
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+from .armazenamento import criar_perfil, serializar_perfil
+from .concorrencia import TravasPerfis
+from .mytwitter import MyTwitter
+from .paginacao import Pagina, paginar
+from .perfis import Perfil
+from .repositorio import RepositorioUsuarios, chave_usuario
+from .timeline import mesclar_timelines
+from .tweet import Tweet, GeradorSnowflake
+from exceptions import TIException
+
+# Operações do MyTwitter executadas sem adaptação no shard dono do perfil
+DIRETAS = {
+    'existe_usuario', 'criar_perfil', 'tweets', 'seguir', 'deixar_de_seguir', 'bloquear',
+    'numero_seguidores', 'perfil_stats', 'get_instance_perfil', 'get_tweet', 'get_tweets_by_ids',
+}
+# Itens pedidos por vez aos shards pelos iteradores (iter_seguidores, iter_seguidos, ...)
+TAMANHO_PAGINA = 1000
+
+def shard_de(usuario: str, quantidade: int) -> int:
+    """
+    Retorna o shard dono de um usuário (o mesmo em qualquer processo).
+    """
+    return zlib.crc32(chave_usuario(usuario).encode('utf-8')) % quantidade
+
+def shard_do_tweet(tweet_id: int) -> int:
+    """
+    Retorna o shard que gerou um tweet: o worker_id do seu ID Snowflake.
+    """
+    return (tweet_id >> GeradorSnowflake.BITS_SEQUENCIA) & ((1 << GeradorSnowflake.BITS_WORKER) - 1)
+
+class Shard:
+    """
+    Estado de um shard, vivo dentro do processo worker.
+
+    Guarda o MyTwitter do shard e seu repositório, que contém os perfis próprios
+    e as réplicas dos perfis remotos ligados a eles. Os IDs dos tweets vêm de um
+    GeradorSnowflake com o índice do shard como worker_id.
+    """
+
+    def __init__(self, indice: int, quantidade: int):
+        self.__indice = indice
+        self.__quantidade = quantidade
+        self.__repositorio = RepositorioUsuarios()
+        self.__twitter = MyTwitter(repositorio=self.__repositorio)
+        self.__gerador = GeradorSnowflake(worker_id=indice)
+
+    def executar(self, operacao: str, args: tuple):
+        """
+        Executa uma operação recebida do roteador.
+        """
+        if operacao in DIRETAS:
+            return getattr(self.__twitter, operacao)(*args)
+        return getattr(self, operacao)(*args)
+
+    def __proprio(self, perfil: Perfil) -> bool:
+        return shard_de(perfil.get_usuario(), self.__quantidade) == self.__indice
+
+    def replicar(self, usuario: str, ativo: bool) -> None:
+        """
+        Garante a réplica de um perfil remoto, com o mesmo estado (ativo ou não).
+        """
+        if self.__repositorio.buscar(usuario) is None:
+            self.__twitter.criar_perfil(Perfil(usuario))
+            if not ativo:
+                self.__twitter.cancelar_perfil(usuario)
+
+    def cancelar_perfil(self, usuario: str) -> None:
+        """
+        Desativa um perfil próprio ou sua réplica; réplicas ausentes são ignoradas.
+        """
+        perfil = self.__repositorio.buscar(usuario)
+        if perfil is None and shard_de(usuario, self.__quantidade) != self.__indice:
+            return
+        self.__twitter.cancelar_perfil(usuario)
+
+    def estado(self, usuario: str) -> bool | None:
+        """
+        Retorna se um perfil está ativo (None se não existir).
+        """
+        perfil = self.__repositorio.buscar(usuario)
+        return None if perfil is None else perfil.is_ativo()
+
+    def tweetar(self, usuario: str, mensagem: str) -> Tweet:
+        return self.__twitter.tweetar(usuario, mensagem, self.__gerador)
+
+    def tweetar_lote(self, pares: List[Tuple[str, str]]) -> List:
+        """
+        Publica vários tweets; cada item é o tweet ou o erro (classe, mensagem).
+        """
+        resultados = []
+        for usuario, mensagem in pares:
+            try:
+                resultados.append(self.__twitter.tweetar(usuario, mensagem, self.__gerador))
+            except Exception as erro:
+                resultados.append((type(erro), str(erro)))
+        return resultados
+
+    def timeline(self, usuario: str, limit: int | None, before_id: int | None) -> Tuple[List[Tweet], List[str]]:
+        """
+        Retorna a parte local da timeline e os seguidos ativos de outros shards.
+        """
+        locais = self.__twitter.timeline(usuario, limit, before_id)
+        remotos = [perfil.get_usuario() for perfil in self.__twitter.seguidos(usuario) if not self.__proprio(perfil)]
+        return locais, remotos
+
+    def tweets_de(self, autores: List[str], limit: int | None, before_id: int | None) -> List[Tweet]:
+        """
+        Mescla os tweets mais recentes de autores próprios do shard.
+        """
+        perfis = [self.__repositorio.buscar(autor) for autor in autores]
+        return mesclar_timelines((perfil.iter_tweets(before_id) for perfil in perfis), limit)
+
+    def seguidores(self, usuario: str, limit: int | None, cursor: int | None) -> Pagina[str]:
+        pagina = self.__twitter.seguidores(usuario, limit, cursor)
+        return Pagina((perfil.get_usuario() for perfil in pagina), pagina.cursor)
+
+    def seguidos(self, usuario: str, limit: int | None, cursor: int | None) -> Pagina[str]:
+        pagina = self.__twitter.seguidos(usuario, limit, cursor)
+        return Pagina((perfil.get_usuario() for perfil in pagina), pagina.cursor)
+
+    def dados(self, usuarios: List[str]) -> List[Dict]:
+        """
+        Retorna os dados cadastrais de perfis próprios (sem tweets e sem grafo).
+        """
+        return [serializar_perfil(self.__repositorio.buscar(usuario)) for usuario in usuarios]
+
+    def usuarios_cadastrados(self, limit: int | None, cursor: int | None) -> Pagina[str]:
+        """
+        Lista os perfis próprios do shard, sem as réplicas.
+        """
+        pares = ((chave, perfil.get_usuario() if perfil.is_ativo() else f"{perfil.get_usuario()} (inativo)")
+                 for chave, perfil in self.__repositorio.iter_usuarios(cursor) if self.__proprio(perfil))
+        return paginar(pares, limit, cursor)
+
+def servir_shard(conexao, indice: int, quantidade: int) -> None:
+    """
+    Laço do processo worker: executa as operações recebidas até receber None.
+
+    Exceções voltam como (classe, mensagem), pois as exceções do projeto não
+    podem ser recriadas pelo pickle a partir da mensagem.
+    """
+    shard = Shard(indice, quantidade)
+    while (pedido := conexao.recv()) is not None:
+        operacao, args = pedido
+        try:
+            conexao.send((True, shard.executar(operacao, args)))
+        except Exception as erro:
+            conexao.send((False, (type(erro), str(erro))))
+    conexao.close()
+
+def recriar_erro(erro: Tuple[type, str]) -> Exception:
+    """
+    Recria uma exceção recebida de um shard, com a mesma classe e mensagem.
+    """
+    classe, mensagem = erro
+    excecao = classe.__new__(classe)
+    excecao.args = (mensagem,)
+    return excecao
+
+class MyTwitterShardeado:
+    """
+    Roteador com a API do MyTwitter sobre perfis particionados entre processos.
+
+    Cada shard roda em seu próprio processo, então operações sobre perfis de
+    shards diferentes (principalmente tweetar) não disputam o GIL. O roteador pode
+    ser usado por várias threads: as operações travam os perfis envolvidos, como
+    no MyTwitter, e cada pipe atende um pedido por vez. Para cargas de escrita,
+    tweetar_lote distribui um lote entre os shards de uma só vez.
+
+    Diferenças em relação ao MyTwitter:
+    - os IDs dos tweets são gerados pelos shards (Snowflake, com o índice do shard
+      como worker_id), e o gerador_id de tweetar é ignorado;
+    - seguidores e seguidos retornam cópias dos perfis, desligadas do grafo;
+    - usuarios_cadastrados lista os perfis agrupados por shard;
+    - bulk_load, export e o modo push não estão disponíveis.
+
+    Exemplo de uso:
+        twitter = MyTwitterShardeado(processos=4)
+        twitter.criar_perfil(Perfil("ana"))
+        twitter.tweetar("ana", "oi")
+        twitter.fechar()
+    """
+
+    def __init__(self, processos: int | None = None, travas: int = 64):
+        """
+        Inicia os processos dos shards.
+
+        :param processos: Número de shards (padrão: número de CPUs).
+        :param travas: Número de travas (stripes) distribuídas entre os perfis.
+        """
+        self.__quantidade = processos or multiprocessing.cpu_count()
+        self.__travas = TravasPerfis(travas)
+        self.__conexoes = []
+        self.__processos = []
+        for indice in range(self.__quantidade):
+            local, remota = multiprocessing.Pipe()
+            processo = multiprocessing.Process(target=servir_shard, args=(remota, indice, self.__quantidade),
+                                               name=f'mytwitter-shard-{indice}', daemon=True)
+            processo.start()
+            remota.close()
+            self.__conexoes.append(local)
+            self.__processos.append(processo)
+        self.__travas_conexoes = [threading.Lock() for _ in range(self.__quantidade)]
+
+    def __shard(self, usuario: str) -> int:
+        return shard_de(usuario.strip(), self.__quantidade)
+
+    def __pedir(self, indice: int, operacao: str, *args):
+        """
+        Executa uma operação em um shard e aguarda a resposta.
+        """
+        return self.__espalhar({indice: (operacao, args)})[indice]
+
+    def __espalhar(self, pedidos: Dict[int, Tuple[str, tuple]]) -> Dict:
+        """
+        Scatter-gather: envia um pedido a cada shard e só então lê as respostas, de
+        modo que os shards trabalham em paralelo. Levanta o erro do primeiro shard
+        que falhar.
+        """
+        indices = sorted(pedidos)
+        travas = [self.__travas_conexoes[indice] for indice in indices]
+        for trava in travas:
+            trava.acquire()
+        try:
+            for indice in indices:
+                self.__conexoes[indice].send(pedidos[indice])
+            respostas = {indice: self.__conexoes[indice].recv() for indice in indices}
+        finally:
+            for trava in reversed(travas):
+                trava.release()
+        for indice in indices:
+            ok, resultado = respostas[indice]
+            if not ok:
+                raise recriar_erro(resultado)
+        return {indice: resultado for indice, (ok, resultado) in respostas.items()}
+
+    def __agrupar(self, usuarios: Iterable[str]) -> Dict[int, List[str]]:
+        """
+        Agrupa nomes de usuário pelo shard dono.
+        """
+        grupos: Dict[int, List[str]] = {}
+        for usuario in usuarios:
+            grupos.setdefault(self.__shard(usuario), []).append(usuario)
+        return grupos
+
+    def __vincular(self, operacao: str, usuario: str, outro: str) -> None:
+        """
+        Aplica seguir, deixar_de_seguir ou bloquear nos shards dos dois perfis.
+
+        O shard de `usuario` valida primeiro (com a réplica de `outro`, se ele
+        existir); se aceitar, o shard de `outro` repete a operação com a réplica
+        de `usuario`, chegando ao mesmo resultado.
+        """
+        origem, destino = self.__shard(usuario), self.__shard(outro)
+        if origem == destino:
+            self.__pedir(origem, operacao, usuario, outro)
+            return
+        ativo = self.__pedir(destino, 'estado', outro)
+        if ativo is not None:
+            self.__pedir(origem, 'replicar', outro, ativo)
+        self.__pedir(origem, operacao, usuario, outro)
+        self.__pedir(destino, 'replicar', usuario, True)
+        self.__pedir(destino, operacao, usuario, outro)
+
+    def existe_usuario(self, usuario: str) -> bool:
+        return self.__pedir(self.__shard(usuario), 'existe_usuario', usuario)
+
+    def criar_perfil(self, perfil: Perfil) -> None:
+        usuario = perfil.get_usuario()
+        with self.__travas.travar(usuario.strip()):
+            self.__pedir(self.__shard(usuario), 'criar_perfil', perfil)
+
+    def cancelar_perfil(self, usuario: str) -> None:
+        """
+        Desativa o perfil no shard dono e depois suas réplicas nos demais shards.
+        """
+        with self.__travas.travar_todos():
+            dono = self.__shard(usuario)
+            self.__pedir(dono, 'cancelar_perfil', usuario)
+            self.__espalhar({indice: ('cancelar_perfil', (usuario,))
+                             for indice in range(self.__quantidade) if indice != dono})
+
+    def tweetar(self, usuario: str, mensagem: str, gerador_id=None) -> Tweet:
+        """
+        Publica um tweet no shard do usuário (o gerador_id é ignorado).
+        """
+        with self.__travas.travar(usuario):
+            return self.__pedir(self.__shard(usuario), 'tweetar', usuario, mensagem)
+
+    def tweetar_lote(self, pares: Iterable[Tuple[str, str]]) -> List:
+        """
+        Publica vários tweets, distribuindo o lote entre os shards em paralelo.
+
+        :param pares: Pares (usuario, mensagem).
+        :return: Para cada par, na ordem recebida, o tweet publicado ou a exceção
+            que o recusou (PIException, PDException, MFPException).
+        """
+        pares = list(pares)
+        posicoes: Dict[int, List[int]] = {}
+        for posicao, (usuario, _) in enumerate(pares):
+            posicoes.setdefault(self.__shard(usuario), []).append(posicao)
+        resultados = [None] * len(pares)
+        with self.__travas.travar(*(usuario for usuario, _ in pares)):
+            respostas = self.__espalhar({indice: ('tweetar_lote', ([pares[posicao] for posicao in lista],))
+                                         for indice, lista in posicoes.items()})
+        for indice, lista in posicoes.items():
+            for posicao, resultado in zip(lista, respostas[indice]):
+                resultados[posicao] = recriar_erro(resultado) if isinstance(resultado, tuple) else resultado
+        return resultados
+
+    def timeline(self, usuario: str, limit: int | None = None, before_id: int | None = None) -> List[Tweet]:
+        """
+        Monta a timeline mesclando a parte local (shard do usuário) com os tweets
+        dos seguidos de outros shards, buscados em paralelo.
+        """
+        locais, remotos = self.__pedir(self.__shard(usuario), 'timeline', usuario, limit, before_id)
+        if not remotos:
+            return locais
+        respostas = self.__espalhar({indice: ('tweets_de', (autores, limit, before_id))
+                                     for indice, autores in self.__agrupar(remotos).items()})
+        return mesclar_timelines([iter(locais)] + [iter(tweets) for tweets in respostas.values()], limit)
+
+    def tweets(self, usuario: str) -> List[Tweet]:
+        return self.__pedir(self.__shard(usuario), 'tweets', usuario)
+
+    def get_tweet(self, tweet_id: int) -> Tweet:
+        indice = shard_do_tweet(tweet_id)
+        if indice >= self.__quantidade:
+            raise TIException(tweet_id)
+        return self.__pedir(indice, 'get_tweet', tweet_id)
+
+    def get_tweets_by_ids(self, ids: Iterable[int]) -> List[Tweet]:
+        ids = list(ids)
+        grupos: Dict[int, List[int]] = {}
+        for tweet_id in ids:
+            indice = shard_do_tweet(tweet_id)
+            if indice < self.__quantidade:
+                grupos.setdefault(indice, []).append(tweet_id)
+        respostas = self.__espalhar({indice: ('get_tweets_by_ids', (lista,)) for indice, lista in grupos.items()})
+        encontrados = {tweet.get_id(): tweet for tweets in respostas.values() for tweet in tweets}
+        return [encontrados[tweet_id] for tweet_id in ids if tweet_id in encontrados]
+
+    def seguir(self, seguidor: str, seguido: str) -> None:
+        with self.__travas.travar(seguidor, seguido):
+            self.__vincular('seguir', seguidor, seguido)
+
+    def deixar_de_seguir(self, seguidor: str, seguido: str) -> None:
+        with self.__travas.travar(seguidor, seguido):
+            self.__vincular('deixar_de_seguir', seguidor, seguido)
+
+    def bloquear(self, usuario: str, bloqueado: str) -> None:
+        with self.__travas.travar(usuario, bloqueado):
+            self.__vincular('bloquear', usuario, bloqueado)
+
+    def numero_seguidores(self, usuario: str) -> int:
+        return self.__pedir(self.__shard(usuario), 'numero_seguidores', usuario)
+
+    def perfil_stats(self, usuario: str) -> Dict[str, int]:
+        return self.__pedir(self.__shard(usuario), 'perfil_stats', usuario)
+
+    def __copias(self, usuarios: List[str]) -> List[Perfil]:
+        """
+        Busca nos shards donos os dados dos perfis e monta cópias, na ordem recebida.
+        """
+        respostas = self.__espalhar({indice: ('dados', (nomes,)) for indice, nomes in self.__agrupar(usuarios).items()})
+        dados = {chave_usuario(linha['usuario']): linha for linhas in respostas.values() for linha in linhas}
+        return [criar_perfil(dados[chave_usuario(usuario)]) for usuario in usuarios]
+
+    def __paginas(self, pagina_de: Callable[[int | None], Pagina], cursor: int | None) -> Iterator:
+        """
+        Percorre uma listagem paginada, pedindo TAMANHO_PAGINA itens por vez aos shards.
+        A primeira página é pedida já na chamada, para validar os argumentos.
+        """
+        def percorrer(pagina: Pagina) -> Iterator:
+            while True:
+                yield from pagina
+                if pagina.cursor is None:
+                    return
+                pagina = pagina_de(pagina.cursor)
+        return percorrer(pagina_de(cursor))
+
+    def __vinculos(self, operacao: str, usuario: str, limit: int | None, cursor: int | None) -> Pagina[Perfil]:
+        pagina = self.__pedir(self.__shard(usuario), operacao, usuario, limit, cursor)
+        return Pagina(self.__copias(pagina), pagina.cursor)
+
+    def seguidores(self, usuario: str, limit: int | None = None, cursor: int | None = None) -> Pagina[Perfil]:
+        return self.__vinculos('seguidores', usuario, limit, cursor)
+
+    def iter_seguidores(self, usuario: str, cursor: int | None = None) -> Iterator[Perfil]:
+        return self.__paginas(lambda cursor: self.seguidores(usuario, TAMANHO_PAGINA, cursor), cursor)
+
+    def seguidos(self, usuario: str, limit: int | None = None, cursor: int | None = None) -> Pagina[Perfil]:
+        return self.__vinculos('seguidos', usuario, limit, cursor)
+
+    def iter_seguidos(self, usuario: str, cursor: int | None = None) -> Iterator[Perfil]:
+        return self.__paginas(lambda cursor: self.seguidos(usuario, TAMANHO_PAGINA, cursor), cursor)
+
+    def usuarios_cadastrados(self, limit: int | None = None, cursor: int | None = None) -> Pagina[str]:
+        """
+        Lista os perfis shard a shard. O cursor combina o índice do shard e o cursor
+        local: (cursor local + 1) * número de shards + índice do shard.
+        """
+        if limit is None and cursor is None:
+            respostas = self.__espalhar({indice: ('usuarios_cadastrados', (None, None))
+                                         for indice in range(self.__quantidade)})
+            return Pagina(usuario for indice in sorted(respostas) for usuario in respostas[indice])
+        indice, local = 0, None
+        if cursor is not None:
+            local, indice = divmod(cursor, self.__quantidade)
+            local = local - 1 if local else None
+        nomes: List[str] = []
+        while indice < self.__quantidade:
+            restantes = None if limit is None else limit - len(nomes)
+            pagina = self.__pedir(indice, 'usuarios_cadastrados', restantes, local)
+            nomes.extend(pagina)
+            if pagina.cursor is not None:
+                return Pagina(nomes, (pagina.cursor + 1) * self.__quantidade + indice)
+            indice, local = indice + 1, None
+            if restantes is not None and len(nomes) >= limit and indice < self.__quantidade:
+                return Pagina(nomes, indice) # início do próximo shard
+        return Pagina(nomes)
+
+    def iter_usuarios_cadastrados(self, cursor: int | None = None) -> Iterator[str]:
+        return self.__paginas(lambda cursor: self.usuarios_cadastrados(TAMANHO_PAGINA, cursor), cursor)
+
+    def get_instance_perfil(self, usuario: str) -> str:
+        return self.__pedir(self.__shard(usuario), 'get_instance_perfil', usuario)
+
+    def fechar(self) -> None:
+        """
+        Encerra os processos dos shards.
+        """
+        for trava, conexao in zip(self.__travas_conexoes, self.__conexoes):
+            with trava:
+                conexao.send(None)
+                conexao.close()
+        for processo in self.__processos:
+            processo.join()
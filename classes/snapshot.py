@@ -0,0 +1,409 @@
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from typing import Callable, Dict, Iterator, List, Tuple
+from .armazenamento import PersistenciaEventosMixin
+from .perfis import Perfil, PessoaFisica, PessoaJuridica
+from .repositorio import RepositorioUsuarios, chave_usuario
+from .tweet import Tweet
+from exceptions import UJCException
+
+# Formato do snapshot (little-endian), em seções:
+#   cabeçalho | textos | perfis | ordem de cadastro | arestas | tweets | índice de IDs | nomes
+# Os perfis são registros de tamanho fixo ordenados pela chave normalizada, o que
+# permite buscar um usuário direto no arquivo mapeado, sem carregar nada antes.
+MAGICO = b'MTWSNAP2'
+CABECALHO = struct.Struct('<8sQQQ7Q')  # mágico, nº de perfis, nº de tweets, último evento incluído, início de cada seção
+MAGICO_V1 = b'MTWSNAP1'
+CABECALHO_V1 = struct.Struct('<8sQQ7Q') # sem o último evento
+# chave, nome e documento (offset e tamanho em `nomes`), tipo, ativo, seguidos, seguidores,
+# bloqueados e tweets (início e quantidade), seguidores ativos e seguidos ativos
+REGISTRO_PERFIL = struct.Struct('<QIQIQIBBQIQIQIQIII')
+REGISTRO_TWEET = struct.Struct('<qqQI')   # id, timestamp, offset e tamanho da mensagem em `textos`
+REGISTRO_ID = struct.Struct('<qI')        # id do tweet, posição do autor
+INDICE = struct.Struct('<I')
+SEM_DOCUMENTO = 0xFFFFFFFF
+TIPOS = [Perfil, PessoaFisica, PessoaJuridica]
+
+
+def gravar_snapshot(caminho: str, perfis: List[Perfil], ultimo_evento: int = 0) -> None:
+    """
+    Grava perfis, grafo de seguidores e tweets em um snapshot binário.
+
+    As mensagens são gravadas em fluxo, logo após o cabeçalho; o restante é montado
+    em arrays compactos e gravado no fim. O arquivo é escrito em um temporário e
+    trocado atomicamente.
+
+    :param caminho: Caminho do arquivo de snapshot.
+    :param perfis: Perfis a gravar, em ordem de cadastro (por exemplo, repositorio.get_usuarios()).
+    :param ultimo_evento: Número de sequência do último evento do log incluído no
+        snapshot (veja RepositorioUsuariosPersistenteMapeado).
+    """
+    chaves = [chave_usuario(perfil.get_usuario()).encode('utf-8') for perfil in perfis]
+    ordenados = sorted(range(len(perfis)), key=chaves.__getitem__)
+    posicao = {perfis[i]: p for p, i in enumerate(ordenados)}
+
+    registros, tweets, nomes = bytearray(), bytearray(), bytearray()
+    arestas = array('I')
+    ids, autores = array('q'), array('I')
+
+    def nome(dados: bytes):
+        nomes.extend(dados)
+        return len(nomes) - len(dados), len(dados)
+
+    def vizinhos(lista: List[Perfil]):
+        inicio = len(arestas)
+        arestas.extend(posicao[vizinho] for vizinho in lista)
+        return inicio, len(lista)
+
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(bytes(CABECALHO.size))
+        texto = 0
+        for p, i in enumerate(ordenados):
+            perfil = perfis[i]
+            if isinstance(perfil, PessoaFisica):
+                tipo, documento = 1, nome(perfil.get_cpf().encode('utf-8'))
+            elif isinstance(perfil, PessoaJuridica):
+                tipo, documento = 2, nome(perfil.get_cnpj().encode('utf-8'))
+            else:
+                tipo, documento = 0, (0, SEM_DOCUMENTO)
+            inicio_tweets = len(ids)
+            for tweet in perfil.iter_tweets():
+                mensagem = tweet.get_mensagem().encode('utf-8')
+                arquivo.write(mensagem)
+                tweets.extend(REGISTRO_TWEET.pack(tweet.get_id(), tweet.get_timestamp(), texto, len(mensagem)))
+                ids.append(tweet.get_id())
+                autores.append(p)
+                texto += len(mensagem)
+            registros.extend(REGISTRO_PERFIL.pack(
+                *nome(chaves[i]), *nome(perfil.get_usuario().encode('utf-8')), *documento, tipo, perfil.is_ativo(),
+                *vizinhos(perfil.get_seguidos()), *vizinhos(perfil.get_seguidores()), *vizinhos(perfil.get_bloqueados()),
+                inicio_tweets, len(ids) - inicio_tweets, perfil.get_num_seguidores_ativos(), perfil.get_num_seguidos_ativos()))
+
+        indice_ids = bytearray()
+        for t in sorted(range(len(ids)), key=ids.__getitem__):
+            indice_ids.extend(REGISTRO_ID.pack(ids[t], autores[t]))
+        ordem = array('I', (posicao[perfil] for perfil in perfis))
+
+        inicios = [CABECALHO.size, CABECALHO.size + texto]
+        for secao in (registros, ordem, arestas, tweets, indice_ids, nomes):
+            if isinstance(secao, array) and sys.byteorder == 'big':
+                secao.byteswap()
+            arquivo.write(secao)
+            inicios.append(arquivo.tell())
+        arquivo.seek(0)
+        arquivo.write(CABECALHO.pack(MAGICO, len(perfis), len(ids), ultimo_evento, *inicios[:7]))
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+
+
+class RepositorioUsuariosMapeado(RepositorioUsuarios):
+    """
+    Repositório de usuários aberto a partir de um snapshot binário mapeado em memória (mmap).
+
+    A abertura não lê os perfis: buscar() encontra o usuário por busca binária no
+    arquivo e só então materializa o Perfil, seus tweets e seus vínculos. Os
+    vizinhos no grafo entram como perfis parciais (dados cadastrais, tweets e
+    contadores, sem vínculos), completados quando forem buscados. Assim,
+    existe_usuario e timeline podem ser atendidos logo após a abertura.
+
+    Sozinho, o repositório serve para importação e leitura: não há log de eventos
+    nem compactação (precisa_compactar é sempre False), e alterações feitas após a
+    abertura ficam apenas em memória, descartadas ao fechar. Para persisti-las,
+    grave um novo snapshot com gravar_snapshot(caminho, repositorio.get_usuarios())
+    antes de fechar (get_usuarios carrega os perfis que ainda estão só no arquivo),
+    ou use RepositorioUsuariosPersistenteMapeado, que acrescenta o log de eventos.
+
+    Exemplo de uso:
+        repositorio = RepositorioUsuariosMapeado('dados/snapshot.bin')
+        twitter = MyTwitter(repositorio=repositorio)
+    """
+
+    def __init__(self, caminho: str):
+        """
+        Mapeia o snapshot em memória, sem carregar perfis.
+
+        :param caminho: Caminho de um arquivo gravado por gravar_snapshot.
+        :raises ValueError: Se o arquivo não for um snapshot válido.
+        """
+        super().__init__()
+        with open(caminho, 'rb') as arquivo:
+            self.__mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magico = self.__mapa[:len(MAGICO)]
+        if magico == MAGICO:
+            _, self.__num_perfis, self.__num_tweets, self.__ultimo_evento, *inicios = CABECALHO.unpack_from(self.__mapa)
+        elif magico == MAGICO_V1:
+            _, self.__num_perfis, self.__num_tweets, *inicios = CABECALHO_V1.unpack_from(self.__mapa)
+            self.__ultimo_evento = 0
+        else:
+            self.__mapa.close()
+            raise ValueError(f"'{caminho}' não é um snapshot do MyTwitter.")
+        self.__textos, self.__perfis, self.__ordem, self.__arestas, self.__tweets, self.__ids, self.__nomes = inicios
+        self.__carregados: Dict[int, Perfil] = {}   # posição no snapshot -> perfil materializado
+        self.__pendentes: Dict[Perfil, int] = {}    # perfis parciais (sem vínculos) -> posição
+        self.__ao_carregar: Callable[[Perfil], None] | None = None
+        self.__trava = threading.RLock() # materialização sob demanda, que pode vir de várias threads
+        self.__todos_carregados = False
+
+    def get_ultimo_evento(self) -> int:
+        """
+        Retorna o número de sequência do último evento de log incluído no snapshot.
+        """
+        return self.__ultimo_evento
+
+    def cadastrar(self, usuario: Perfil) -> None:
+        """
+        Cadastra um novo usuário, verificando também os perfis ainda não carregados.
+
+        Raise:
+            UJCException: Se o usuário já estiver cadastrado.
+        """
+        posicao = self.__posicao(chave_usuario(usuario.get_usuario()))
+        if posicao is not None and posicao not in self.__carregados:
+            raise UJCException(usuario)
+        super().cadastrar(usuario)
+
+    def buscar(self, usuario: str) -> Perfil | None:
+        """
+        Busca um usuário pelo nome de usuário, materializando-o se necessário.
+        """
+        perfil = super().buscar(usuario)
+        if perfil is not None and perfil not in self.__pendentes:
+            return perfil
+        with self.__trava:
+            perfil = super().buscar(usuario)
+            if perfil is None:
+                posicao = self.__posicao(chave_usuario(usuario))
+                if posicao is None or posicao in self.__carregados:
+                    return None # inexistente, ou carregado e renomeado depois
+                perfil = self.__carregar(posicao)
+            if perfil in self.__pendentes:
+                self.__completar(perfil)
+            return perfil
+
+    def __carregar_todos(self) -> None:
+        """
+        Materializa todos os perfis do snapshot (uma única vez).
+        """
+        with self.__trava:
+            if self.__todos_carregados:
+                return
+            for i in range(self.__num_perfis):
+                posicao = INDICE.unpack_from(self.__mapa, self.__ordem + i * INDICE.size)[0]
+                if posicao not in self.__carregados:
+                    self.__carregar(posicao)
+            for perfil in list(self.__pendentes):
+                self.__completar(perfil)
+            self.__todos_carregados = True
+
+    def get_usuarios(self) -> List[Perfil]:
+        """
+        Materializa e retorna todos os perfis. Os perfis já carregados vêm na ordem
+        em que foram carregados; os demais, na ordem de cadastro do snapshot.
+        """
+        self.__carregar_todos()
+        return super().get_usuarios()
+
+    def iter_usuarios(self, cursor: int | None = None) -> Iterator[Tuple[int, Perfil]]:
+        """
+        Itera sobre os perfis na ordem de get_usuarios. Na primeira chamada, todos os
+        perfis são materializados, para que as posições (cursores) não mudem depois.
+        """
+        self.__carregar_todos()
+        return super().iter_usuarios(cursor)
+
+    def ponto_de_corte(self) -> Tuple[int, int | None, int, int]:
+        """
+        Materializa todos os perfis (como iter_usuarios) e retorna o ponto de corte.
+        """
+        self.__carregar_todos()
+        return super().ponto_de_corte()
+
+    def get_usuarios_carregados(self) -> List[Perfil]:
+        """
+        Retorna apenas os perfis já materializados.
+        """
+        return super().get_usuarios()
+
+    def set_ao_carregar(self, callback: Callable[[Perfil], None]) -> None:
+        """
+        Define a função chamada sempre que um perfil for materializado.
+        """
+        self.__ao_carregar = callback
+
+    def buscar_tweet(self, tweet_id: int) -> Tweet | None:
+        """
+        Busca um tweet pelo ID, materializando seu autor (localizado por busca binária
+        no índice de IDs).
+        """
+        inicio, fim = 0, self.__num_tweets
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            id, autor = REGISTRO_ID.unpack_from(self.__mapa, self.__ids + meio * REGISTRO_ID.size)
+            if id < tweet_id:
+                inicio = meio + 1
+            elif id > tweet_id:
+                fim = meio
+            else:
+                with self.__trava:
+                    perfil = self.__carregados.get(autor) or self.__carregar(autor)
+                return perfil.get_tweet(tweet_id)
+        return None
+
+    def fechar(self) -> None:
+        """
+        Libera o mapeamento do arquivo. Perfis ainda não carregados deixam de estar
+        disponíveis, e as alterações não gravadas com gravar_snapshot são perdidas.
+        """
+        self.__mapa.close()
+
+    def __texto(self, inicio: int, tamanho: int) -> str:
+        """
+        Decodifica uma cadeia da seção de nomes.
+        """
+        return self.__mapa[self.__nomes + inicio:self.__nomes + inicio + tamanho].decode('utf-8')
+
+    def __registro(self, posicao: int) -> tuple:
+        """
+        Lê o registro do perfil na posição informada (ordem das chaves).
+        """
+        return REGISTRO_PERFIL.unpack_from(self.__mapa, self.__perfis + posicao * REGISTRO_PERFIL.size)
+
+    def __posicao(self, chave: str) -> int | None:
+        """
+        Busca binária de uma chave normalizada entre os registros de perfil.
+        """
+        chave = chave.encode('utf-8')
+        inicio, fim = 0, self.__num_perfis
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            offset, tamanho = self.__registro(meio)[:2]
+            atual = self.__mapa[self.__nomes + offset:self.__nomes + offset + tamanho]
+            if atual < chave:
+                inicio = meio + 1
+            elif atual > chave:
+                fim = meio
+            else:
+                return meio
+        return None
+
+    def __carregar(self, posicao: int) -> Perfil:
+        """
+        Materializa um perfil parcial: dados cadastrais, tweets e contadores, sem vínculos.
+        """
+        (_, _, nome_offset, nome_tamanho, doc_offset, doc_tamanho, tipo, ativo,
+         *_, tweets_inicio, num_tweets, seguidores_ativos, seguidos_ativos) = self.__registro(posicao)
+        usuario = self.__texto(nome_offset, nome_tamanho)
+        if doc_tamanho == SEM_DOCUMENTO:
+            perfil = TIPOS[tipo](usuario)
+        else:
+            perfil = TIPOS[tipo](usuario, self.__texto(doc_offset, doc_tamanho))
+        if not ativo:
+            perfil.set_inativo()
+        # os tweets de cada perfil estão gravados do mais novo para o mais antigo
+        for t in range(tweets_inicio + num_tweets - 1, tweets_inicio - 1, -1):
+            id, timestamp, offset, tamanho = REGISTRO_TWEET.unpack_from(self.__mapa, self.__tweets + t * REGISTRO_TWEET.size)
+            mensagem = self.__mapa[self.__textos + offset:self.__textos + offset + tamanho].decode('utf-8')
+            perfil.add_tweet(Tweet.restaurar(usuario, mensagem, id, timestamp))
+        perfil.ajustar_seguidores_ativos(seguidores_ativos)
+        perfil.ajustar_seguidos_ativos(seguidos_ativos)
+
+        super().cadastrar(perfil)
+        self.__carregados[posicao] = perfil
+        self.__pendentes[perfil] = posicao
+        if self.__ao_carregar is not None:
+            self.__ao_carregar(perfil)
+        return perfil
+
+    def __completar(self, perfil: Perfil) -> None:
+        """
+        Liga um perfil parcial aos seus vizinhos, materializando-os (parcialmente) se preciso.
+
+        Perfis parciais só são alterados por operações que os buscam antes, então os
+        vínculos lidos do snapshot ainda são os atuais.
+        """
+        registro = self.__registro(self.__pendentes.pop(perfil))
+        seguidos, seguidores, bloqueados = registro[8:10], registro[10:12], registro[12:14]
+        for inicio, quantidade, adicionar in ((*seguidos, perfil.add_seguidos), (*seguidores, perfil.add_seguidor),
+                                              (*bloqueados, perfil.add_bloqueado)):
+            for a in range(inicio, inicio + quantidade):
+                vizinho = INDICE.unpack_from(self.__mapa, self.__arestas + a * INDICE.size)[0]
+                adicionar(self.__carregados.get(vizinho) or self.__carregar(vizinho))
+
+
+class RepositorioUsuariosPersistenteMapeado(PersistenciaEventosMixin, RepositorioUsuariosMapeado):
+    """
+    Repositório de usuários persistido em disco, com snapshot binário aberto por mmap.
+
+    Combina o log de eventos de RepositorioUsuariosPersistente (veja
+    PersistenciaEventosMixin) com o carregamento sob demanda de
+    RepositorioUsuariosMapeado: a compactação grava o snapshot com gravar_snapshot, e
+    a abertura mapeia o snapshot e reaplica apenas o final do log, materializando só
+    os perfis citados pelos eventos (e seus vizinhos, para corrigir os contadores).
+
+    Exemplo de uso:
+        repositorio = RepositorioUsuariosPersistenteMapeado('dados')
+        twitter = MyTwitter(repositorio=repositorio)
+        ...
+        repositorio.fechar()
+    """
+
+    ARQUIVO_SNAPSHOT = 'snapshot.bin'
+
+    def __init__(self, diretorio: str, compactar_a_cada: int = 100_000, intervalo_fsync: float = 0.05,
+                 max_pendentes: int = 256):
+        """
+        Abre o repositório, mapeando o snapshot e reaplicando o log do diretório.
+
+        :param diretorio: Diretório onde ficam o log e o snapshot.
+        :param compactar_a_cada: Número de eventos no log que dispara uma compactação.
+        :param intervalo_fsync: Tempo máximo, em segundos, entre um evento e seu fsync.
+        :param max_pendentes: Número máximo de eventos por grupo de fsync.
+        """
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, self.ARQUIVO_SNAPSHOT)
+        if not os.path.exists(caminho):
+            gravar_snapshot(caminho, [])
+        super().__init__(caminho)
+        self._abrir_log(diretorio, compactar_a_cada, intervalo_fsync, max_pendentes)
+
+    def _ler_snapshot(self, caminho: str) -> int:
+        """
+        O snapshot já está mapeado; nada é carregado até ser buscado.
+        """
+        return self.get_ultimo_evento()
+
+    def _gravar_snapshot(self, caminho: str, ultimo: int) -> None:
+        """
+        Grava um novo snapshot binário com todos os perfis (materializando os que
+        ainda estão só no arquivo antigo, que continua mapeado até o fechamento).
+        """
+        gravar_snapshot(caminho, self.get_usuarios(), ultimo)
+
+    def _ajustar_contadores(self, tocados: List[Perfil]) -> None:
+        """
+        Os perfis do snapshot trazem seus contadores: recalcula apenas os dos perfis
+        citados pelo log e de seus vizinhos, os únicos que os eventos podem ter mudado.
+        """
+        afetados = dict.fromkeys(tocados)
+        for perfil in tocados:
+            afetados.update(dict.fromkeys(perfil.get_seguidores()))
+            afetados.update(dict.fromkeys(perfil.get_seguidos()))
+        for perfil in afetados:
+            self.buscar(perfil.get_usuario()) # completa os vínculos de perfis parciais
+            seguidores = sum(1 for seguidor in perfil.get_seguidores() if seguidor.is_ativo())
+            seguidos = sum(1 for seguido in perfil.get_seguidos() if seguido.is_ativo())
+            perfil.ajustar_seguidores_ativos(seguidores - perfil.get_num_seguidores_ativos())
+            perfil.ajustar_seguidos_ativos(seguidos - perfil.get_num_seguidos_ativos())
+
+    def fechar(self) -> None:
+        """
+        Sincroniza e fecha o log de eventos e libera o mapeamento do snapshot.
+        """
+        super().fechar()
+        RepositorioUsuariosMapeado.fechar(self)
@@ -0,0 +1,160 @@
+import threading
+from array import array
+from collections import Counter
+from heapq import nsmallest
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Tuple
+from .perfis import Perfil
+from .repositorio import chave_usuario
+
+def bloqueio_entre(perfil: Perfil, outro: Perfil) -> bool:
+    """
+    Verifica se algum dos dois perfis bloqueou o outro.
+    """
+    return perfil.bloqueou(outro) or outro.bloqueou(perfil)
+
+class SugestoesSeguir:
+    """
+    Sugestões de perfis para seguir ("quem seguir"), por amigos de amigos.
+
+    A pontuação de um candidato é o número de perfis seguidos pelo usuário que
+    seguem o candidato; empates favorecem quem tem mais seguidores ativos e depois
+    a ordem alfabética. O próprio usuário, quem ele já segue, perfis inativos e
+    perfis com bloqueio entre os dois ficam de fora.
+
+    Os resultados ficam em cache por usuário, com uma assinatura: a versão do usuário
+    e os pares (perfil seguido, versão) dos perfis que ele segue. Cada perfil tem uma versão, incrementada
+    (invalidar) quando ele passa a seguir ou deixa de seguir alguém, bloqueia ou é
+    bloqueado; assim, uma mudança a até dois passos no grafo invalida a sugestão na
+    próxima consulta, sem percorrer os seguidores de ninguém. A ordem entre
+    candidatos empatados pode ficar defasada até lá, pois mudanças no número de
+    seguidores dos candidatos não invalidam o cache.
+
+    recalcular calcula as sugestões de todos os perfis de uma vez, sobre o grafo em
+    formato CSR (arrays de índices), com as contagens feitas em C pelo Counter.
+    Pode ser usado por várias threads.
+
+    Exemplo de uso:
+        sugestoes = SugestoesSeguir()
+        sugestoes.sugerir(perfil, 10)
+        sugestoes.invalidar(perfil)  # após perfil seguir alguém
+    """
+
+    def __init__(self, seguidos_de: Callable[[Perfil], List[Perfil]] = Perfil.get_seguidos,
+                 capacidade: int = 20) -> None:
+        """
+        Args:
+            seguidos_de (Callable[[Perfil], List[Perfil]]): Retorna os perfis seguidos por
+                um perfil (por exemplo, completando perfis carregados sob demanda).
+            capacidade (int): Número de sugestões guardadas por usuário; consultas com
+                k maior são calculadas sem cache.
+        """
+        self.__seguidos_de = seguidos_de
+        self.__capacidade = capacidade
+        self.__versoes: Dict[Perfil, int] = {}
+        self.__cache: Dict[Perfil, Tuple[Tuple, List[Perfil]]] = {}
+        self.__trava = threading.Lock()
+
+    def invalidar(self, perfil: Perfil) -> None:
+        """
+        Registra uma mudança nos vínculos de um perfil, invalidando as sugestões dele e
+        as de quem o segue. Deve ser chamado depois de alterar o grafo.
+        """
+        with self.__trava:
+            self.__versoes[perfil] = self.__versoes.get(perfil, 0) + 1
+
+    @staticmethod
+    def __assinatura(versao: int, seguidos: Iterable[Perfil], versoes: Dict[Perfil, int]) -> Tuple:
+        # os próprios seguidos fazem parte da assinatura: uma soma de versões pode
+        # coincidir depois de trocar um seguido por outro
+        return versao, tuple((seguido, versoes.get(seguido, 0)) for seguido in seguidos)
+
+    def sugerir(self, perfil: Perfil, k: int = 10) -> List[Perfil]:
+        """
+        Retorna até k perfis sugeridos para o usuário seguir, do mais para o menos relevante.
+
+        Args:
+            perfil (Perfil): Perfil do usuário.
+            k (int): Número máximo de sugestões.
+        """
+        # a versão do usuário é lida antes dos seus seguidos, e as dos seguidos antes dos
+        # seguidos deles: uma alteração concorrente muda a assinatura depois de lida
+        versao = self.__versoes.get(perfil, 0)
+        seguidos = self.__seguidos_de(perfil)
+        assinatura = self.__assinatura(versao, seguidos, self.__versoes)
+        guardado = self.__cache.get(perfil)
+        if k <= self.__capacidade and guardado is not None and guardado[0] == assinatura:
+            return guardado[1][:k]
+
+        contagem = Counter(chain.from_iterable(self.__seguidos_de(seguido) for seguido in seguidos))
+        excluidos = set(seguidos)
+        excluidos.add(perfil)
+        candidatos = ((candidato, vezes) for candidato, vezes in contagem.items()
+                      if candidato not in excluidos and candidato.is_ativo() and not bloqueio_entre(perfil, candidato))
+        melhores = [candidato for candidato, _ in nsmallest(max(k, self.__capacidade), candidatos, key=lambda item: (
+            -item[1], -item[0].get_num_seguidores_ativos(), chave_usuario(item[0].get_usuario())))]
+        with self.__trava:
+            self.__cache[perfil] = (assinatura, melhores[:self.__capacidade])
+        return melhores[:k]
+
+    def recalcular(self, perfis: List[Perfil]) -> int:
+        """
+        Calcula e guarda em cache as sugestões de todos os perfis ativos informados.
+
+        O grafo é convertido uma única vez em CSR: os perfis viram índices, e os
+        seguidos do perfil i ficam em `indices[inicios[i]:inicios[i + 1]]`. As
+        contagens de amigos de amigos somam fatias desses arrays e os candidatos são
+        ordenados como inteiros, sem chamadas a métodos dos perfis; só os perfis
+        envolvidos em bloqueios são verificados um a um.
+
+        Args:
+            perfis (List[Perfil]): Todos os perfis cadastrados.
+
+        Returns:
+            int: Número de perfis com sugestões calculadas.
+        """
+        versoes = dict(self.__versoes) # antes de ler o grafo (veja sugerir)
+        total = len(perfis)
+        posicao = {perfil: i for i, perfil in enumerate(perfis)}
+        listas = [self.__seguidos_de(perfil) for perfil in perfis]
+        inicios, indices = array('q', [0]), array('q')
+        for seguidos in listas:
+            indices.extend(posicao[seguido] for seguido in seguidos if seguido in posicao)
+            inicios.append(len(indices))
+        ativos = bytearray(perfil.is_ativo() for perfil in perfis)
+        # posto de cada perfil no desempate (mais seguidores ativos, depois ordem alfabética),
+        # para ordenar os candidatos por um único inteiro: posto - pontuação * total
+        por_posto = sorted(range(total), key=lambda i: (-perfis[i].get_num_seguidores_ativos(),
+                                                        chave_usuario(perfis[i].get_usuario())))
+        posto = array('q', bytes(8 * total))
+        for p, i in enumerate(por_posto):
+            posto[i] = p
+        # perfis que bloquearam ou foram bloqueados: só esses candidatos precisam ser verificados
+        com_bloqueio = set()
+        for i, perfil in enumerate(perfis):
+            bloqueados = perfil.get_bloqueados()
+            if bloqueados:
+                com_bloqueio.add(i)
+                com_bloqueio.update(posicao[bloqueado] for bloqueado in bloqueados if bloqueado in posicao)
+
+        calculados = {}
+        for i, perfil in enumerate(perfis):
+            if not ativos[i]:
+                continue
+            proprios = indices[inicios[i]:inicios[i + 1]]
+            contagem = Counter(chain.from_iterable(indices[inicios[j]:inicios[j + 1]] for j in proprios))
+            excluidos = set(proprios)
+            excluidos.add(i)
+            ordem = sorted(posto[j] - vezes * total for j, vezes in contagem.items() if ativos[j] and j not in excluidos)
+            melhores = []
+            for chave in ordem:
+                j = por_posto[chave % total]
+                if j in com_bloqueio and bloqueio_entre(perfil, perfis[j]):
+                    continue
+                melhores.append(perfis[j])
+                if len(melhores) == self.__capacidade:
+                    break
+            calculados[perfil] = (self.__assinatura(versoes.get(perfil, 0), listas[i], versoes), melhores)
+        with self.__trava:
+            self.__cache.update(calculados)
+        return len(calculados)
@@ -0,0 +1,31 @@
+from heapq import merge
+from itertools import islice
+from typing import Iterable, Iterator, List
+from .tweet import Tweet
+
+def chave_tweet(tweet: Tweet) -> int:
+    """
+    Chave de ordenação das timelines: o ID do tweet.
+
+    Os IDs crescem com o tempo (GeradorSnowflake) e, para cada autor, a ordem dos IDs
+    é a mesma das datas de postagem (MyTwitter recusa IDs fora de ordem). Ordenar pelo
+    ID mantém a ordem da timeline igual à do cursor de paginação (before_id).
+    """
+    return tweet.get_id()
+
+def mesclar_timelines(fontes: Iterable[Iterator[Tweet]], limit: int | None = None) -> List[Tweet]:
+    """
+    Mescla fontes de tweets já ordenadas do mais novo para o mais antigo.
+
+    A mescla é preguiçosa (k-way merge com heap): obter os `limit` primeiros
+    tweets custa O(limit · log k), onde k é o número de fontes, sem reordenar
+    o histórico completo de cada autor.
+
+    :param fontes: Iteradores de tweets, cada um do mais novo para o mais antigo.
+    :param limit: Número máximo de tweets retornados (None para todos).
+    :return: Lista de tweets do mais novo para o mais antigo.
+    """
+    mesclados = merge(*fontes, key=chave_tweet, reverse=True)
+    if limit is not None:
+        mesclados = islice(mesclados, max(limit, 0))
+    return list(mesclados)
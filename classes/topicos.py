@@ -0,0 +1,102 @@
+import re
+import threading
+import time
+from heapq import nsmallest
+from typing import Callable, Dict, Iterable, List, Tuple
+from .busca import normalizar
+from .repositorio import chave_usuario
+
+HASHTAG = re.compile(r'#(\w+)')
+MENCAO = re.compile(r'@(\w+)')
+
+def extrair_hashtags(mensagem: str) -> List[str]:
+    """
+    Extrai as hashtags de uma mensagem, normalizadas (sem '#', acentos e maiúsculas)
+    e sem repetições.
+
+    Args:
+        mensagem (str): Texto do tweet.
+
+    Returns:
+        List[str]: Hashtags, na ordem em que aparecem.
+    """
+    return list(dict.fromkeys(normalizar(tag) for tag in HASHTAG.findall(mensagem)))
+
+def extrair_mencoes(mensagem: str) -> List[str]:
+    """
+    Extrai os usuários mencionados (@usuario) em uma mensagem, como chaves
+    normalizadas (veja chave_usuario) e sem repetições.
+
+    Apenas nomes formados por letras, dígitos e '_' são reconhecidos.
+    """
+    return list(dict.fromkeys(chave_usuario(nome) for nome in MENCAO.findall(mensagem)))
+
+class Tendencias:
+    """
+    Contadores de hashtags em uma janela deslizante de tempo (trending topics).
+
+    A janela é dividida em baldes de `largura_balde` segundos, cada um com a
+    contagem das hashtags publicadas nele; um total por hashtag é mantido à parte.
+    Quando um balde sai da janela, suas contagens são subtraídas do total. Assim,
+    registrar custa O(hashtags do tweet) e consultar as k mais frequentes custa
+    O(h log k), onde h é o número de hashtags distintas na janela, sem percorrer
+    os tweets.
+
+    Exemplo de uso:
+        tendencias = Tendencias(janela=3600, largura_balde=60)
+        tendencias.registrar(["verao"], time.time())
+        tendencias.topicos(10)  # [("verao", 1)]
+    """
+
+    def __init__(self, janela: float = 3600, largura_balde: float = 60,
+                 relogio: Callable[[], float] = time.time) -> None:
+        """
+        Args:
+            janela (float): Duração da janela, em segundos.
+            largura_balde (float): Duração de cada balde, em segundos (a resolução da janela).
+            relogio (Callable[[], float]): Fonte do instante atual, em segundos.
+        """
+        self.__largura = largura_balde
+        self.__baldes_na_janela = max(1, round(janela / largura_balde))
+        self.__relogio = relogio
+        self.__baldes: Dict[int, Dict[str, int]] = {}
+        self.__totais: Dict[str, int] = {}
+        self.__trava = threading.Lock()
+
+    def __primeiro_balde(self) -> int:
+        """
+        Retorna o índice do balde mais antigo ainda dentro da janela.
+        """
+        return int(self.__relogio() // self.__largura) - self.__baldes_na_janela + 1
+
+    def __expirar(self, primeiro: int) -> None:
+        for indice in [indice for indice in self.__baldes if indice < primeiro]:
+            for tag, quantidade in self.__baldes.pop(indice).items():
+                restante = self.__totais[tag] - quantidade
+                if restante:
+                    self.__totais[tag] = restante
+                else:
+                    del self.__totais[tag]
+
+    def registrar(self, hashtags: Iterable[str], instante: float) -> None:
+        """
+        Conta as hashtags de um tweet publicado no instante informado (em segundos);
+        instantes anteriores à janela são ignorados.
+        """
+        indice = int(instante // self.__largura)
+        with self.__trava:
+            if indice < self.__primeiro_balde():
+                return
+            balde = self.__baldes.setdefault(indice, {})
+            for tag in hashtags:
+                balde[tag] = balde.get(tag, 0) + 1
+                self.__totais[tag] = self.__totais.get(tag, 0) + 1
+
+    def topicos(self, k: int = 10) -> List[Tuple[str, int]]:
+        """
+        Retorna as k hashtags mais frequentes na janela, com suas contagens, da mais
+        frequente para a menos frequente (empates em ordem alfabética).
+        """
+        with self.__trava:
+            self.__expirar(self.__primeiro_balde())
+            return nsmallest(k, self.__totais.items(), key=lambda item: (-item[1], item[0]))
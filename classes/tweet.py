@@ -1,5 +1,9 @@
+from __future__ import annotations
+import sys
+import threading
+import time
 from datetime import datetime
-from typing import Generator
+from typing import Generator, List
 
 def gerador_id():
     """
@@ -18,33 +22,120 @@ def gerador_id():
         yield id
         id += 1
 
-gerador = gerador_id()
+
+class GeradorSnowflake:
+    """
+    Gerador de IDs no estilo Snowflake, seguro para uso por várias threads.
+
+    Cada ID de 63 bits combina o instante de geração (41 bits, em milissegundos
+    desde EPOCA_MS), o número do worker (10 bits) e uma sequência dentro do
+    mesmo milissegundo (12 bits). Assim, IDs de workers (processos) diferentes
+    nunca colidem e a ordem dos IDs acompanha a ordem de criação.
+
+    Pode ser usado no lugar de gerador_id(), pois implementa o protocolo de iterador.
+
+    Exemplo de uso:
+        gerador = GeradorSnowflake(worker_id=3)
+        tweet = Tweet("Clara", "Meu primeiro tweet!", gerador)
+        ids = gerador.reservar(100)  # bloco de IDs para postagens em lote
+    """
+
+    EPOCA_MS = 1_735_689_600_000 # 2025-01-01 00:00:00 UTC
+    BITS_WORKER = 10
+    BITS_SEQUENCIA = 12
+
+    def __init__(self, worker_id: int = 0):
+        """
+        Inicializa o gerador.
+
+        Args:
+            worker_id (int): Identificador do worker (0 a 1023), único por processo gerador.
+
+        Raises:
+            ValueError: Se o worker_id estiver fora do intervalo.
+        """
+        if not 0 <= worker_id < (1 << self.BITS_WORKER):
+            raise ValueError(f"worker_id deve estar entre 0 e {(1 << self.BITS_WORKER) - 1}")
+        self.__worker = worker_id << self.BITS_SEQUENCIA
+        self.__lock = threading.Lock()
+        self.__ultimo_ms = -1
+        self.__sequencia = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> int:
+        with self.__lock:
+            return self.__proximo()
+
+    def reservar(self, quantidade: int) -> List[int]:
+        """
+        Reserva um bloco de IDs consecutivos em ordem, adquirindo o lock uma única vez.
+
+        Args:
+            quantidade (int): Número de IDs a reservar.
+
+        Returns:
+            List[int]: IDs crescentes.
+        """
+        with self.__lock:
+            return [self.__proximo() for _ in range(quantidade)]
+
+    def __proximo(self) -> int:
+        """
+        Calcula o próximo ID. Deve ser chamado com o lock adquirido.
+
+        Se o relógio voltar ou a sequência do milissegundo se esgotar, o gerador
+        avança o milissegundo lógico em vez de esperar, preservando a ordem.
+        """
+        agora = time.time_ns() // 1_000_000 - self.EPOCA_MS
+        if agora > self.__ultimo_ms:
+            self.__ultimo_ms = agora
+            self.__sequencia = 0
+        else:
+            self.__sequencia += 1
+            if self.__sequencia >> self.BITS_SEQUENCIA:
+                self.__ultimo_ms += 1
+                self.__sequencia = 0
+        return (self.__ultimo_ms << (self.BITS_WORKER + self.BITS_SEQUENCIA)) | self.__worker | self.__sequencia
+
+
+gerador = GeradorSnowflake()
 
 
 class Tweet:
     """
     Classe que representa um tweet no sistema MyTwitter.
 
+    A classe usa __slots__ para reduzir o custo de memória por tweet: o nome do
+    autor é internado (compartilhado entre todos os tweets do mesmo usuário) e a
+    data de postagem é guardada como um inteiro em microssegundos desde a época,
+    sendo convertida para datetime apenas em get_data_postagem().
+
     Atributos:
-        __id (int): Identificador único do tweet, gerado automaticamente.
-        __usuario (str): Nome do usuário que criou o tweet.
+        __id (int): Identificador único do tweet, gerado automaticamente (Snowflake, veja GeradorSnowflake).
+        __usuario (str): Nome do usuário que criou o tweet (internado).
         __mensagem (str): Conteúdo do tweet (limite sugerido: 280 caracteres).
-        __data_postagem (datetime): Data e hora da criação do tweet.
+        __timestamp (int): Data e hora da criação do tweet, em microssegundos desde a época.
 
     Métodos:
         get_id(): Retorna o ID do tweet.
         get_usuario(): Retorna o nome do usuário que criou o tweet.
         get_mensagem(): Retorna o conteúdo do tweet.
         get_data_postagem(): Retorna a data e hora da postagem do tweet.
+        get_timestamp(): Retorna a data de postagem em microssegundos desde a época.
 
     Exemplo de uso:
         tweet = Tweet("Clara", "Meu primeiro tweet!")
         print(tweet.get_usuario())  # Clara
         print(tweet.get_mensagem())  # Meu primeiro tweet!
-        print(tweet.get_id())  # 1
+        print(tweet.get_id())  # ID Snowflake, crescente no tempo (ex.: 54720567705600000)
+        print(Tweet("Clara", "outro", gerador_id()).get_id())  # 1: IDs sequenciais, como nos testes
         print(tweet.get_data_postagem())  # Data e hora da postagem
     """
 
+    __slots__ = ('__id', '__usuario', '__mensagem', '__timestamp')
+
     def __init__(self, usuario: str, mensagem: str, gerador_id: Generator = gerador):
         """
         Inicializa um tweet com os dados fornecidos.
@@ -57,12 +148,30 @@ class Tweet:
             __id (int): ID único gerado automaticamente.
             __usuario (str): Nome do usuário.
             __mensagem (str): Conteúdo da postagem.
-            __data_postagem (datetime): Data e hora da criação do tweet.
+            __timestamp (int): Data e hora da criação do tweet, em microssegundos.
         """
         self.__id = next(gerador_id)
-        self.__usuario = usuario
+        self.__usuario = sys.intern(usuario)
         self.__mensagem = mensagem
-        self.__data_postagem = datetime.today()
+        self.__timestamp = time.time_ns() // 1000
+
+    @classmethod
+    def restaurar(cls, usuario: str, mensagem: str, id: int, timestamp: int) -> Tweet:
+        """
+        Recria um tweet já existente (por exemplo, lido do disco), preservando ID e data.
+
+        Args:
+            usuario (str): Nome do usuário que fez a postagem.
+            mensagem (str): Texto do tweet.
+            id (int): ID original do tweet.
+            timestamp (int): Data de postagem em microssegundos desde a época.
+        """
+        tweet = cls.__new__(cls)
+        tweet.__id = id
+        tweet.__usuario = sys.intern(usuario)
+        tweet.__mensagem = mensagem
+        tweet.__timestamp = timestamp
+        return tweet
 
     def get_id(self):
         """
@@ -98,4 +207,14 @@ class Tweet:
         Returns:
             datetime: Data e hora da criação do tweet.
         """
-        return self.__data_postagem
+        segundos, micro = divmod(self.__timestamp, 1_000_000)
+        return datetime.fromtimestamp(segundos).replace(microsecond=micro)
+
+    def get_timestamp(self):
+        """
+        Retorna a data e hora da postagem sem materializar um datetime.
+
+        Returns:
+            int: Microssegundos desde a época (1970-01-01 UTC).
+        """
+        return self.__timestamp
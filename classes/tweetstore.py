@@ -0,0 +1,311 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Sequence
+from datetime import datetime
+from itertools import chain, compress
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError: # NumPy é opcional: sem ele, as operações usam as colunas de array
+    np = None
+
+
+class TweetView:
+    """
+    Visão leve de um tweet armazenado em um TweetStore.
+
+    Oferece os mesmos getters da classe Tweet, lendo os valores diretamente das
+    colunas do armazenamento. Duas visões da mesma linha são iguais.
+    """
+
+    __slots__ = ('__store', '__linha')
+
+    def __init__(self, store: TweetStore, linha: int):
+        """
+        Inicializa a visão.
+
+        Args:
+            store (TweetStore): Armazenamento colunar de origem.
+            linha (int): Posição do tweet nas colunas.
+        """
+        self.__store = store
+        self.__linha = linha
+
+    def get_id(self):
+        """
+        Retorna o ID único do tweet.
+        """
+        return self.__store.get_id(self.__linha)
+
+    def get_usuario(self):
+        """
+        Retorna o nome do usuário que postou o tweet.
+        """
+        return self.__store.get_usuario(self.__linha)
+
+    def get_mensagem(self):
+        """
+        Retorna o conteúdo do tweet.
+        """
+        return self.__store.get_mensagem(self.__linha)
+
+    def get_data_postagem(self):
+        """
+        Retorna a data e hora da postagem do tweet.
+        """
+        segundos, micro = divmod(self.get_timestamp(), 1_000_000)
+        return datetime.fromtimestamp(segundos).replace(microsecond=micro)
+
+    def get_timestamp(self):
+        """
+        Retorna a data de postagem em microssegundos desde a época.
+        """
+        return self.__store.get_timestamp(self.__linha)
+
+    def __eq__(self, outro):
+        if not isinstance(outro, TweetView):
+            return NotImplemented
+        return self.__store is outro.__store and self.__linha == outro.__linha
+
+    def __hash__(self):
+        return hash((id(self.__store), self.__linha))
+
+
+class TweetsAutor(Sequence):
+    """
+    Sequência dos tweets de um autor dentro de um TweetStore.
+
+    Guarda apenas as posições dos tweets nas colunas (um array de inteiros) e
+    devolve TweetView ao ser indexada. Substitui a lista de Tweet do Perfil:
+    append/insert gravam o tweet no armazenamento colunar.
+    """
+
+    def __init__(self, store: TweetStore):
+        """
+        Inicializa a sequência vazia.
+
+        Args:
+            store (TweetStore): Armazenamento colunar de destino.
+        """
+        self.__store = store
+        self.__linhas = array('q')
+
+    def __len__(self):
+        return len(self.__linhas)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [TweetView(self.__store, linha) for linha in self.__linhas[indice]]
+        return TweetView(self.__store, self.__linhas[indice])
+
+    def append(self, tweet) -> None:
+        """
+        Grava o tweet no armazenamento e o adiciona ao fim da sequência.
+        """
+        self.__linhas.append(self.__store.adicionar(tweet))
+
+    def insert(self, indice: int, tweet) -> None:
+        """
+        Grava o tweet no armazenamento e o insere na posição informada.
+        """
+        self.__linhas.insert(indice, self.__store.adicionar(tweet))
+
+
+class TweetStore:
+    """
+    Armazenamento colunar de tweets.
+
+    Em vez de um objeto por tweet, os dados ficam em colunas paralelas
+    (arrays de inteiros para ID, autor e timestamp) e em um único bloco de texto
+    UTF-8 indexado por offsets. Os perfis guardam apenas as posições dos seus
+    tweets (TweetsAutor) e o acesso é feito por visões leves (TweetView), criadas
+    sob demanda.
+
+    A busca por ID usa um índice de arrays paralelos (IDs em ordem crescente e suas
+    linhas), 16 bytes por tweet: IDs novos, maiores que os anteriores, são anexados
+    ao fim; IDs antigos (importações) ficam em um dicionário pequeno, intercalado nos
+    arrays quando cresce.
+
+    Atributos:
+        __ids (array): Coluna de IDs dos tweets.
+        __autores (array): Coluna de IDs numéricos dos autores.
+        __timestamps (array): Coluna de datas de postagem, em microssegundos desde a época.
+        __offsets (array): Início de cada mensagem no bloco de texto (com uma posição extra no fim).
+        __texto (bytearray): Mensagens concatenadas, codificadas em UTF-8.
+        __id_autores (Dict[str, int]): ID numérico de cada nome de autor.
+        __nomes (List[str]): Nome de cada autor, indexado pelo ID numérico.
+        __indice (Tuple[array, array, Dict[int, int]]): IDs em ordem crescente, a linha de
+            cada um e a linha dos IDs antigos ainda não intercalados (trocados juntos).
+
+    Exemplo de uso:
+        store = TweetStore()
+        twitter = MyTwitter(tweetstore=store)
+    """
+
+    def __init__(self) -> None:
+        """
+        Inicializa o armazenamento vazio.
+        """
+        self.__ids = array('q')
+        self.__autores = array('q')
+        self.__timestamps = array('q')
+        self.__offsets = array('Q', [0])
+        self.__texto = bytearray()
+        self.__id_autores: Dict[str, int] = {}
+        self.__nomes: List[str] = []
+        self.__indice: Tuple[array, array, Dict[int, int]] = (array('q'), array('q'), {})
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def adicionar(self, tweet) -> int:
+        """
+        Grava um tweet nas colunas.
+
+        Args:
+            tweet (Tweet): Tweet a ser gravado.
+
+        Returns:
+            int: Posição (linha) do tweet no armazenamento.
+        """
+        usuario = tweet.get_usuario()
+        autor = self.__id_autores.get(usuario)
+        if autor is None:
+            autor = self.__id_autores[usuario] = len(self.__nomes)
+            self.__nomes.append(usuario)
+        self.__ids.append(tweet.get_id())
+        self.__autores.append(autor)
+        self.__timestamps.append(tweet.get_timestamp())
+        self.__texto += tweet.get_mensagem().encode('utf-8')
+        self.__offsets.append(len(self.__texto))
+        linha = len(self.__ids) - 1
+        self.__indexar(tweet.get_id(), linha)
+        return linha
+
+    def adicionar_bloco(self, bloco: Dict[str, list]) -> range:
+        """
+        Grava de uma vez um bloco de tweets em colunas (por exemplo, um bloco 'tweets'
+        de MyTwitter.export), estendendo cada coluna sem criar objetos Tweet.
+
+        Args:
+            bloco (Dict[str, list]): Listas paralelas 'id', 'usuario', 'timestamp' e 'mensagem'.
+
+        Returns:
+            range: Posições (linhas) dos tweets gravados.
+        """
+        inicio = len(self.__ids)
+        for usuario in bloco['usuario']:
+            if usuario not in self.__id_autores:
+                self.__id_autores[usuario] = len(self.__nomes)
+                self.__nomes.append(usuario)
+        self.__ids.extend(bloco['id'])
+        self.__autores.extend(self.__id_autores[usuario] for usuario in bloco['usuario'])
+        self.__timestamps.extend(bloco['timestamp'])
+        for mensagem in bloco['mensagem']:
+            self.__texto += mensagem.encode('utf-8')
+            self.__offsets.append(len(self.__texto))
+        for linha, tweet_id in enumerate(bloco['id'], inicio):
+            self.__indexar(tweet_id, linha)
+        return range(inicio, len(self.__ids))
+
+    def __indexar(self, tweet_id: int, linha: int) -> None:
+        ids, linhas, fora_de_ordem = self.__indice
+        if not ids or tweet_id > ids[-1]:
+            linhas.append(linha) # antes do ID: leitores só encontram IDs com linha
+            ids.append(tweet_id)
+            return
+        fora_de_ordem[tweet_id] = linha
+        if len(fora_de_ordem) > max(1024, len(ids) // 8):
+            pares = sorted(chain(zip(ids, linhas), fora_de_ordem.items()))
+            self.__indice = (array('q', (par[0] for par in pares)), array('q', (par[1] for par in pares)), {})
+
+    def buscar(self, tweet_id: int) -> TweetView | None:
+        """
+        Retorna a visão do tweet com o ID informado, ou None se ele não estiver no armazenamento.
+        """
+        ids, linhas, fora_de_ordem = self.__indice
+        posicao = bisect_left(ids, tweet_id)
+        if posicao < len(ids) and ids[posicao] == tweet_id:
+            return TweetView(self, linhas[posicao])
+        linha = fora_de_ordem.get(tweet_id)
+        return None if linha is None else TweetView(self, linha)
+
+    def sequencia_autor(self) -> TweetsAutor:
+        """
+        Cria uma sequência vazia de tweets de um autor, usada no lugar da lista do Perfil.
+        """
+        return TweetsAutor(self)
+
+    def tweet(self, linha: int) -> TweetView:
+        """
+        Retorna a visão do tweet gravado na linha informada.
+        """
+        return TweetView(self, linha)
+
+    def get_id(self, linha: int) -> int:
+        """
+        Retorna o ID do tweet na linha informada.
+        """
+        return self.__ids[linha]
+
+    def get_usuario(self, linha: int) -> str:
+        """
+        Retorna o nome do autor do tweet na linha informada.
+        """
+        return self.__nomes[self.__autores[linha]]
+
+    def get_mensagem(self, linha: int) -> str:
+        """
+        Retorna a mensagem do tweet na linha informada.
+        """
+        return self.__texto[self.__offsets[linha]:self.__offsets[linha + 1]].decode('utf-8')
+
+    def get_timestamp(self, linha: int) -> int:
+        """
+        Retorna o timestamp (microssegundos) do tweet na linha informada.
+        """
+        return self.__timestamps[linha]
+
+    def colunas(self) -> Dict[str, memoryview]:
+        """
+        Retorna as colunas como memoryview, sem cópia (podem ser envolvidas por
+        numpy.frombuffer). As visões devem ser liberadas antes de novas gravações.
+        """
+        return {
+            'id': memoryview(self.__ids),
+            'autor': memoryview(self.__autores),
+            'timestamp': memoryview(self.__timestamps),
+            'offset': memoryview(self.__offsets),
+            'texto': memoryview(self.__texto),
+        }
+
+    def contar_por_autor(self, inicio: datetime | None = None, fim: datetime | None = None) -> Dict[str, int]:
+        """
+        Conta os tweets de cada autor no intervalo [inicio, fim), percorrendo
+        apenas as colunas de autor e timestamp.
+
+        Args:
+            inicio (datetime | None): Início do intervalo (inclusivo).
+            fim (datetime | None): Fim do intervalo (exclusivo).
+
+        Returns:
+            Dict[str, int]: Número de tweets por nome de autor (apenas autores com tweets).
+        """
+        minimo = -2**63 if inicio is None else int(inicio.timestamp() * 1_000_000)
+        maximo = 2**63 - 1 if fim is None else int(fim.timestamp() * 1_000_000)
+
+        if np is not None:
+            timestamps = np.frombuffer(self.__timestamps, dtype=np.int64)
+            autores = np.frombuffer(self.__autores, dtype=np.int64)
+            contagem = np.bincount(autores[(timestamps >= minimo) & (timestamps < maximo)], minlength=len(self.__nomes))
+            del timestamps, autores # libera os buffers exportados pelos arrays
+            return {self.__nomes[autor]: int(n) for autor, n in enumerate(contagem) if n}
+
+        if inicio is None and fim is None:
+            contagem = Counter(self.__autores)
+        else:
+            contagem = Counter(compress(self.__autores, (minimo <= t < maximo for t in self.__timestamps)))
+        return {self.__nomes[autor]: n for autor, n in contagem.items()}
@@ -7,23 +7,21 @@ def usuarios_padrao(twitter: MyTwitter) -> None:
   :param twitter: Classe que gerencia o sistema
   """
 
-  twitter.criar_perfil(PessoaFisica('Rodrigo','457.602.897-34'))
-  twitter.criar_perfil(PessoaFisica('Clara','684.641.648-73'))
-  twitter.criar_perfil(PessoaFisica('Ryan','187.179.932-82'))
-  twitter.criar_perfil(PessoaFisica('Arthur','309.855.127-96'))
-  twitter.criar_perfil(PessoaFisica('Jolyne','587.157.833-65'))
-  twitter.criar_perfil(PessoaFisica('Rakon','486.564.425-41'))
-  twitter.criar_perfil(PessoaFisica('Marshal','481.878.918-35'))
-  twitter.criar_perfil(PessoaFisica('Francisca','740.515.397-12'))
-  twitter.criar_perfil(PessoaFisica('Nana','656.984.171-45'))
-  twitter.criar_perfil(PessoaFisica('Jade','710.361.119-58'))
-
-  twitter.criar_perfil(PessoaJuridica('Xuiter_Oficial','123.231.4444.69'))
-  twitter.criar_perfil(PessoaJuridica('Tech_Master', '987.654.3210.12'))
-  twitter.criar_perfil(PessoaJuridica('Mega_Stores', '456.789.1234.56'))
-  twitter.criar_perfil(PessoaJuridica('Fast_Solutions', '321.654.9876.34'))
-  twitter.criar_perfil(PessoaJuridica('Alpha_Systems', '159.753.4862.90'))
-
-  
-  
+  twitter.bulk_load(perfis=[
+    PessoaFisica('Rodrigo','457.602.897-34'),
+    PessoaFisica('Clara','684.641.648-73'),
+    PessoaFisica('Ryan','187.179.932-82'),
+    PessoaFisica('Arthur','309.855.127-96'),
+    PessoaFisica('Jolyne','587.157.833-65'),
+    PessoaFisica('Rakon','486.564.425-41'),
+    PessoaFisica('Marshal','481.878.918-35'),
+    PessoaFisica('Francisca','740.515.397-12'),
+    PessoaFisica('Nana','656.984.171-45'),
+    PessoaFisica('Jade','710.361.119-58'),
 
+    PessoaJuridica('Xuiter_Oficial','123.231.4444.69'),
+    PessoaJuridica('Tech_Master', '987.654.3210.12'),
+    PessoaJuridica('Mega_Stores', '456.789.1234.56'),
+    PessoaJuridica('Fast_Solutions', '321.654.9876.34'),
+    PessoaJuridica('Alpha_Systems', '159.753.4862.90'),
+  ])
@@ -59,4 +59,32 @@ class PJSException(Exception):
   Exceção para usuário já seguido.
   """
   def __init__(self):
-    super().__init__(f"Usuário já seguido.")
\ No newline at end of file
+    super().__init__(f"Usuário já seguido.")
+
+class PNSException(Exception):
+  """
+  Exceção para usuário não seguido.
+  """
+  def __init__(self):
+    super().__init__(f"Usuário não seguido.")
+
+class PBException(Exception):
+  """
+  Exceção para perfil bloqueado.
+  """
+  def __init__(self, usuario):
+    super().__init__(f"Perfil '{usuario}' bloqueado")
+
+class TIException(Exception):
+  """
+  Exceção para tweet inexistente.
+  """
+  def __init__(self, id):
+    super().__init__(f"Tweet {id} inexistente")
+
+class TEException(Exception):
+  """
+  Exceção para tweet já existente (ID repetido).
+  """
+  def __init__(self, id):
+    super().__init__(f"Tweet {id} já existente")
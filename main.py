@@ -1,4 +1,5 @@
 import locale
+import os
 from typing import List
 from classes import *
 from rich.console import Console
@@ -119,9 +120,10 @@ def exibir_perfil(twitter: MyTwitter, usuario: str) -> None:
    perfil_text=Text('')
    i = (f"{usuario.capitalize()}")
    j = f"{twitter.get_instance_perfil(usuario)}"
-   perfil_text.append(f"{len(twitter.tweets(usuario))} tweets")
-   perfil_text.append(f" \n{len(twitter.seguidores(usuario))} seguidores")
-   perfil_text.append(f" \n{len(twitter.seguidos(usuario))} seguindo")
+   stats = twitter.perfil_stats(usuario)
+   perfil_text.append(f"{stats['tweets']} tweets")
+   perfil_text.append(f" \n{stats['seguidores']} seguidores")
+   perfil_text.append(f" \n{stats['seguidos']} seguindo")
    console.print(Panel(perfil_text, border_style="#666666", width=30, title = i, subtitle=j))
 
 
@@ -151,15 +153,12 @@ def exibir_menu_perfil(twitter: MyTwitter, usuario: str) -> int:
          return opcao
 
 # Loop principal
-def main():
-   """Executa o fluxo principal do programa"""
-
-   # Inicializando MyTwitter e a função geradora de IDs
-   twitter = MyTwitter()
-   gerador_global = gerador_id()
+def executar(twitter: MyTwitter, gerador_global: GeradorSnowflake):
+   """Executa o laço de menus do programa
 
-   # Cadastrando usuários default
-   usuarios_padrao(twitter)
+   :param twitter: Instância do MyTwitter usada pelos menus
+   :param gerador_global: Gerador de IDs dos tweets
+   """
 
    while True:
       try:
@@ -267,5 +266,23 @@ def main():
       back_menu()
 
 
+def main():
+   """Executa o fluxo principal do programa"""
+
+   # Inicializando MyTwitter (com os dados salvos em disco) e o gerador de IDs
+   repositorio = RepositorioUsuariosPersistente(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados'))
+   twitter = MyTwitter(repositorio=repositorio)
+   gerador_global = GeradorSnowflake()
+
+   # Cadastrando usuários default na primeira execução
+   if not repositorio.get_usuarios():
+      usuarios_padrao(twitter)
+
+   try:
+      executar(twitter, gerador_global)
+   finally:
+      repositorio.fechar() # grava os eventos pendentes mesmo se o programa for interrompido
+
+
 if __name__ == '__main__':
    main()
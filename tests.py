@@ -1,10 +1,29 @@
+import asyncio
+import io
+import json
+import os
+import random
+import tempfile
+import threading
 import unittest
 from datetime import datetime, timedelta
 from classes.perfis import Perfil, PessoaFisica, PessoaJuridica
 from classes.repositorio import RepositorioUsuarios
+from classes.armazenamento import RepositorioUsuariosPersistente
+from classes.assincrono import AsyncMyTwitter
+from classes.servidor import servir
+from classes.busca import ListaPostagens
+from classes.autocompletar import IndiceUsuarios
+from classes.exportacao import blocos_exportacao, ler_exportacao
+from classes.repositorio_sqlite import RepositorioUsuariosSQLite
+from classes.snapshot import RepositorioUsuariosMapeado, RepositorioUsuariosPersistenteMapeado, gravar_snapshot
+from classes.metricas import Metricas
 from classes.mytwitter import MyTwitter
-from classes.tweet import Tweet, gerador_id
-from exceptions import PEException, PDException, PIException, MFPException, SIException, UJCException, UNCException, NFPException
+from classes.topicos import Tendencias
+from classes.shards import MyTwitterShardeado, shard_de
+from classes.tweet import Tweet, gerador_id, GeradorSnowflake
+from classes.tweetstore import TweetStore, TweetView
+from exceptions import PEException, PDException, PIException, MFPException, SIException, UJCException, UNCException, NFPException, PJSException, PNSException, PBException, TIException, TEException
 
 class TestTweet(unittest.TestCase):
   """Testes para a classe Tweet"""
@@ -64,6 +83,65 @@ class TestTweet(unittest.TestCase):
 
     self.assertTrue(antes <= tweet.get_data_postagem() <= depois)
 
+  def test_representacao_compacta(self):
+    """Testa se o tweet usa __slots__, autor internado e timestamp inteiro."""
+    tweet1 = self.criar_tweet(usuario=''.join(['Lin', 'coln']), mensagem='um')
+    tweet2 = self.criar_tweet(usuario=''.join(['Linc', 'oln']), mensagem='dois')
+
+    self.assertFalse(hasattr(tweet1, '__dict__'))
+    self.assertIs(tweet1.get_usuario(), tweet2.get_usuario())
+    self.assertIsInstance(tweet1.get_timestamp(), int)
+    self.assertAlmostEqual(tweet1.get_data_postagem().timestamp(), tweet1.get_timestamp() / 1_000_000, places=5)
+
+
+class TestGeradorSnowflake(unittest.TestCase):
+  """Testes para o gerador de IDs Snowflake"""
+
+  def test_ids_unicos_entre_threads(self):
+    """Testa se várias threads geram IDs sem colisão e sem erro."""
+    gerador = GeradorSnowflake()
+    resultados = [[] for _ in range(8)]
+
+    def gerar(saida):
+      for _ in range(5000):
+        saida.append(next(gerador))
+
+    threads = [threading.Thread(target=gerar, args=(saida,)) for saida in resultados]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    ids = [id for saida in resultados for id in saida]
+    self.assertEqual(len(set(ids)), 8 * 5000)
+    for saida in resultados:
+      self.assertEqual(saida, sorted(saida))
+
+  def test_reservar_bloco(self):
+    """Testa se a reserva em bloco retorna IDs crescentes e posteriores aos anteriores."""
+    gerador = GeradorSnowflake()
+    primeiro = next(gerador)
+    bloco = gerador.reservar(10000)
+    self.assertEqual(len(set(bloco)), 10000)
+    self.assertEqual(bloco, sorted(bloco))
+    self.assertLess(primeiro, bloco[0])
+    self.assertLess(bloco[-1], next(gerador))
+
+  def test_workers_diferentes(self):
+    """Testa se workers diferentes nunca geram o mesmo ID."""
+    ids1 = set(GeradorSnowflake(worker_id=1).reservar(1000))
+    ids2 = set(GeradorSnowflake(worker_id=2).reservar(1000))
+    self.assertFalse(ids1 & ids2)
+    with self.assertRaises(ValueError):
+      GeradorSnowflake(worker_id=1024)
+
+  def test_uso_no_tweet(self):
+    """Testa se o gerador pode substituir gerador_id() na criação de tweets."""
+    gerador = GeradorSnowflake()
+    tweet1 = Tweet('Clara', 'um', gerador)
+    tweet2 = Tweet('Clara', 'dois', gerador)
+    self.assertLess(tweet1.get_id(), tweet2.get_id())
+
 
 class TestMyTwitter(unittest.TestCase):
 
@@ -104,6 +182,10 @@ class TestMyTwitter(unittest.TestCase):
         self.twitter.tweetar("usuario1", "a"*141, self.gerador_id)
     with self.assertRaises(PIException):
         self.twitter.tweetar("inexistente", "Mensagem", self.gerador_id)
+    with self.assertRaises(TEException):
+        self.twitter.tweetar("empresa1", "ID repetido", iter([1]))
+    self.assertEqual(self.twitter.get_tweet(1).get_mensagem(), "Primeiro tweet!")
+    self.assertEqual(self.twitter.tweets("empresa1"), [])
 
   def test_timeline(self):
     self.twitter.tweetar("usuario1", "Tweet na timeline", self.gerador_id)
@@ -111,6 +193,30 @@ class TestMyTwitter(unittest.TestCase):
     with self.assertRaises(PIException):
         self.twitter.timeline("inexistente")
 
+  def test_timeline_paginada(self):
+    self.twitter.seguir("usuario1", "empresa1")
+    for i in range(3):
+        self.twitter.tweetar("usuario1", f"tweet {i}", self.gerador_id)
+        self.twitter.tweetar("empresa1", f"anuncio {i}", self.gerador_id)
+    completa = self.twitter.timeline("usuario1")
+    self.assertEqual([t.get_id() for t in completa], [6, 5, 4, 3, 2, 1])
+    pagina1 = self.twitter.timeline("usuario1", limit=4)
+    self.assertEqual(pagina1, completa[:4])
+    pagina2 = self.twitter.timeline("usuario1", limit=4, before_id=pagina1[-1].get_id())
+    self.assertEqual(pagina2, completa[4:])
+
+  def test_get_tweet(self):
+    self.twitter.tweetar("usuario1", "um", self.gerador_id)
+    self.twitter.tweetar("empresa1", "dois", self.gerador_id)
+    self.assertEqual(self.twitter.get_tweet(2).get_mensagem(), "dois")
+    with self.assertRaises(TIException):
+        self.twitter.get_tweet(42)
+    self.assertEqual([t.get_id() for t in self.twitter.get_tweets_by_ids([2, 42, 1])], [2, 1])
+    self.twitter.cancelar_perfil("empresa1")
+    with self.assertRaises(PDException):
+        self.twitter.get_tweet(2)
+    self.assertEqual([t.get_id() for t in self.twitter.get_tweets_by_ids([2, 1])], [1])
+
   def test_seguir(self):
     self.twitter.seguir("usuario1", "empresa1")
     self.assertIn(self.perfil1, self.twitter.seguidores("empresa1"))
@@ -120,21 +226,945 @@ class TestMyTwitter(unittest.TestCase):
     with self.assertRaises(PIException):
         self.twitter.seguir("usuario1", "inexistente")
 
+  def test_seguir_duplicado(self):
+    self.twitter.seguir("usuario1", "empresa1")
+    with self.assertRaises(PJSException):
+        self.twitter.seguir("usuario1", "EMPRESA1")
+    with self.assertRaises(SIException):
+        self.twitter.seguir("usuario1", "USUARIO1")
+    self.assertEqual(len(self.twitter.seguidores("empresa1")), 1)
+
+  def test_deixar_de_seguir(self):
+    self.twitter.seguir("usuario1", "empresa1")
+    self.twitter.deixar_de_seguir("usuario1", "empresa1")
+    self.assertEqual(self.twitter.seguidores("empresa1"), [])
+    self.assertEqual(self.twitter.seguidos("usuario1"), [])
+    with self.assertRaises(PNSException):
+        self.twitter.deixar_de_seguir("usuario1", "empresa1")
+    self.twitter.seguir("usuario1", "empresa1")  # pode voltar a seguir
+
+  def test_bloquear(self):
+    self.twitter.seguir("usuario1", "empresa1")
+    self.twitter.seguir("empresa1", "usuario1")
+    self.twitter.bloquear("empresa1", "usuario1")
+    self.assertEqual(self.twitter.seguidores("empresa1"), [])
+    self.assertEqual(self.twitter.seguidores("usuario1"), [])
+    with self.assertRaises(PBException):
+        self.twitter.seguir("usuario1", "empresa1")
+    with self.assertRaises(PBException):
+        self.twitter.seguir("empresa1", "usuario1")
+    with self.assertRaises(PBException):
+        self.twitter.bloquear("empresa1", "usuario1")
+
   def test_numero_seguidores(self):
     self.twitter.seguir("usuario1", "empresa1")
     self.assertEqual(self.twitter.numero_seguidores("empresa1"), 1)
 
+  def test_perfil_stats(self):
+    self.twitter.criar_perfil(PessoaFisica("usuario2", "789"))
+    self.twitter.seguir("usuario1", "empresa1")
+    self.twitter.seguir("usuario2", "empresa1")
+    self.twitter.seguir("empresa1", "usuario2")
+    self.twitter.tweetar("empresa1", "Promoção!", self.gerador_id)
+    self.assertEqual(self.twitter.perfil_stats("empresa1"), {'tweets': 1, 'seguidores': 2, 'seguidos': 1})
+    self.twitter.cancelar_perfil("usuario2")
+    self.assertEqual(self.twitter.perfil_stats("empresa1"), {'tweets': 1, 'seguidores': 1, 'seguidos': 0})
+    self.assertEqual(self.twitter.numero_seguidores("empresa1"), 1)
+    self.twitter.deixar_de_seguir("empresa1", "usuario2")
+    self.twitter.deixar_de_seguir("usuario1", "empresa1")
+    self.assertEqual(self.twitter.perfil_stats("empresa1"), {'tweets': 1, 'seguidores': 0, 'seguidos': 0})
+    self.assertEqual(self.twitter.perfil_stats("usuario1"), {'tweets': 0, 'seguidores': 0, 'seguidos': 0})
+
   def test_usuarios_cadastrados(self):
     usuarios = self.twitter.usuarios_cadastrados()
     self.assertIn("usuario1", usuarios)
     self.assertIn("empresa1", usuarios)
 
+  def test_listagens_paginadas(self):
+    for i in range(6):
+      self.twitter.criar_perfil(Perfil(f"f{i}"))
+      self.twitter.seguir(f"f{i}", "empresa1")
+    pagina = self.twitter.seguidores("empresa1", limit=4)
+    self.assertEqual([perfil.get_usuario() for perfil in pagina], ["f0", "f1", "f2", "f3"])
+    self.twitter.deixar_de_seguir("f4", "empresa1")
+    self.twitter.cancelar_perfil("f5")
+    self.twitter.seguir("usuario1", "empresa1")
+    proxima = self.twitter.seguidores("empresa1", limit=4, cursor=pagina.cursor)
+    self.assertEqual([perfil.get_usuario() for perfil in proxima], ["usuario1"])
+    self.assertIsNone(proxima.cursor)
+    self.assertEqual([perfil.get_usuario() for perfil in self.twitter.iter_seguidos("f0")], ["empresa1"])
+    with self.assertRaises(PIException):
+      self.twitter.iter_seguidores("inexistente")
+
+    pagina = self.twitter.usuarios_cadastrados(limit=3)
+    self.assertEqual(pagina, ["usuario1", "empresa1", "f0"])
+    restantes = list(self.twitter.iter_usuarios_cadastrados(pagina.cursor))
+    self.assertEqual(restantes, ["f1", "f2", "f3", "f4", "f5 (inativo)"])
+    self.assertEqual(self.twitter.usuarios_cadastrados(), pagina + restantes)
+
   def test_get_instance_perfil(self):
     self.assertEqual(self.twitter.get_instance_perfil("usuario1"), "PessoaFisica")
     self.assertEqual(self.twitter.get_instance_perfil("empresa1"), "PessoaJuridica")
     with self.assertRaises(PIException):
         self.twitter.get_instance_perfil("inexistente")
 
+  def test_bulk_load(self):
+    relatorio = self.twitter.bulk_load(
+      perfis=[Perfil("ana"), {'usuario': "bia", 'tipo': "PessoaFisica", 'documento': "789"}, Perfil("USUARIO1"), Perfil("")],
+      follows=[("ana", "bia"), {'seguidor': "bia", 'seguido': "usuario1"}, ("ana", "bia"), ("ana", "ana"), ("ana", "ninguem")],
+      tweets=[("bia", "oi"), ("ana", " "), {'usuario': "ana", 'mensagem': "antigo", 'id': 7, 'timestamp': 1}, ("bia", "de novo")],
+      gerador_id=self.gerador_id)
+    self.assertEqual((relatorio['perfis'], relatorio['follows'], relatorio['tweets']), (2, 2, 3))
+    erros = [type(rejeitado['erro']) for rejeitado in relatorio['rejeitados']]
+    self.assertEqual(erros, [PEException, NFPException, PJSException, SIException, PIException, MFPException])
+    self.assertEqual(self.twitter.get_instance_perfil("bia"), "PessoaFisica")
+    self.assertEqual(self.twitter.perfil_stats("bia"), {'tweets': 2, 'seguidores': 1, 'seguidos': 1})
+    # a timeline segue a ordem dos IDs, a mesma do cursor before_id
+    self.assertEqual([t.get_mensagem() for t in self.twitter.timeline("ana")], ["antigo", "de novo", "oi"])
+    self.assertEqual(self.twitter.get_tweet(7).get_mensagem(), "antigo")
+    relatorio = self.twitter.bulk_load(tweets=[{'usuario': "ana", 'mensagem': "repetido", 'id': 7, 'timestamp': 2}])
+    self.assertIsInstance(relatorio['rejeitados'][0]['erro'], TEException)
+
+  def test_bulk_load_ordem_ids(self):
+    self.twitter.bulk_load(tweets=[{'usuario': "usuario1", 'mensagem': "base", 'id': 10, 'timestamp': 100}])
+    relatorio = self.twitter.bulk_load(tweets=[
+      {'usuario': "usuario1", 'mensagem': "id maior, mais antigo", 'id': 11, 'timestamp': 50},
+      {'usuario': "usuario1", 'mensagem': "id menor, mais novo", 'id': 9, 'timestamp': 150},
+      {'usuario': "usuario1", 'mensagem': "depois", 'id': 20, 'timestamp': 200},
+      {'usuario': "usuario1", 'mensagem': "contradiz o anterior", 'id': 15, 'timestamp': 300},
+      {'usuario': "empresa1", 'mensagem': "outro autor", 'id': 15, 'timestamp': 1},
+    ])
+    self.assertEqual(relatorio['tweets'], 2)
+    self.assertEqual([rejeitado['linha']['id'] for rejeitado in relatorio['rejeitados']], [11, 9, 15])
+    self.assertTrue(all(isinstance(rejeitado['erro'], TEException) for rejeitado in relatorio['rejeitados']))
+    self.assertEqual([t.get_id() for t in self.twitter.tweets("usuario1")], [20, 10])
+    self.assertEqual(self.twitter.get_tweet(10).get_mensagem(), "base")
+
+  def test_paginacao_com_ids_importados(self):
+    importado = next(GeradorSnowflake())
+    self.twitter.bulk_load(tweets=[{'usuario': "empresa1", 'mensagem': "importado", 'id': importado, 'timestamp': 1}])
+    self.twitter.seguir("usuario1", "empresa1")
+    for i in range(2):
+      self.twitter.tweetar("usuario1", f"tweet {i}", self.gerador_id)
+    paginas, cursor = [], None
+    while pagina := self.twitter.timeline("usuario1", limit=1, before_id=cursor):
+      paginas.append(pagina[0].get_mensagem())
+      cursor = pagina[0].get_id()
+    self.assertEqual(paginas, ["importado", "tweet 1", "tweet 0"])
+    self.assertEqual(paginas, [t.get_mensagem() for t in self.twitter.timeline("usuario1")])
+    with self.assertRaises(TEException):
+      self.twitter.tweetar("empresa1", "id fora de ordem", self.gerador_id)
+
+  def test_export(self):
+    self.twitter.seguir("usuario1", "empresa1")
+    for i in range(5):
+      self.twitter.tweetar("empresa1" if i % 2 else "usuario1", f"tweet {i}", self.gerador_id)
+    self.twitter.cancelar_perfil("usuario1")
+    arquivo = io.StringIO()
+    contagem = self.twitter.export(arquivo, tamanho_bloco=2)
+    self.assertEqual(contagem, {'perfis': 2, 'follows': 1, 'bloqueios': 0, 'tweets': 5})
+
+    arquivo.seek(0)
+    blocos = list(ler_exportacao(arquivo))
+    self.assertEqual(blocos[0], {'secao': 'cabecalho', 'versao': 1, 'corte': 5, 'perfis': 2})
+    self.assertTrue(all(len(bloco['id']) <= 2 for bloco in blocos if bloco['secao'] == 'tweets'))
+    store = TweetStore()
+    for bloco in blocos:
+      if bloco['secao'] == 'tweets':
+        store.adicionar_bloco(bloco)
+    self.assertEqual(sorted(store.get_id(linha) for linha in range(len(store))), [1, 2, 3, 4, 5])
+    self.assertEqual(store.contar_por_autor(), {'usuario1': 3, 'empresa1': 2})
+
+    self.assertEqual([linha for bloco in blocos if bloco['secao'] == 'follows' for linha in bloco['linhas']],
+                     [["usuario1", "empresa1"]])
+    copia = MyTwitter()
+    copia.bulk_load(perfis=[linha for bloco in blocos if bloco['secao'] == 'perfis' for linha in bloco['linhas']])
+    self.assertEqual(copia.usuarios_cadastrados(), ["usuario1 (inativo)", "empresa1"])
+
+  def test_export_ponto_de_corte(self):
+    self.twitter.tweetar("usuario1", "antes", self.gerador_id)
+    self.twitter.seguir("empresa1", "usuario1")
+    blocos = blocos_exportacao(self.twitter._MyTwitter__repositorio)
+    self.assertEqual(next(blocos), {'secao': 'cabecalho', 'versao': 1, 'corte': 1, 'perfis': 2})
+    self.twitter.tweetar("usuario1", "depois", self.gerador_id)
+    self.twitter.seguir("usuario1", "empresa1")
+    self.twitter.criar_perfil(Perfil("novo"))
+    self.twitter.seguir("novo", "usuario1")
+    blocos = list(blocos)
+    self.assertEqual([bloco['mensagem'] for bloco in blocos if bloco['secao'] == 'tweets'], [["antes"]])
+    self.assertEqual([bloco['linhas'] for bloco in blocos if bloco['secao'] == 'follows'], [[["empresa1", "usuario1"]]])
+    self.assertEqual([linha['usuario'] for bloco in blocos if bloco['secao'] == 'perfis' for linha in bloco['linhas']],
+                     ["usuario1", "empresa1"])
+
+  def test_bulk_load_arquivos(self):
+    perfis = io.StringIO('usuario,tipo,documento\nana,PessoaJuridica,111\nbia,,\n')
+    tweets = io.StringIO('{"usuario": "ana", "mensagem": "via jsonl"}\n\n{"usuario": "bia"}\n')
+    relatorio = self.twitter.bulk_load(perfis=perfis, follows=io.StringIO('seguidor,seguido\nbia,ana\n'), tweets=tweets,
+                                       gerador_id=self.gerador_id)
+    self.assertEqual((relatorio['perfis'], relatorio['follows'], relatorio['tweets']), (2, 1, 1))
+    self.assertIsInstance(relatorio['rejeitados'][0]['erro'], KeyError)
+    self.assertEqual(self.twitter.get_instance_perfil("ana"), "PessoaJuridica")
+    self.assertEqual([t.get_mensagem() for t in self.twitter.timeline("bia")], ["via jsonl"])
+
+  def test_buscar_tweets(self):
+    self.twitter.tweetar("usuario1", "Promoção de verão na loja", self.gerador_id)
+    self.twitter.tweetar("empresa1", "PROMOCAO relâmpago", self.gerador_id)
+    self.twitter.tweetar("usuario1", "o verão chegou", self.gerador_id)
+    self.twitter.bulk_load(tweets=[{"usuario": "empresa1", "mensagem": "promoção antiga de verao", "id": 0, "timestamp": 1}])
+    mensagens = lambda consulta, **kwargs: [t.get_mensagem() for t in self.twitter.buscar_tweets(consulta, **kwargs)]
+    self.assertEqual(mensagens("promocao"), ["PROMOCAO relâmpago", "Promoção de verão na loja", "promoção antiga de verao"])
+    self.assertEqual(mensagens("Verão promoção"), ["Promoção de verão na loja", "promoção antiga de verao"])
+    self.assertEqual(mensagens("verao", limit=1), ["o verão chegou"])
+    self.assertEqual(mensagens("inverno verao"), [])
+    self.twitter.cancelar_perfil("empresa1")
+    self.assertEqual(mensagens("promocao"), ["Promoção de verão na loja"])
+
+  def test_hashtags_e_mencoes(self):
+    ids = [self.twitter.tweetar(usuario, mensagem, self.gerador_id).get_id() for usuario, mensagem in (
+      ("usuario1", "Chegou o #Verão! @empresa1"),
+      ("empresa1", "#verao #promo para @Usuario1 e @usuario1"),
+      ("usuario1", "#promo"),
+    )]
+    self.assertEqual([t.get_id() for t in self.twitter.tweets_por_hashtag("#verao")], [ids[1], ids[0]])
+    self.assertEqual([t.get_id() for t in self.twitter.tweets_por_hashtag("Verão", before_id=ids[1])], [ids[0]])
+    self.assertEqual([t.get_id() for t in self.twitter.mencoes("usuario1")], [ids[1]])
+    self.assertEqual(self.twitter.tendencias(1), [("promo", 2)])
+    with self.assertRaises(PIException):
+      self.twitter.mencoes("inexistente")
+
+  def test_tendencias_janela(self):
+    agora = [1000.0]
+    tendencias = Tendencias(janela=60, largura_balde=10, relogio=lambda: agora[0])
+    tendencias.registrar(["a", "b"], 995)
+    tendencias.registrar(["b"], 1000)
+    tendencias.registrar(["c"], 900)  # fora da janela
+    self.assertEqual(tendencias.topicos(), [("b", 2), ("a", 1)])
+    agora[0] = 1055  # o balde de 990-1000 sai da janela
+    self.assertEqual(tendencias.topicos(), [("b", 1)])
+
+  def test_sugerir_usuarios(self):
+    twitter = MyTwitter()
+    for nome in ["Ana", "anabela", "andre", "bruno"] + [f"an{i}" for i in range(40)]:
+      twitter.criar_perfil(Perfil(nome))
+    twitter.seguir("bruno", "andre")
+    twitter.seguir("ana", "andre")
+    twitter.seguir("bruno", "anabela")
+    self.assertEqual(twitter.sugerir_usuarios("AN", 3), ["andre", "anabela", "an0"])
+    self.assertEqual(twitter.sugerir_usuarios("ana"), ["anabela", "Ana"])
+    self.assertEqual(twitter.sugerir_usuarios("x"), [])
+    twitter.cancelar_perfil("andre")
+    twitter.seguir("an39", "an7")
+    self.assertEqual(twitter.sugerir_usuarios("an", 3), ["an7", "anabela", "an0"])
+    self.assertEqual(twitter.sugerir_usuarios("and"), ["andre"])  # inativos vêm por último
+
+  def test_sugestoes_para_seguir(self):
+    for nome in ("a", "b", "c", "d", "e", "f"):
+      self.twitter.criar_perfil(Perfil(nome))
+    for seguidor, seguido in [("a", "b"), ("a", "c"), ("b", "d"), ("b", "e"), ("c", "d"), ("e", "b")]:
+      self.twitter.seguir(seguidor, seguido)
+    self.assertEqual(self.twitter.sugestoes_para_seguir("a"), ["d", "e"])
+    self.twitter.seguir("c", "f")  # mudança a dois passos invalida o cache
+    self.twitter.seguir("b", "f")
+    self.assertEqual(self.twitter.sugestoes_para_seguir("a", 2), ["d", "f"])
+    self.twitter.seguir("a", "d")
+    self.twitter.bloquear("f", "a")
+    self.twitter.cancelar_perfil("e")
+    self.assertEqual(self.twitter.sugestoes_para_seguir("a"), [])
+    self.twitter.seguir("usuario1", "a")
+    self.assertEqual(self.twitter.sugestoes_para_seguir("usuario1"), ["d", "b", "c"])
+    self.assertEqual(self.twitter.recalcular_sugestoes(), 7)
+    self.assertEqual(self.twitter.sugestoes_para_seguir("usuario1", 2), ["d", "b"])
+    with self.assertRaises(PDException):
+      self.twitter.sugestoes_para_seguir("e")
+
+  def test_sugestoes_apos_deixar_de_seguir(self):
+    for nome in ("u", "a", "b", "x", "y"):
+      self.twitter.criar_perfil(Perfil(nome))
+    for seguidor, seguido in [("a", "x"), ("b", "y"), ("u", "a"), ("u", "b")]:
+      self.twitter.seguir(seguidor, seguido)
+    self.assertEqual(self.twitter.sugestoes_para_seguir("u"), ["x", "y"])
+    self.twitter.deixar_de_seguir("u", "a")
+    self.assertEqual(self.twitter.sugestoes_para_seguir("u"), ["y"])
+
+  def test_metricas(self):
+    metricas = Metricas()
+    twitter = MyTwitter(metricas=metricas)
+    twitter.criar_perfil(Perfil("ana"))
+    twitter.tweetar("ana", "oi", self.gerador_id)
+    twitter.timeline("ana")
+    for _ in range(2):
+      with self.assertRaises(PIException):
+        twitter.tweetar("inexistente", "oi", self.gerador_id)
+    dados = metricas.snapshot()
+    self.assertEqual(dados['chamadas'], {'criar_perfil': 1, 'tweetar': 3, 'timeline': 1})
+    self.assertEqual(dados['erros'], {'tweetar': {'PIException': 2}})
+    self.assertEqual(dados['latencia']['tweetar']['total'], 3)
+    self.assertEqual(dados['timeline_fan_in']['buckets'][0], (1, 1))
+    self.assertEqual(dados['busca_repositorio']['total'], 6) # criar_perfil busca o nome e o perfil cadastrado
+    texto = metricas.prometheus()
+    self.assertIn('mytwitter_erros_total{metodo="tweetar",excecao="PIException"} 2', texto)
+    self.assertIn('mytwitter_latencia_segundos_count{metodo="timeline"} 1', texto)
+
+
+class TestMyTwitterModoPush(unittest.TestCase):
+  """Testes das timelines materializadas (fan-out na escrita)"""
+
+  def setUp(self):
+    self.gerador_id = gerador_id()
+    self.push = MyTwitter(modo_push=True, capacidade_timeline=5, limiar_celebridade=1)
+    self.pull = MyTwitter()
+    for twitter in (self.push, self.pull):
+      for nome in ("ana", "bia", "caio", "Xuiter_Oficial"):
+        twitter.criar_perfil(Perfil(nome))
+      twitter.seguir("ana", "bia")
+      twitter.seguir("ana", "Xuiter_Oficial")
+      twitter.seguir("caio", "Xuiter_Oficial")  # Xuiter_Oficial passa do limiar
+
+  def postar(self, usuario, mensagem):
+    id = next(self.gerador_id)
+    for twitter in (self.push, self.pull):
+      twitter.tweetar(usuario, mensagem, iter([id]))
+
+  def ids(self, tweets):
+    return [tweet.get_id() for tweet in tweets]
+
+  def test_timeline_igual_ao_modo_pull(self):
+    self.postar("bia", "oi")
+    self.assertEqual(self.ids(self.push.timeline("ana", limit=3)), self.ids(self.pull.timeline("ana", limit=3)))
+    for i in range(4):
+      self.postar("Xuiter_Oficial", f"novidade {i}")
+      self.postar("bia", f"resposta {i}")
+      self.postar("ana", f"comentario {i}")
+    for limite in (1, 3, 5):
+      self.assertEqual(self.ids(self.push.timeline("ana", limit=limite)),
+                       self.ids(self.pull.timeline("ana", limit=limite)))
+    pagina = self.push.timeline("ana", limit=3)
+    self.assertEqual(self.ids(self.push.timeline("ana", limit=5, before_id=pagina[-1].get_id())),
+                     self.ids(self.pull.timeline("ana", limit=5, before_id=pagina[-1].get_id())))
+
+  def test_seguir_completa_timeline(self):
+    self.postar("caio", "primeiro")
+    self.push.timeline("bia", limit=5)  # materializa a timeline de bia
+    self.push.seguir("bia", "caio")
+    self.pull.seguir("bia", "caio")
+    self.assertEqual(self.ids(self.push.timeline("bia", limit=5)), self.ids(self.pull.timeline("bia", limit=5)))
+
+  def test_deixar_de_seguir_atualiza_timeline(self):
+    for i in range(3):
+      self.postar("bia", f"oi {i}")
+      self.postar("Xuiter_Oficial", f"novidade {i}")
+    self.push.timeline("ana", limit=5)
+    for twitter in (self.push, self.pull):
+      twitter.deixar_de_seguir("ana", "bia")
+      twitter.deixar_de_seguir("caio", "Xuiter_Oficial")  # Xuiter_Oficial volta ao fan-out
+    self.assertEqual(self.ids(self.push.timeline("ana", limit=5)), self.ids(self.pull.timeline("ana", limit=5)))
+
+  def test_reconstrucao_mantem_mais_recentes(self):
+    twitter = MyTwitter(modo_push=True, capacidade_timeline=3)
+    for nome in ("ana", "bia", "caio"):
+      twitter.criar_perfil(Perfil(nome))
+    twitter.seguir("ana", "bia")
+    for id in range(1, 5):
+      twitter.tweetar("bia", f"oi {id}", iter([id]))
+    self.assertEqual(self.ids(twitter.timeline("ana", limit=2)), [4, 3])
+    twitter.tweetar("caio", "novo", iter([5]))
+    twitter.seguir("ana", "caio")
+    self.assertEqual(self.ids(twitter.timeline("ana", limit=2)), [5, 4])
+
+  def test_seguir_apos_buffer_truncado(self):
+    timelines = []
+    for modo_push in (True, False):
+      twitter = MyTwitter(modo_push=modo_push, capacidade_timeline=3)
+      for nome in ("ana", "bia", "caio"):
+        twitter.criar_perfil(Perfil(nome))
+      twitter.seguir("ana", "bia")
+      for usuario, id in [("caio", 1), ("ana", 2), ("ana", 3), ("bia", 4), ("bia", 5)]:
+        twitter.tweetar(usuario, "oi", iter([id]))
+      twitter.timeline("ana", limit=1)
+      twitter.deixar_de_seguir("ana", "bia")
+      twitter.seguir("ana", "caio")
+      timelines.append([self.ids(twitter.timeline("ana", limit=limite)) for limite in (1, 2, 3)])
+    self.assertEqual(timelines[0], timelines[1])
+    self.assertEqual(timelines[0][1], [3, 2])
+
+
+class TestConcorrencia(unittest.TestCase):
+  """Teste de estresse: várias threads operando sobre o mesmo MyTwitter"""
+
+  NOMES = [f"u{i}" for i in range(8)]
+
+  def operar(self, twitter, gerador, semente, tweetados, erros):
+    sorteio = random.Random(semente)
+    try:
+      for _ in range(300):
+        a, b = sorteio.sample(self.NOMES, 2)
+        operacao = sorteio.random()
+        try:
+          if operacao < 0.4:
+            tweetados.append(twitter.tweetar(a, "oi", gerador).get_id())
+          elif operacao < 0.65:
+            twitter.seguir(a, b)
+          elif operacao < 0.85:
+            twitter.deixar_de_seguir(a, b)
+          elif operacao < 0.9:
+            twitter.bloquear(a, b)
+          else:
+            twitter.timeline(a, limit=10)
+        except (PJSException, PNSException, PBException, SIException):
+          pass
+    except Exception as erro:
+      erros.append(erro)
+
+  def verificar(self, twitter):
+    gerador = GeradorSnowflake()
+    for nome in self.NOMES:
+      twitter.criar_perfil(Perfil(nome))
+    tweetados, erros = [], []
+    threads = [threading.Thread(target=self.operar, args=(twitter, gerador, i, tweetados, erros)) for i in range(8)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.assertEqual(erros, [])
+    self.assertEqual(len(tweetados), len(set(tweetados)))
+    todos = [tweet.get_id() for nome in self.NOMES for tweet in twitter.tweets(nome)]
+    self.assertCountEqual(todos, tweetados)
+    for nome in self.NOMES:
+      seguidos = twitter.seguidos(nome)
+      seguidores = twitter.seguidores(nome)
+      for seguido in seguidos:
+        self.assertIn(nome, [perfil.get_usuario() for perfil in twitter.seguidores(seguido.get_usuario())])
+      self.assertEqual(twitter.perfil_stats(nome), {
+        'tweets': len(twitter.tweets(nome)), 'seguidores': len(seguidores), 'seguidos': len(seguidos)})
+
+  def test_modo_pull(self):
+    self.verificar(MyTwitter())
+
+  def test_modo_push(self):
+    self.verificar(MyTwitter(modo_push=True, capacidade_timeline=5, limiar_celebridade=3))
+
+
+class TestMyTwitterShardeado(unittest.TestCase):
+  """Testes do roteador sobre shards em processos separados"""
+
+  def setUp(self):
+    self.twitter = MyTwitterShardeado(processos=2)
+    self.addCleanup(self.twitter.fechar)
+    # "ana" e "bia" ficam no shard 0; "u4" e "u5" no shard 1
+    self.assertEqual([shard_de(nome, 2) for nome in ("ana", "bia", "u4", "u5")], [0, 0, 1, 1])
+    for nome in ("ana", "bia", "u4", "u5"):
+      self.twitter.criar_perfil(Perfil(nome))
+
+  def test_timeline_entre_shards(self):
+    self.twitter.seguir("ana", "bia")
+    self.twitter.seguir("ana", "u4")
+    tweets = [self.twitter.tweetar(nome, f"oi de {nome}") for nome in ("u4", "bia", "ana", "u4", "u5")]
+    # a timeline segue a ordem dos IDs; no mesmo milissegundo, shards diferentes
+    # se ordenam pelo worker_id, e não pela ordem exata das postagens
+    esperado = sorted((tweets[i].get_id() for i in (3, 2, 1, 0)), reverse=True)
+    self.assertEqual([tweet.get_id() for tweet in self.twitter.timeline("ana")], esperado)
+    self.assertEqual([tweet.get_id() for tweet in self.twitter.timeline("ana", limit=2, before_id=esperado[0])],
+                     esperado[1:3])
+    self.assertEqual(self.twitter.get_tweet(tweets[4].get_id()).get_usuario(), "u5")
+    self.assertEqual(self.twitter.perfil_stats("u4"), {'tweets': 2, 'seguidores': 1, 'seguidos': 0})
+
+  def test_erros_e_bloqueio_entre_shards(self):
+    with self.assertRaises(PIException):
+      self.twitter.seguir("ana", "inexistente")
+    with self.assertRaises(PEException):
+      self.twitter.criar_perfil(Perfil("U4"))
+    self.twitter.seguir("u4", "ana")
+    with self.assertRaises(PJSException):
+      self.twitter.seguir("u4", "ana")
+    self.twitter.bloquear("ana", "u4")
+    self.assertEqual(self.twitter.perfil_stats("ana")['seguidores'], 0)
+    self.assertEqual(self.twitter.perfil_stats("u4")['seguidos'], 0)
+    with self.assertRaises(PBException):
+      self.twitter.seguir("u4", "ana")
+
+  def test_cancelar_perfil_entre_shards(self):
+    self.twitter.seguir("ana", "u4")
+    self.twitter.seguir("u5", "u4")
+    self.twitter.cancelar_perfil("ana")
+    self.assertEqual(self.twitter.perfil_stats("u4")['seguidores'], 1)
+    self.assertEqual([perfil.get_usuario() for perfil in self.twitter.seguidores("u4")], ["u5"])
+    self.assertCountEqual(self.twitter.usuarios_cadastrados(), ["ana (inativo)", "bia", "u4", "u5"])
+
+  def test_listagens_paginadas(self):
+    for nome in ("bia", "u4", "u5"):
+      self.twitter.seguir(nome, "ana")
+    pagina = self.twitter.seguidores("ana", limit=2)
+    self.assertEqual([perfil.get_usuario() for perfil in pagina], ["bia", "u4"])
+    self.assertEqual([perfil.get_usuario() for perfil in self.twitter.iter_seguidores("ana", pagina.cursor)], ["u5"])
+    pagina = self.twitter.usuarios_cadastrados(limit=3)
+    self.assertEqual(pagina, ["ana", "bia", "u4"])
+    self.assertEqual(self.twitter.usuarios_cadastrados(limit=3, cursor=pagina.cursor), ["u5"])
+    self.assertEqual(list(self.twitter.iter_usuarios_cadastrados()), ["ana", "bia", "u4", "u5"])
+
+  def test_tweetar_lote(self):
+    resultado = self.twitter.tweetar_lote([("ana", "um"), ("u5", "dois"), ("zz", "tres"), ("bia", "")])
+    self.assertEqual(resultado[0].get_usuario(), "ana")
+    self.assertEqual(resultado[1].get_usuario(), "u5")
+    self.assertIsInstance(resultado[2], PIException)
+    self.assertIsInstance(resultado[3], MFPException)
+
+
+class TestAsyncMyTwitter(unittest.IsolatedAsyncioTestCase):
+  """Testes da fachada assíncrona e do servidor de linha"""
+
+  async def test_operacoes_concorrentes(self):
+    twitter = AsyncMyTwitter(gerador_id=gerador_id())
+    await twitter.criar_perfil(Perfil("ana"))
+    await asyncio.gather(*(twitter.criar_perfil(Perfil(f"u{i}")) for i in range(10)))
+    await asyncio.gather(*(twitter.seguir(f"u{i}", "ana") for i in range(10)))
+    tweets = await asyncio.gather(*(twitter.tweetar("ana", f"tweet {i}") for i in range(20)))
+    self.assertEqual(len({tweet.get_id() for tweet in tweets}), 20)
+    self.assertEqual(await twitter.numero_seguidores("ana"), 10)
+    self.assertEqual(len(await twitter.timeline("u3", limit=5)), 5)
+    with self.assertRaises(SIException):
+      await twitter.seguir("ana", "ana")
+
+  async def test_em_thread_com_sqlite(self):
+    repositorio = RepositorioUsuariosSQLite()
+    twitter = AsyncMyTwitter(MyTwitter(repositorio=repositorio), em_thread=True, gerador_id=gerador_id())
+    await asyncio.gather(*(twitter.criar_perfil(Perfil(f"u{i}")) for i in range(5)))
+    await asyncio.gather(*(twitter.tweetar(f"u{i % 5}", "oi") for i in range(10)))
+    self.assertEqual((await twitter.perfil_stats("u0"))['tweets'], 2)
+    twitter.fechar()
+    repositorio.fechar()
+
+  async def test_servidor(self):
+    servidor = await servir(AsyncMyTwitter(gerador_id=gerador_id()), porta=0)
+    leitor, escritor = await asyncio.open_connection(*servidor.sockets[0].getsockname()[:2])
+
+    async def pedir(op, *args):
+      escritor.write(json.dumps({'op': op, 'args': list(args)}).encode() + b'\n')
+      await escritor.drain()
+      return json.loads(await leitor.readline())
+
+    self.assertEqual(await pedir('criar_perfil', {'usuario': "ana", 'tipo': "PessoaFisica", 'documento': "1"}),
+                     {'ok': True, 'resultado': None})
+    resposta = await pedir('tweetar', "ana", "oi")
+    self.assertEqual((resposta['resultado']['id'], resposta['resultado']['mensagem']), (1, "oi"))
+    self.assertEqual([t['mensagem'] for t in (await pedir('timeline', "ana"))['resultado']], ["oi"])
+    self.assertEqual((await pedir('seguir', "ana", "bia"))['erro'], "PIException")
+    self.assertEqual((await pedir('__init__'))['erro'], "ValueError")
+    for usuario in ("bia", "caio", "dora"):
+      await pedir('criar_perfil', {'usuario': usuario, 'tipo': "PessoaFisica", 'documento': "1"})
+      await pedir('seguir', usuario, "ana")
+    pagina = (await pedir('seguidores', "ana", 2))['resultado']
+    self.assertEqual(pagina['itens'], ["bia", "caio"])
+    pagina = (await pedir('seguidores', "ana", 2, pagina['cursor']))['resultado']
+    self.assertEqual(pagina, {'itens': ["dora"], 'cursor': None})
+    escritor.close()
+    servidor.close()
+    await servidor.wait_closed()
+
+  async def test_servidor_linha_grande_demais(self):
+    servidor = await servir(AsyncMyTwitter(gerador_id=gerador_id()), porta=0)
+    leitor, escritor = await asyncio.open_connection(*servidor.sockets[0].getsockname()[:2])
+    escritor.write(b'{"op": "tweetar", "args": ["ana", "' + b'x' * 2**17 + b'"]}\n')
+    await escritor.drain()
+    resposta = json.loads(await leitor.readline())
+    self.assertEqual((resposta['ok'], resposta['erro']), (False, "LimitOverrunError"))
+    self.assertEqual(await leitor.read(), b'') # conexão encerrada pelo servidor
+    escritor.close()
+    servidor.close()
+    await servidor.wait_closed()
+
+
+class TestListaPostagens(unittest.TestCase):
+  """Testes das listas de postagens comprimidas do índice invertido"""
+
+  def test_ids_fora_de_ordem(self):
+    lista = ListaPostagens()
+    lista.adicionar(list(range(0, 1000, 2)))
+    leitura = lista.copia()
+    lista.adicionar([1, 301, 999, 1001])
+    lista.adicionar(list(range(3, 300, 2)) + [1002])
+    esperados = sorted(set(range(0, 1000, 2)) | set(range(1, 300, 2)) | {301, 999, 1001, 1002})
+    self.assertEqual(list(lista.iter_recentes()), esperados[::-1])
+    self.assertEqual(len(lista), len(esperados))
+    self.assertEqual(list(lista.iter_recentes(before_id=302)), [x for x in esperados[::-1] if x < 302])
+    self.assertTrue(lista.contem(301) and not lista.contem(303))
+    self.assertEqual(list(leitura.iter_recentes()), list(range(998, -1, -2)))
+
+
+class TestIndiceUsuarios(unittest.TestCase):
+  """Testes do índice de prefixos das sugestões"""
+
+  def test_topo_desempata_pelo_nome(self):
+    indice = IndiceUsuarios(capacidade=2)
+    perfis = [Perfil(f"a{i}") for i in range(5)]
+    for perfil in perfis:
+      indice.adicionar(perfil)
+    nomes = lambda: [perfil.get_usuario() for perfil in indice.sugerir("a", 2)]
+    self.assertEqual(nomes(), ["a0", "a1"])
+    perfis[4].ajustar_seguidores_ativos(1)
+    indice.atualizar(perfis[4])
+    self.assertEqual(nomes(), ["a4", "a0"])
+    # de volta ao empate, a4 perde para a1 pelo nome e sai do topo
+    perfis[4].ajustar_seguidores_ativos(-1)
+    indice.atualizar(perfis[4])
+    self.assertEqual(nomes(), ["a0", "a1"])
+
+
+class TestTweetStore(unittest.TestCase):
+  """Testes do armazenamento colunar de tweets"""
+
+  def setUp(self):
+    self.gerador_id = gerador_id()
+    self.store = TweetStore()
+    self.twitter = MyTwitter(tweetstore=self.store)
+    self.twitter.criar_perfil(Perfil("ana"))
+    self.twitter.criar_perfil(Perfil("bia"))
+    self.twitter.seguir("ana", "bia")
+
+  def test_tweets_e_timeline(self):
+    self.twitter.tweetar("ana", "olá, mundo", self.gerador_id)
+    self.twitter.tweetar("bia", "ação é ótima", self.gerador_id)
+    self.twitter.tweetar("ana", "tchau", self.gerador_id)
+
+    tweets = self.twitter.tweets("ana")
+    self.assertEqual([t.get_mensagem() for t in tweets], ["tchau", "olá, mundo"])
+    self.assertTrue(all(isinstance(t, TweetView) for t in tweets))
+    self.assertEqual(tweets, self.twitter.tweets("ana"))
+    timeline = self.twitter.timeline("ana")
+    self.assertEqual([(t.get_id(), t.get_usuario()) for t in timeline], [(3, "ana"), (2, "bia"), (1, "ana")])
+    self.assertEqual(timeline[1].get_mensagem(), "ação é ótima")
+    self.assertEqual(len(self.store), 3)
+
+  def test_contar_por_autor(self):
+    for _ in range(3):
+      self.twitter.tweetar("ana", "oi", self.gerador_id)
+    self.twitter.tweetar("bia", "oi", self.gerador_id)
+    self.assertEqual(self.store.contar_por_autor(), {"ana": 3, "bia": 1})
+    agora = datetime.now()
+    self.assertEqual(self.store.contar_por_autor(fim=agora - timedelta(hours=1)), {})
+    self.assertEqual(self.store.contar_por_autor(agora - timedelta(hours=1), agora + timedelta(hours=1)), {"ana": 3, "bia": 1})
+
+  def test_buscar_por_id(self):
+    for id in range(100, 3000, 2):
+      self.twitter.tweetar("ana", f"novo {id}", iter([id]))
+    antigos = [{"usuario": "bia", "mensagem": f"antigo {id}", "id": id, "timestamp": id} for id in range(1, 3000, 2)]
+    self.twitter.bulk_load(tweets=antigos)
+    self.assertEqual(self.twitter._MyTwitter__tweets_por_id, {}) # as visões são criadas sob demanda
+    self.assertEqual(self.twitter.get_tweet(2998).get_mensagem(), "novo 2998")
+    self.assertEqual(self.twitter.get_tweet(1001).get_mensagem(), "antigo 1001")
+    self.assertIsNone(self.store.buscar(3001))
+    existentes = [id for id in range(1, 3000) if id % 2 or id >= 100]
+    self.assertEqual([self.store.buscar(id).get_id() for id in existentes], existentes)
+    self.assertIsNone(self.store.buscar(50))
+
+
+class CenarioRepositorio:
+  """Cenário comum aos testes de repositórios que sobrevivem a uma reabertura"""
+
+  def setUp(self):
+    self.diretorio = tempfile.TemporaryDirectory()
+    self.gerador_id = gerador_id()
+
+  def tearDown(self):
+    self.diretorio.cleanup()
+
+  def popular(self, repositorio):
+    twitter = MyTwitter(repositorio=repositorio)
+    twitter.criar_perfil(PessoaFisica("ana", "123"))
+    twitter.criar_perfil(PessoaJuridica("Loja", "456"))
+    twitter.criar_perfil(Perfil("caio"))
+    twitter.seguir("ana", "Loja")
+    twitter.seguir("caio", "Loja")
+    twitter.seguir("Loja", "caio")
+    twitter.tweetar("Loja", "Promoção de ação!", self.gerador_id)
+    twitter.tweetar("ana", "oi", self.gerador_id)
+    twitter.bloquear("Loja", "caio")
+    twitter.cancelar_perfil("ana")
+    repositorio.fechar()
+
+  def verificar(self, repositorio):
+    twitter = MyTwitter(repositorio=repositorio)
+    self.assertFalse(twitter.existe_usuario("ana"))
+    self.assertEqual(twitter.get_instance_perfil("ana"), "PessoaFisica")
+    self.assertEqual(twitter.get_instance_perfil("loja"), "PessoaJuridica")
+    self.assertEqual(twitter.perfil_stats("Loja"), {'tweets': 1, 'seguidores': 0, 'seguidos': 0})
+    self.assertEqual(twitter.get_tweet(1).get_mensagem(), "Promoção de ação!")
+    self.assertEqual([t.get_id() for t in twitter.timeline("Loja")], [1])
+    with self.assertRaises(PBException):
+      twitter.seguir("caio", "Loja")
+    pagina = twitter.usuarios_cadastrados(limit=2)
+    self.assertEqual(pagina, ["ana (inativo)", "Loja"])
+    self.assertEqual(twitter.usuarios_cadastrados(limit=2, cursor=pagina.cursor), ["caio"])
+    repositorio.fechar()
+
+
+class TestRepositorioUsuariosPersistente(CenarioRepositorio, unittest.TestCase):
+  """Testes do repositório persistido em log de eventos e snapshot"""
+
+  def test_reabrir_reaplica_log(self):
+    self.popular(RepositorioUsuariosPersistente(self.diretorio.name))
+    self.verificar(RepositorioUsuariosPersistente(self.diretorio.name))
+
+  def test_compactacao(self):
+    self.popular(RepositorioUsuariosPersistente(self.diretorio.name, compactar_a_cada=4))
+    self.assertTrue(os.path.exists(os.path.join(self.diretorio.name, 'snapshot.json')))
+    self.verificar(RepositorioUsuariosPersistente(self.diretorio.name))
+
+  def test_ordem_dos_seguidores_apos_compactar(self):
+    repositorio = RepositorioUsuariosPersistente(self.diretorio.name)
+    twitter = MyTwitter(repositorio=repositorio)
+    for nome in ("ana", "bia", "caio", "dora"):
+      twitter.criar_perfil(Perfil(nome))
+    for seguidor, seguido in [("dora", "ana"), ("bia", "caio"), ("bia", "ana"), ("caio", "ana"), ("ana", "caio")]:
+      twitter.seguir(seguidor, seguido)
+    repositorio.compactar()
+    repositorio.fechar()
+    twitter = MyTwitter(repositorio=RepositorioUsuariosPersistente(self.diretorio.name))
+    self.assertEqual([p.get_usuario() for p in twitter.seguidores("ana")], ["dora", "bia", "caio"])
+    self.assertEqual([p.get_usuario() for p in twitter.seguidores("caio")], ["bia", "ana"])
+    self.assertEqual([p.get_usuario() for p in twitter.seguidos("bia")], ["caio", "ana"])
+    pagina = twitter.seguidores("ana", limit=2)
+    self.assertEqual([p.get_usuario() for p in twitter.seguidores("ana", cursor=pagina.cursor)], ["caio"])
+
+  def test_queda_antes_de_truncar_log(self):
+    self.popular(RepositorioUsuariosPersistente(self.diretorio.name))
+    caminho_log = os.path.join(self.diretorio.name, 'eventos.log')
+    with open(caminho_log, encoding='utf-8') as log:
+      eventos = log.read()
+    repositorio = RepositorioUsuariosPersistente(self.diretorio.name)
+    repositorio.compactar()
+    repositorio.fechar()
+    with open(caminho_log, 'w', encoding='utf-8') as log:
+      log.write(eventos) # o snapshot foi trocado, mas o log não chegou a ser truncado
+    self.verificar(RepositorioUsuariosPersistente(self.diretorio.name))
+
+  def test_linha_incompleta_ignorada(self):
+    self.popular(RepositorioUsuariosPersistente(self.diretorio.name))
+    with open(os.path.join(self.diretorio.name, 'eventos.log'), 'a', encoding='utf-8') as log:
+      log.write('{"e":"perfil","usuario":"pel')
+    self.verificar(RepositorioUsuariosPersistente(self.diretorio.name))
+
+
+class TestRepositorioUsuariosPersistenteMapeado(CenarioRepositorio, unittest.TestCase):
+  """Testes do repositório persistido em log de eventos e snapshot binário"""
+
+  def novo_repositorio(self, **kwargs):
+    return RepositorioUsuariosPersistenteMapeado(self.diretorio.name, **kwargs)
+
+  def test_reabrir_reaplica_log(self):
+    self.popular(self.novo_repositorio())
+    self.verificar(self.novo_repositorio())
+
+  def test_compactacao(self):
+    self.popular(self.novo_repositorio(compactar_a_cada=4))
+    self.verificar(self.novo_repositorio())
+
+  def test_abre_sob_demanda(self):
+    self.popular(self.novo_repositorio())
+    repositorio = self.novo_repositorio()
+    MyTwitter(repositorio=repositorio).criar_perfil(Perfil("eva"))
+    repositorio.compactar()
+    repositorio.fechar()
+    repositorio = self.novo_repositorio()
+    twitter = MyTwitter(repositorio=repositorio)
+    self.assertEqual(repositorio.get_usuarios_carregados(), [])
+    twitter.tweetar("caio", "depois da compactação", self.gerador_id)
+    twitter.criar_perfil(Perfil("dora"))
+    twitter.seguir("dora", "Loja")
+    repositorio.fechar()
+    # só os perfis citados pelo final do log (e seus vizinhos) são materializados
+    repositorio = self.novo_repositorio()
+    twitter = MyTwitter(repositorio=repositorio)
+    self.assertEqual(sorted(p.get_usuario() for p in repositorio.get_usuarios_carregados()), ["Loja", "ana", "caio", "dora"])
+    self.assertTrue(twitter.existe_usuario("eva"))
+    self.assertEqual([t.get_mensagem() for t in twitter.tweets("caio")], ["depois da compactação"])
+    self.assertEqual(twitter.perfil_stats("Loja"), {'tweets': 1, 'seguidores': 1, 'seguidos': 0})
+    repositorio.fechar()
+
+
+class TestRepositorioUsuariosSQLite(CenarioRepositorio, unittest.TestCase):
+  """Testes do repositório em SQLite"""
+
+  def novo_repositorio(self):
+    return RepositorioUsuariosSQLite(os.path.join(self.diretorio.name, 'mytwitter.db'))
+
+  def test_reabrir(self):
+    self.popular(self.novo_repositorio())
+    self.verificar(self.novo_repositorio())
+
+  def test_mesmo_objeto_por_usuario(self):
+    repositorio = self.novo_repositorio()
+    twitter = MyTwitter(repositorio=repositorio)
+    twitter.criar_perfil(Perfil("ana"))
+    self.assertIs(repositorio.buscar("ana"), repositorio.buscar("ANA"))
+    with self.assertRaises(SIException):
+      twitter.seguir("ana", "Ana")
+    with self.assertRaises(UJCException):
+      repositorio.cadastrar(Perfil("Ana"))
+    repositorio.fechar()
+
+  def test_timeline_limit(self):
+    repositorio = self.novo_repositorio()
+    twitter = MyTwitter(repositorio=repositorio)
+    twitter.criar_perfil(Perfil("ana"))
+    twitter.criar_perfil(Perfil("bia"))
+    twitter.seguir("ana", "bia")
+    for i in range(5):
+      twitter.tweetar("bia" if i % 2 else "ana", f"tweet {i}", self.gerador_id)
+    self.assertEqual([t.get_id() for t in twitter.timeline("ana", limit=3)], [5, 4, 3])
+    self.assertEqual([t.get_id() for t in twitter.timeline("ana", before_id=3)], [2, 1])
+    self.assertEqual([t.get_id() for t in twitter.timeline("bia")], [4, 2])
+    self.assertEqual([p.get_usuario() for p in twitter.seguidores("bia")], ["ana"])
+    repositorio.fechar()
+
+  def test_timeline_le_apenas_a_pagina(self):
+    repositorio = self.novo_repositorio()
+    twitter = MyTwitter(repositorio=repositorio)
+    twitter.bulk_load(perfis=[{"usuario": f"u{i}"} for i in range(21)],
+                      follows=[("u0", f"u{i}") for i in range(1, 21)],
+                      tweets=[{"usuario": f"u{id % 20 + 1}", "mensagem": "oi", "id": id, "timestamp": id}
+                              for id in range(1, 2001)])
+    passos = [0]
+    repositorio._RepositorioUsuariosSQLite__conexao.set_progress_handler(lambda: passos.__setitem__(0, passos[0] + 1), 10)
+    self.assertEqual([t.get_id() for t in twitter.timeline("u0", limit=5)], [2000, 1999, 1998, 1997, 1996])
+    pagina, passos[0] = passos[0], 0
+    self.assertEqual(len(twitter.timeline("u0")), 2000)
+    # o índice (autor, id) é lido por autor e a leitura de cada um para quando
+    # a página está completa: uma página não percorre todos os tweets dos seguidos
+    self.assertLess(pagina * 10, passos[0])
+    repositorio.fechar()
+
+  def test_seguidores_le_apenas_a_pagina(self):
+    repositorio = self.novo_repositorio()
+    twitter = MyTwitter(repositorio=repositorio)
+    twitter.bulk_load(perfis=[{"usuario": f"u{i}"} for i in range(2001)],
+                      follows=[(f"u{i}", "u0") for i in range(1, 2001)] + [("u0", f"u{i}") for i in range(1, 2001)])
+    passos = [0]
+    repositorio._RepositorioUsuariosSQLite__conexao.set_progress_handler(lambda: passos.__setitem__(0, passos[0] + 1), 10)
+    for listar in (twitter.seguidores, twitter.seguidos):
+      primeira = listar("u0", limit=5)
+      self.assertEqual([p.get_usuario() for p in primeira], [f"u{i}" for i in range(1, 6)])
+      passos[0] = 0
+      segunda = listar("u0", limit=5, cursor=primeira.cursor)
+      self.assertEqual([p.get_usuario() for p in segunda], [f"u{i}" for i in range(6, 11)])
+      pagina, passos[0] = passos[0], 0
+      self.assertEqual(len(listar("u0")), 2000)
+      # o índice (seguido, rowid) / (seguidor, rowid) já está na ordem da paginação:
+      # uma página não ordena nem percorre todos os vínculos
+      self.assertLess(pagina * 10, passos[0])
+    repositorio.fechar()
+
+  def test_sugerir_usuarios(self):
+    repositorio = self.novo_repositorio()
+    twitter = MyTwitter(repositorio=repositorio)
+    for nome in ("ana", "anx", "bia"):
+      twitter.criar_perfil(Perfil(nome))
+    twitter.seguir("bia", "anx")
+    self.assertEqual(twitter.sugerir_usuarios("an"), ["anx", "ana"])
+    twitter.bulk_load(perfis=[{"usuario": "anz"}], follows=[{"seguidor": "anz", "seguido": "ana"},
+                                                             {"seguidor": "bia", "seguido": "ana"}])
+    twitter.seguir("anx", "ana")
+    self.assertEqual(twitter.sugerir_usuarios("an"), ["ana", "anx", "anz"])
+    repositorio.fechar()
+    # ao reabrir, o índice de prefixos é montado a partir dos perfis do banco
+    repositorio = self.novo_repositorio()
+    twitter = MyTwitter(repositorio=repositorio)
+    self.assertEqual(twitter.sugerir_usuarios("an"), ["ana", "anx", "anz"])
+    twitter.seguir("ana", "anz")
+    self.assertEqual(twitter.sugerir_usuarios("anz"), ["anz"])
+    self.assertEqual(twitter.sugerir_usuarios("an", limit=3), ["ana", "anx", "anz"])
+    repositorio.fechar()
+
+  def test_busca_apos_reabrir(self):
+    repositorio = self.novo_repositorio()
+    twitter = MyTwitter(repositorio=repositorio)
+    for nome in ("ana", "bia"):
+      twitter.criar_perfil(Perfil(nome))
+    twitter.tweetar("ana", "Promoção de #Verão para @bia", self.gerador_id)
+    twitter.tweetar("bia", "obrigada!", self.gerador_id)
+    repositorio.fechar()
+    repositorio = self.novo_repositorio()
+    twitter = MyTwitter(repositorio=repositorio)
+    self.assertEqual([t.get_id() for t in twitter.buscar_tweets("promocao")], [1])
+    self.assertEqual([t.get_id() for t in twitter.tweets_por_hashtag("verao")], [1])
+    self.assertEqual([t.get_id() for t in twitter.mencoes("bia")], [1])
+    twitter.tweetar("bia", "outra #verao", self.gerador_id)
+    self.assertEqual([t.get_id() for t in twitter.tweets_por_hashtag("verao")], [3, 1])
+    repositorio.fechar()
+
+
+class TestRepositorioUsuariosMapeado(unittest.TestCase):
+  """Testes do snapshot binário carregado sob demanda"""
+
+  def setUp(self):
+    self.diretorio = tempfile.TemporaryDirectory()
+    self.caminho = os.path.join(self.diretorio.name, 'snapshot.bin')
+    twitter = MyTwitter()
+    gerador = gerador_id()
+    twitter.criar_perfil(PessoaFisica("ana", "123"))
+    twitter.criar_perfil(PessoaJuridica("Loja", "456"))
+    twitter.criar_perfil(Perfil("caio"))
+    twitter.criar_perfil(Perfil("dora"))
+    twitter.criar_perfil(Perfil("eva"))
+    twitter.seguir("ana", "Loja")
+    twitter.seguir("caio", "Loja")
+    twitter.seguir("dora", "Loja")
+    twitter.tweetar("Loja", "Promoção de ação!", gerador)
+    twitter.tweetar("ana", "oi", gerador)
+    twitter.tweetar("dora", "sozinha", gerador)
+    twitter.bloquear("Loja", "caio")
+    twitter.cancelar_perfil("ana")
+    self.original = twitter
+    gravar_snapshot(self.caminho, [twitter._MyTwitter__repositorio.buscar(u) for u in ("ana", "Loja", "caio", "dora", "eva")])
+    self.repositorio = RepositorioUsuariosMapeado(self.caminho)
+
+  def tearDown(self):
+    self.repositorio.fechar()
+    self.diretorio.cleanup()
+
+  def test_carrega_sob_demanda(self):
+    twitter = MyTwitter(repositorio=self.repositorio)
+    self.assertEqual(self.repositorio.get_usuarios_carregados(), [])
+    self.assertTrue(twitter.existe_usuario("LOJA"))
+    self.assertFalse(twitter.existe_usuario("ana"))
+    self.assertFalse(twitter.existe_usuario("ninguem"))
+    self.assertEqual([t.get_mensagem() for t in twitter.timeline("caio")], [])
+    self.assertNotIn("eva", [p.get_usuario() for p in self.repositorio.get_usuarios_carregados()])
+    self.assertEqual([t.get_mensagem() for t in twitter.timeline("Loja")], ["Promoção de ação!"])
+
+  def test_estado_preservado(self):
+    twitter = MyTwitter(repositorio=self.repositorio)
+    self.assertEqual(twitter.get_instance_perfil("ana"), "PessoaFisica")
+    self.assertEqual(twitter.perfil_stats("Loja"), self.original.perfil_stats("Loja"))
+    self.assertEqual([p.get_usuario() for p in twitter.seguidores("Loja")], ["dora"])
+    with self.assertRaises(PBException):
+      twitter.seguir("caio", "Loja")
+    with self.assertRaises(PEException):
+      twitter.criar_perfil(Perfil("Dora"))
+    self.assertCountEqual([p.get_usuario() for p in self.repositorio.get_usuarios()], ["ana", "Loja", "caio", "dora", "eva"])
+
+  def test_get_tweet_carrega_autor(self):
+    twitter = MyTwitter(repositorio=self.repositorio)
+    self.assertEqual(twitter.get_tweet(3).get_mensagem(), "sozinha")
+    self.assertTrue(twitter.existe_usuario("eva"))
+    with self.assertRaises(TIException):
+      twitter.get_tweet(99)
+
+  def test_somente_importacao(self):
+    twitter = MyTwitter(repositorio=self.repositorio)
+    twitter.seguir("eva", "Loja")
+    twitter.criar_perfil(Perfil("fabio"))
+    self.assertFalse(self.repositorio.precisa_compactar())
+    self.repositorio.fechar()
+    self.repositorio = RepositorioUsuariosMapeado(self.caminho)
+    twitter = MyTwitter(repositorio=self.repositorio)
+    self.assertFalse(twitter.existe_usuario("fabio"))
+    self.assertEqual(twitter.seguidos("eva"), [])
+    twitter.seguir("eva", "Loja")
+    gravar_snapshot(self.caminho, self.repositorio.get_usuarios())
+    self.repositorio.fechar()
+    self.repositorio = RepositorioUsuariosMapeado(self.caminho)
+    self.assertEqual([p.get_usuario() for p in MyTwitter(repositorio=self.repositorio).seguidos("eva")], ["Loja"])
+
 
 class TestRepositorioUsuarios(unittest.TestCase):
   """Testes para a classe RepositorioUsuarios"""
@@ -184,7 +1214,28 @@ class TestRepositorioUsuarios(unittest.TestCase):
     except UJCException :
       pass
   
-  def test_atualizar_usuario_nao_existente(self): 
+  def test_buscar_case_insensitive(self):
+    """Testa se a busca ignora maiúsculas e minúsculas"""
+    repositorio = RepositorioUsuarios()
+    jolyne = Perfil('Jolyne')
+    repositorio.cadastrar(jolyne)
+    self.assertIs(repositorio.buscar('JOLYNE'), jolyne)
+    self.assertIs(repositorio.buscar('jolyne'), jolyne)
+    with self.assertRaises(UJCException):
+      repositorio.cadastrar(Perfil('jOLYNE'))
+
+  def test_atualizar_renomeado_libera_nome_antigo(self):
+    """Testa se, após renomear e atualizar, o nome antigo deixa de ser encontrado"""
+    repositorio = RepositorioUsuarios()
+    jolyne = Perfil('Jolyne')
+    repositorio.cadastrar(jolyne)
+    jolyne.set_usuario('Jolyne Kujo')
+    repositorio.atualizar(jolyne)
+    self.assertIsNone(repositorio.buscar('Jolyne'))
+    repositorio.cadastrar(Perfil('Jolyne'))
+    self.assertEqual(len(repositorio.get_usuarios()), 2)
+
+  def test_atualizar_usuario_nao_existente(self):
     """Testa a atualização de um usuário que não foi cadastrado"""
     repositorio = RepositorioUsuarios()
     rakon = Perfil('Rakon')
@@ -238,6 +1289,11 @@ class TestPerfil(unittest.TestCase):
     id = teste.get_id()
     self.assertEqual(francisca.get_tweet(id), teste)
 
+  def test_get_tweet_inexistente(self):
+    francisca = Perfil('francisca')
+    francisca.add_tweet(Tweet('francisca','teste'))
+    self.assertIsNone(francisca.get_tweet(-1))
+
   def test_get_usuario(self):
     francisca = Perfil('francisca')
     self.assertEqual(francisca.get_usuario(), 'francisca')
@@ -268,6 +1324,15 @@ class TestPerfil(unittest.TestCase):
     francisca.add_seguidos('joao')
     self.assertEqual(francisca.get_seguidos(), ['joao'])
 
+  def test_segue(self):
+    francisca = Perfil('francisca')
+    joao = Perfil('joao')
+    francisca.add_seguidos(joao)
+    joao.add_seguidor(francisca)
+    self.assertTrue(francisca.segue(joao))
+    self.assertTrue(joao.is_seguido_por(francisca))
+    self.assertFalse(joao.segue(francisca))
+
   def test_numero_seguidores(self):
     francisca = Perfil('francisca')
     joao = Perfil('joao')